@@ -14,6 +14,10 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # orjson-backed jsonify and request.get_json (see services.serialization)
+    from app.services.serialization import OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
@@ -22,7 +26,7 @@ def create_app(config_name='default'):
     CORS(app, supports_credentials=True)
     
     # Register blueprints
-    from app.routes import auth, activities, nutrition, goals, ai, community, dashboard
+    from app.routes import auth, activities, nutrition, goals, ai, community, dashboard, weight, ingest, timeline, sync, batch
     
     app.register_blueprint(auth.bp)
     app.register_blueprint(activities.bp)
@@ -31,6 +35,19 @@ def create_app(config_name='default'):
     app.register_blueprint(ai.bp)
     app.register_blueprint(community.bp)
     app.register_blueprint(dashboard.bp)
+    app.register_blueprint(weight.bp)
+    app.register_blueprint(ingest.bp)
+    app.register_blueprint(timeline.bp)
+    app.register_blueprint(sync.bp)
+    app.register_blueprint(batch.bp)
+    
+    # Record activity, nutrition and goal writes in the sync change log
+    from app.services import sync as sync_log
+    sync_log.install()
+    
+    # Bump ETag resource versions on writes to derived rows
+    from app.services import http_cache
+    http_cache.install()
     
     @app.route('/')
     def root():
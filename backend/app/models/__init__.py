@@ -1,10 +1,13 @@
 from app.models.user import User
-from app.models.activity import Activity
-from app.models.nutrition import Nutrition
-from app.models.goal import Goal
+from app.models.activity import Activity, ActivityCalendar, PersonalRecord, ActivityStream
+from app.models.nutrition import Nutrition, SavedMeal, SavedMealItem, FrequentFood
+from app.models.goal import Goal, GoalProgressEvent
+from app.models.weight import WeightLog, TdeeEstimate
+from app.models.ingest import IngestEvent, IngestCursor, DailyWearableSummary
+from app.models.sync import SyncChange
 from app.models.community import CommunityPost, Challenge, Comment, PostLike, ChallengeParticipant
 
-__all__ = ['User', 'Activity', 'Nutrition', 'Goal', 'CommunityPost', 'Challenge', 'Comment', 'PostLike', 'ChallengeParticipant']
+__all__ = ['User', 'Activity', 'ActivityCalendar', 'PersonalRecord', 'ActivityStream', 'Nutrition', 'SavedMeal', 'SavedMealItem', 'FrequentFood', 'Goal', 'GoalProgressEvent', 'WeightLog', 'TdeeEstimate', 'IngestEvent', 'IngestCursor', 'DailyWearableSummary', 'SyncChange', 'CommunityPost', 'Challenge', 'Comment', 'PostLike', 'ChallengeParticipant']
 
 
 
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.serialization import RowSerializer
 
 
 class Activity(db.Model):
@@ -15,26 +16,111 @@ class Activity(db.Model):
     duration_minutes = db.Column(db.Integer)
     distance = db.Column(db.Float)
     calories_burned = db.Column(db.Integer)
+    # True when calories_burned came from the MET estimator rather than the user
+    calories_estimated = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     intensity = db.Column(db.String(20))
     
+    # Device workout id for activities materialized from the ingest log
+    external_id = db.Column(db.String(100))
+    
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # User's calendar day for `date`, in their timezone at write time (see services.local_time)
+    local_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_activities_user_local_date', 'user_id', 'local_date'),
+        db.Index('ix_activities_user_external_id', 'user_id', 'external_id'),
+        # Keyset pagination in date order (see services.timeline)
+        db.Index('ix_activities_user_date_id', 'user_id', 'date', 'id'),
+        # Sync clients hold ids of deleted rows as tombstones, so ids must never be reused
+        {'sqlite_autoincrement': True},
+    )
+    
+    # Listed explicitly so internal columns (external_id) stay out of API responses
+    serializer = RowSerializer(fields=(
+        'id', 'user_id', 'activity_type', 'title', 'description', 'duration_minutes', 'distance',
+        'calories_burned', 'calories_estimated', 'intensity', 'date', 'local_date', 'created_at'
+    ))
+    
+    streams = db.relationship('ActivityStream', backref='activity', lazy='dynamic', cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return self.serializer.dump(self)
+
+
+class ActivityCalendar(db.Model):
+    """
+    Per-user bitmap of days with at least one activity (see services.streaks).
+    
+    Bit i of `bits` (little-endian within each byte) is the local day origin + i.
+    A year of history is 46 bytes.
+    """
+    __tablename__ = 'activity_calendars'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    
+    origin = db.Column(db.Date)
+    bits = db.Column(db.LargeBinary, nullable=False, default=b'')
+    active_days = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Most recent run of consecutive active days, and the longest run ever
+    last_active_date = db.Column(db.Date)
+    last_run_length = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak_end = db.Column(db.Date)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PersonalRecord(db.Model):
+    """A user's best value for one record type (see services.personal_records)."""
+    __tablename__ = 'personal_records'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    record_type = db.Column(db.String(40), nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    
+    # The activity that set the record; weekly records point at a week instead.
+    # Not a foreign key: the row is recomputed in the same transaction the activity is deleted in.
+    activity_id = db.Column(db.Integer)
+    period_start = db.Column(db.Date)
+    achieved_on = db.Column(db.Date)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'record_type', name='uq_personal_records_user_type'),)
+    
     def to_dict(self):
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'activity_type': self.activity_type,
-            'title': self.title,
-            'description': self.description,
-            'duration_minutes': self.duration_minutes,
-            'distance': self.distance,
-            'calories_burned': self.calories_burned,
-            'intensity': self.intensity,
-            'date': self.date.isoformat() if self.date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'record_type': self.record_type,
+            'value': self.value,
+            'activity_id': self.activity_id,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'achieved_on': self.achieved_on.isoformat() if self.achieved_on else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 
-
+class ActivityStream(db.Model):
+    """
+    One channel of an activity's sample data (heart rate, latitude, ...) as a
+    compressed, delta-encoded array (see services.activity_streams).
+    
+    Level 0 holds every sample; level 1 is a fixed-size overview for charts.
+    """
+    __tablename__ = 'activity_streams'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    activity_id = db.Column(db.Integer, db.ForeignKey('activities.id'), nullable=False)
+    
+    channel = db.Column(db.String(20), nullable=False)
+    level = db.Column(db.Integer, nullable=False, default=0)
+    sample_count = db.Column(db.Integer, nullable=False)
+    scale = db.Column(db.Float, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('activity_id', 'level', 'channel', name='uq_activity_streams_channel'),)
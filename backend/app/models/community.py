@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.serialization import RowSerializer
 
 
 class PostLike(db.Model):
@@ -44,21 +45,15 @@ class CommunityPost(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    serializer = RowSerializer(fields=(
+        'id', 'user_id', 'title', 'content', 'post_type', 'likes_count', 'comments_count',
+        'created_at', 'updated_at'
+    ))
+    
     comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade='all, delete-orphan')
     
     def to_dict(self, include_comments=False):
-        result = {
-            'id': self.id,
-            'user_id': self.user_id,
-            'username': self.user.username if self.user else None,
-            'title': self.title,
-            'content': self.content,
-            'post_type': self.post_type,
-            'likes_count': self.likes_count,
-            'comments_count': self.comments_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        result = {**self.serializer.dump(self), 'username': self.user.username if self.user else None}
         if include_comments:
             result['comments'] = [comment.to_dict() for comment in self.comments.order_by(Comment.created_at.desc()).all()]
         return result
@@ -77,15 +72,10 @@ class Comment(db.Model):
     
     user = db.relationship('User', backref='user_comments', lazy=True)
     
+    serializer = RowSerializer(fields=('id', 'post_id', 'user_id', 'content', 'created_at'))
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'post_id': self.post_id,
-            'user_id': self.user_id,
-            'username': self.user.username if self.user else None,
-            'content': self.content,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return {**self.serializer.dump(self), 'username': self.user.username if self.user else None}
 
 
 class Challenge(db.Model):
@@ -108,20 +98,13 @@ class Challenge(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    serializer = RowSerializer(fields=(
+        'id', 'title', 'description', 'challenge_type', 'target_value', 'unit', 'start_date',
+        'end_date', 'participants_count', 'is_active', 'created_at'
+    ))
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'challenge_type': self.challenge_type,
-            'target_value': self.target_value,
-            'unit': self.unit,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'participants_count': self.participants_count,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return self.serializer.dump(self)
 
 
 
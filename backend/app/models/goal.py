@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
+from app.services.serialization import RowSerializer
 
 
 class Goal(db.Model):
@@ -17,36 +18,148 @@ class Goal(db.Model):
     unit = db.Column(db.String(50))
     
     status = db.Column(db.String(20), default='active')
+    # First day of the day/week that current_value covers, for goals tracked per period
+    # (see services.goal_tracker)
+    period_start = db.Column(db.Date)
     
     start_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     target_date = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
+    # True while the goal is completed because the tracker saw it reach its target; such
+    # goals keep being tracked and reopen if withdrawn entries take them back below it
+    auto_completed = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
+    # Running sums of (t, current_value) over every progress event, t in days since
+    # FORECAST_EPOCH, so the completion forecast is a least-squares fit in O(1)
+    progress_points = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    sum_t = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    sum_v = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    sum_tt = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    sum_tv = db.Column(db.Float, nullable=False, default=0, server_default='0')
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Listed explicitly so the forecast sums stay internal; to_dict adds the forecast itself
+    serializer = RowSerializer(fields=(
+        'id', 'user_id', 'goal_type', 'title', 'description', 'target_value', 'current_value',
+        'unit', 'status', 'period_start', 'start_date', 'target_date', 'completed_at',
+        'created_at', 'updated_at'
+    ))
+    
+    events = db.relationship('GoalProgressEvent', backref='goal', lazy='dynamic', cascade='all, delete-orphan')
+    
+    FORECAST_EPOCH = datetime(2020, 1, 1)
+    # Points must span at least this many days before a trend is fitted
+    MIN_FORECAST_SPAN_DAYS = 1 / 24
+    MAX_FORECAST_DAYS = 3650
+    
+    # Write hooks look up a user's active goals of the affected types
+    # and the timeline pages through goal milestones by time
+    __table_args__ = (
+        db.Index('ix_goals_user_status_type', 'user_id', 'status', 'goal_type'),
+        db.Index('ix_goals_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_goals_user_completed', 'user_id', 'completed_at', 'id'),
+        # Sync clients hold ids of deleted rows as tombstones, so ids must never be reused
+        {'sqlite_autoincrement': True},
+    )
+    
+    @staticmethod
+    def forecast_time(moment=None):
+        """Days since FORECAST_EPOCH, the t axis of the progress fit."""
+        return ((moment or datetime.utcnow()) - Goal.FORECAST_EPOCH).total_seconds() / 86400
+    
+    @staticmethod
+    def progress_point_values(value, t):
+        """Column updates adding (t, value) to the running sums; value may be a SQL expression."""
+        return {
+            Goal.progress_points: Goal.progress_points + 1,
+            Goal.sum_t: Goal.sum_t + t,
+            Goal.sum_v: Goal.sum_v + value,
+            Goal.sum_tt: Goal.sum_tt + t * t,
+            Goal.sum_tv: Goal.sum_tv + value * t
+        }
+    
+    def add_progress_point(self, moment=None):
+        """Add the current value at `moment` to the running sums of this loaded goal."""
+        t = Goal.forecast_time(moment)
+        value = self.current_value or 0
+        self.progress_points = (self.progress_points or 0) + 1
+        self.sum_t = (self.sum_t or 0) + t
+        self.sum_v = (self.sum_v or 0) + value
+        self.sum_tt = (self.sum_tt or 0) + t * t
+        self.sum_tv = (self.sum_tv or 0) + value * t
+    
+    def forecast(self):
+        """
+        Projected completion time from a linear fit of progress over time.
+        
+        Returns:
+            (projected_completion datetime or None, on_track bool or None).
+            on_track is None when the goal has no target_date.
+        """
+        if self.status == 'completed':
+            if self.target_date is None:
+                return self.completed_at, None
+            return self.completed_at, self.completed_at is None or self.completed_at <= self.target_date
+        
+        # Per-day and per-week goals restart every period, so there is no single completion
+        if self.period_start is not None:
+            return None, None
+        
+        projected = None
+        n = self.progress_points or 0
+        if n >= 2:
+            spread = n * self.sum_tt - self.sum_t ** 2
+            if spread / (n * n) >= Goal.MIN_FORECAST_SPAN_DAYS ** 2:
+                slope = (n * self.sum_tv - self.sum_t * self.sum_v) / spread
+                if slope > 0:
+                    intercept = (self.sum_v - slope * self.sum_t) / n
+                    now = Goal.forecast_time()
+                    t_done = max((self.target_value - intercept) / slope, now)
+                    if t_done - now <= Goal.MAX_FORECAST_DAYS:
+                        projected = Goal.FORECAST_EPOCH + timedelta(days=t_done)
+        
+        if self.target_date is None:
+            return projected, None
+        return projected, projected is not None and projected <= self.target_date
+    
     def to_dict(self):
         progress_percentage = 0
         if self.target_value > 0:
             progress_percentage = min((self.current_value / self.target_value) * 100, 100)
         
+        projected_completion, on_track = self.forecast()
+        
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'goal_type': self.goal_type,
-            'title': self.title,
-            'description': self.description,
-            'target_value': self.target_value,
-            'current_value': self.current_value,
-            'unit': self.unit,
-            'status': self.status,
+            **self.serializer.dump(self),
             'progress_percentage': round(progress_percentage, 1),
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'target_date': self.target_date.isoformat() if self.target_date else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'projected_completion': projected_completion,
+            'on_track': on_track
         }
 
 
-
+class GoalProgressEvent(db.Model):
+    """Append-only record of every change to a goal's current_value."""
+    __tablename__ = 'goal_progress_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    goal_id = db.Column(db.Integer, db.ForeignKey('goals.id'), nullable=False)
+    
+    value = db.Column(db.Float, nullable=False)  # current_value after the change
+    delta = db.Column(db.Float)
+    source = db.Column(db.String(20), nullable=False)  # created, manual, activity, nutrition, period, recompute
+    
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_goal_progress_events_goal_recorded', 'goal_id', 'recorded_at'),)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'goal_id': self.goal_id,
+            'value': self.value,
+            'delta': self.delta,
+            'source': self.source,
+            'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None
+        }
@@ -0,0 +1,69 @@
+from datetime import datetime
+from app import db
+
+
+class IngestEvent(db.Model):
+    """
+    One device event in the append-only ingest log (see services.ingest).
+    
+    Rows are only ever inserted by the ingest endpoint. The consumer reads them in
+    id order behind IngestCursor and materializes them into activities and
+    daily rollups; consumed rows are pruned after a retention window.
+    """
+    __tablename__ = 'ingest_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    device_id = db.Column(db.String(100))
+    event_type = db.Column(db.String(20), nullable=False)
+    # Client-side idempotency key; a resent event with the same key is dropped
+    external_id = db.Column(db.String(100))
+    payload = db.Column(db.Text, nullable=False)
+    
+    event_time = db.Column(db.DateTime, nullable=False)
+    local_date = db.Column(db.Date, nullable=False)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Ids must never be reused once pruned rows are gone, or the cursor would skip new events
+    __table_args__ = (
+        db.Index('ix_ingest_events_user_external_id', 'user_id', 'external_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class IngestCursor(db.Model):
+    """Offset of the last ingest event a consumer has materialized."""
+    __tablename__ = 'ingest_cursors'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyWearableSummary(db.Model):
+    """Per-user, per-local-day rollup of step counts and heart-rate summaries from devices."""
+    __tablename__ = 'daily_wearable_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    local_date = db.Column(db.Date, nullable=False)
+    
+    steps = db.Column(db.Integer, nullable=False, default=0)
+    resting_heart_rate = db.Column(db.Integer)
+    # Sample-weighted average across every heart-rate summary received for the day
+    avg_heart_rate = db.Column(db.Float)
+    heart_rate_samples = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'local_date', name='uq_daily_wearable_user_date'),)
+    
+    def to_dict(self):
+        return {
+            'local_date': self.local_date.isoformat(),
+            'steps': self.steps,
+            'resting_heart_rate': self.resting_heart_rate,
+            'avg_heart_rate': round(self.avg_heart_rate, 1) if self.avg_heart_rate is not None else None,
+            'heart_rate_samples': self.heart_rate_samples
+        }
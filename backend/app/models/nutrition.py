@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.serialization import RowSerializer
 
 
 class Nutrition(db.Model):
@@ -21,26 +22,167 @@ class Nutrition(db.Model):
     serving_size = db.Column(db.String(50))
     quantity = db.Column(db.Float, default=1.0)
     
+    # Saved meal this entry was logged from, if any (see POST /api/nutrition/log-meal)
+    saved_meal_id = db.Column(db.Integer, db.ForeignKey('saved_meals.id'))
+    
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # User's calendar day for `date`, in their timezone at write time (see services.local_time)
+    local_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_nutrition_user_local_date', 'user_id', 'local_date'),
+        # Keyset pagination in date order (see services.timeline)
+        db.Index('ix_nutrition_user_date_id', 'user_id', 'date', 'id'),
+        # Sync clients hold ids of deleted rows as tombstones, so ids must never be reused
+        {'sqlite_autoincrement': True},
+    )
+    
+    # Listed explicitly so internal columns (saved_meal_id) stay out of API responses
+    serializer = RowSerializer(fields=(
+        'id', 'user_id', 'meal_type', 'food_name', 'description', 'calories', 'protein',
+        'carbohydrates', 'fats', 'fiber', 'serving_size', 'quantity', 'date', 'local_date', 'created_at'
+    ))
+    
     def to_dict(self):
-        return {
+        return self.serializer.dump(self)
+
+
+class SavedMeal(db.Model):
+    """
+    A user's saved meal or recipe: a named list of food items.
+    
+    Nutrition totals across all items are cached on the row and recomputed only
+    when the items change, so listing meals never touches the item table.
+    """
+    __tablename__ = 'saved_meals'
+    
+    TOTAL_FIELDS = ('calories', 'protein', 'carbohydrates', 'fats', 'fiber')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    name = db.Column(db.String(200), nullable=False)
+    meal_type = db.Column(db.String(50))
+    description = db.Column(db.Text)
+    
+    total_calories = db.Column(db.Integer, nullable=False, default=0)
+    total_protein = db.Column(db.Float, nullable=False, default=0)
+    total_carbohydrates = db.Column(db.Float, nullable=False, default=0)
+    total_fats = db.Column(db.Float, nullable=False, default=0)
+    total_fiber = db.Column(db.Float, nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    times_logged = db.Column(db.Integer, nullable=False, default=0)
+    last_logged_at = db.Column(db.DateTime)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    items = db.relationship('SavedMealItem', backref='meal', order_by='SavedMealItem.position',
+                            cascade='all, delete-orphan')
+    
+    def set_items(self, items):
+        """Replace the meal's items and refresh the cached totals."""
+        self.items = [SavedMealItem(position=position, **item) for position, item in enumerate(items)]
+        totals = dict.fromkeys(self.TOTAL_FIELDS, 0.0)
+        for item in self.items:
+            for field in self.TOTAL_FIELDS:
+                totals[field] += item.amount(field)
+        
+        self.total_calories = round(totals['calories'])
+        self.total_protein = round(totals['protein'], 1)
+        self.total_carbohydrates = round(totals['carbohydrates'], 1)
+        self.total_fats = round(totals['fats'], 1)
+        self.total_fiber = round(totals['fiber'], 1)
+        self.item_count = len(self.items)
+    
+    def to_dict(self, include_items=False):
+        result = {
             'id': self.id,
-            'user_id': self.user_id,
+            'name': self.name,
             'meal_type': self.meal_type,
-            'food_name': self.food_name,
             'description': self.description,
+            'totals': {field: getattr(self, f'total_{field}') for field in self.TOTAL_FIELDS},
+            'item_count': self.item_count,
+            'times_logged': self.times_logged,
+            'last_logged_at': self.last_logged_at.isoformat() if self.last_logged_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_items:
+            result['items'] = [item.to_dict() for item in self.items]
+        return result
+
+
+class SavedMealItem(db.Model):
+    """One food in a saved meal. Nutrient values are per serving; quantity is servings."""
+    __tablename__ = 'saved_meal_items'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    meal_id = db.Column(db.Integer, db.ForeignKey('saved_meals.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    
+    food_name = db.Column(db.String(200), nullable=False)
+    serving_size = db.Column(db.String(50))
+    quantity = db.Column(db.Float, nullable=False, default=1.0)
+    
+    calories = db.Column(db.Float, nullable=False)
+    protein = db.Column(db.Float)
+    carbohydrates = db.Column(db.Float)
+    fats = db.Column(db.Float)
+    fiber = db.Column(db.Float)
+    
+    def amount(self, field, servings=1.0):
+        """Total of a nutrient for this item's quantity, times `servings` of the whole meal."""
+        return (getattr(self, field) or 0) * (self.quantity or 0) * servings
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'food_name': self.food_name,
+            'serving_size': self.serving_size,
+            'quantity': self.quantity,
             'calories': self.calories,
             'protein': self.protein,
             'carbohydrates': self.carbohydrates,
             'fats': self.fats,
-            'fiber': self.fiber,
-            'serving_size': self.serving_size,
-            'quantity': self.quantity,
-            'date': self.date.isoformat() if self.date else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'fiber': self.fiber
         }
 
 
-
+class FrequentFood(db.Model):
+    """
+    One food a user logs, ranked by an exponentially decayed use count (see services.frequent_foods).
+    
+    Nutrient values are those of the most recent entry for the food, so a quick-log
+    repeats it exactly.
+    """
+    __tablename__ = 'frequent_foods'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Normalized food name: lowercased, whitespace collapsed
+    food_key = db.Column(db.String(200), nullable=False)
+    
+    food_name = db.Column(db.String(200), nullable=False)
+    meal_type = db.Column(db.String(50))
+    calories = db.Column(db.Integer, nullable=False)
+    protein = db.Column(db.Float)
+    carbohydrates = db.Column(db.Float)
+    fats = db.Column(db.Float)
+    fiber = db.Column(db.Float)
+    serving_size = db.Column(db.String(50))
+    quantity = db.Column(db.Float)
+    
+    # log2 of the sum of 2^(t / half-life) over every use, t measured from a fixed
+    # epoch. Every food decays at the same rate, so ordering by this column is
+    # ordering by the decayed count at any moment.
+    log_score = db.Column(db.Float, nullable=False)
+    times_logged = db.Column(db.Integer, nullable=False, default=0)
+    last_logged_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'food_key', name='uq_frequent_foods_user_key'),
+        db.Index('ix_frequent_foods_user_score', 'user_id', 'log_score'),
+    )
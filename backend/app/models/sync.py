@@ -0,0 +1,36 @@
+from datetime import datetime
+from app import db
+
+
+class SyncChange(db.Model):
+    """
+    Latest change to one synced entity, stamped with the user's sync sequence number.
+    
+    The log keeps one row per entity: a newer change replaces the older row, so a
+    client catching up reads each changed entity once however often it was edited.
+    Deletes stay behind as tombstones (op 'delete').
+    """
+    __tablename__ = 'sync_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    
+    entity = db.Column(db.String(20), nullable=False)  # activity, nutrition, goal
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'entity', 'entity_id', name='uq_sync_changes_user_entity'),
+        db.Index('ix_sync_changes_user_seq', 'user_id', 'seq'),
+    )
+    
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'entity': self.entity,
+            'id': self.entity_id,
+            'op': self.op,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
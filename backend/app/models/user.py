@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.services.serialization import RowSerializer
 import bcrypt
 
 
@@ -25,13 +26,45 @@ class User(db.Model):
     target_weight_lbs = db.Column(db.Integer)
     weight_goal_rate = db.Column(db.Float)  # lbs per week (positive for gain, negative for loss)
     daily_calorie_goal = db.Column(db.Integer)
+    timezone = db.Column(db.String(64), default='UTC')  # IANA name, e.g. 'America/New_York'
+    
+    # Stored results of CalorieCalculator, refreshed whenever a profile input changes
+    # (see CalorieCalculator.refresh_stored_profile) and by `flask recompute-calorie-targets`
+    bmr = db.Column(db.Integer)
+    tdee = db.Column(db.Integer)
+    target_calories = db.Column(db.Integer)
+    calorie_profile_fingerprint = db.Column(db.String(16))
+    
+    # Bumped on every activity, nutrition, goal or profile write; keys cached AI results
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Last sequence number handed out to this user's sync change log (see services.sync)
+    sync_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Per-resource write counters; ETags for conditional GETs are built from them (see services.http_cache)
+    activities_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    nutrition_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    goals_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    weight_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    profile_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Counter UPDATEs pin this (updated_at=User.updated_at) so it only moves on profile edits
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Listed explicitly so new internal columns stay out of API responses
+    serializer = RowSerializer(fields=(
+        'id', 'email', 'username', 'first_name', 'last_name', 'age', 'gender',
+        'height_feet', 'height_inches', 'weight_lbs', 'fitness_level', 'activity_level',
+        'target_weight_lbs', 'weight_goal_rate', 'daily_calorie_goal', 'timezone',
+        'created_at', 'updated_at'
+    ))
+    
     activities = db.relationship('Activity', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     nutrition_logs = db.relationship('Nutrition', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     goals = db.relationship('Goal', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    weight_logs = db.relationship('WeightLog', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    tdee_estimate = db.relationship('TdeeEstimate', uselist=False, cascade='all, delete-orphan')
     community_posts = db.relationship('CommunityPost', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def set_password(self, password):
@@ -40,26 +73,15 @@ class User(db.Model):
     def check_password(self, password):
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
     
+    @staticmethod
+    def bump_data_version(user_id):
+        """Atomically increment a user's data version as part of the current transaction."""
+        User.query.filter_by(id=user_id).update(
+            {User.data_version: User.data_version + 1, User.updated_at: User.updated_at}, synchronize_session=False
+        )
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'username': self.username,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'age': self.age,
-            'gender': self.gender,
-            'height_feet': self.height_feet,
-            'height_inches': self.height_inches,
-            'weight_lbs': self.weight_lbs,
-            'fitness_level': self.fitness_level,
-            'activity_level': self.activity_level,
-            'target_weight_lbs': self.target_weight_lbs,
-            'weight_goal_rate': self.weight_goal_rate,
-            'daily_calorie_goal': self.daily_calorie_goal,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return self.serializer.dump(self)
 
 
 
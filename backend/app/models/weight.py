@@ -0,0 +1,65 @@
+from datetime import datetime
+from app import db
+
+
+class WeightLog(db.Model):
+    __tablename__ = 'weight_logs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    weight_lbs = db.Column(db.Float, nullable=False)
+    note = db.Column(db.String(200))
+    
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    local_date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_weight_logs_user_local_date', 'user_id', 'local_date'),)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'weight_lbs': self.weight_lbs,
+            'note': self.note,
+            'date': self.date.isoformat() if self.date else None,
+            'local_date': self.local_date.isoformat() if self.local_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class TdeeEstimate(db.Model):
+    """
+    Running state of a user's adaptive TDEE estimator (see services.adaptive_tdee).
+    
+    One row per user. Every field is updated in place as weights and meals are
+    logged, so the estimate never needs the history replayed.
+    """
+    __tablename__ = 'tdee_estimates'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    
+    trend_weight = db.Column(db.Float)        # exponentially smoothed weight, lbs
+    tdee = db.Column(db.Float)                # estimated calories/day
+    tdee_variance = db.Column(db.Float)       # uncertainty of tdee, calories^2
+    observations = db.Column(db.Integer, nullable=False, default=0)
+    
+    # First and last weigh-in days folded into the trend, and intake logged since the last
+    first_weight_date = db.Column(db.Date)
+    last_weight_date = db.Column(db.Date)
+    intake_calories = db.Column(db.Float, nullable=False, default=0)
+    intake_days = db.Column(db.Integer, nullable=False, default=0)
+    last_intake_date = db.Column(db.Date)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'trend_weight': round(self.trend_weight, 1) if self.trend_weight is not None else None,
+            'tdee': round(self.tdee) if self.tdee is not None else None,
+            'uncertainty': round(self.tdee_variance ** 0.5) if self.tdee_variance is not None else None,
+            'observations': self.observations,
+            'last_weight_date': self.last_weight_date.isoformat() if self.last_weight_date else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
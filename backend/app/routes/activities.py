@@ -1,32 +1,42 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+import math
 from app import db
-from app.models import Activity
+from app.models import Activity, User
+from app.services import activity_streams, local_time
+from app.services.goal_tracker import GoalTracker
+from app.services.http_cache import conditional_get
+from app.services.met_estimator import MetEstimator
+from app.services.personal_records import PersonalRecords
+from app.services.streaks import StreakTracker
 
 bp = Blueprint('activities', __name__, url_prefix='/api/activities')
 
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional_get('activities', daily=True)
 def get_activities():
     user_id = get_jwt_identity()
     
     days = request.args.get('days', 30, type=int)
     activity_type = request.args.get('type')
     
-    query = Activity.query.filter_by(user_id=user_id)
+    # Plain rows rather than ORM objects; the list is read-only
+    query = db.session.query(*Activity.serializer.columns).filter(Activity.user_id == user_id)
     
-    start_date = datetime.utcnow() - timedelta(days=days)
-    query = query.filter(Activity.date >= start_date)
+    # Whole local days, so the list only changes on a write or at the user's midnight (see conditional_get)
+    start_date = local_time.local_today(local_time.timezone_for(user_id)) - timedelta(days=days)
+    query = query.filter(Activity.local_date >= start_date)
     
     if activity_type:
-        query = query.filter_by(activity_type=activity_type)
+        query = query.filter(Activity.activity_type == activity_type)
     
-    activities = query.order_by(Activity.date.desc()).all()
+    activities = Activity.serializer.rows(query.order_by(Activity.date.desc()))
     
     return jsonify({
-        'activities': [activity.to_dict() for activity in activities],
+        'activities': activities,
         'count': len(activities)
     }), 200
 
@@ -35,21 +45,35 @@ def get_activities():
 @jwt_required()
 def create_activity():
     user_id = get_jwt_identity()
-    data = request.get_json()
     
-    if not data or not data.get('title') or not data.get('calories_burned'):
-        return jsonify({'error': 'Title and calories burned are required'}), 400
+    try:
+        activity = create_activity_entry(user_id, request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Activity logged successfully',
+        'activity': activity.to_dict()
+    }), 201
+
+
+def create_activity_entry(user_id, data):
+    """Build and add an activity from request data with its hooks. Raises ValueError; caller commits."""
+    if not data or not data.get('title') or not (data.get('calories_burned') or data.get('duration_minutes')):
+        raise ValueError('Title and either calories burned or duration are required')
     
     # Convert empty strings to None for numeric fields
     duration_minutes = data.get('duration_minutes')
     duration_minutes = int(duration_minutes) if duration_minutes and duration_minutes != '' else None
     
-    distance = data.get('distance')
-    distance = float(distance) if distance and distance != '' else None
+    distance = _parse_distance(data.get('distance'))
     
     calories_burned = data.get('calories_burned')
     calories_burned = int(calories_burned) if calories_burned and calories_burned != '' else None
     
+    entry_date, local_date = local_time.parse_entry_date(data.get('date'), local_time.timezone_for(user_id))
+    
     activity = Activity(
         user_id=user_id,
         activity_type=data.get('activity_type', 'other'),
@@ -59,20 +83,131 @@ def create_activity():
         distance=distance,
         calories_burned=calories_burned,
         intensity=data.get('intensity', 'moderate'),
-        date=datetime.fromisoformat(data['date']) if data.get('date') else datetime.utcnow()
+        date=entry_date,
+        local_date=local_date
     )
     
+    if activity.calories_burned is None:
+        _estimate_calories(activity)
+    
+    _add_activity(activity)
+    return activity
+
+
+def _parse_distance(value):
+    """Distance from request data, or None when blank. Raises ValueError unless finite and non-negative."""
+    distance = float(value) if value and value != '' else None
+    if distance is not None and (not math.isfinite(distance) or distance < 0):
+        raise ValueError('distance must be a non-negative number')
+    return distance
+
+
+def _estimate_calories(activity):
+    """Fill calories_burned from the MET estimator using the user's current weight."""
+    weight_lbs = User.query.with_entities(User.weight_lbs).filter_by(id=activity.user_id).scalar()
+    activity.calories_burned = MetEstimator.estimate(
+        activity.activity_type, activity.intensity, activity.duration_minutes, weight_lbs, activity.distance
+    )
+    activity.calories_estimated = activity.calories_burned is not None
+
+
+def _add_activity(activity):
+    """Add a new activity and run the derived-data write hooks. Caller commits."""
     db.session.add(activity)
+    GoalTracker.record(activity)
+    StreakTracker.mark_active(activity.user_id, activity.local_date)
+    PersonalRecords.on_create(activity)
+    User.bump_data_version(activity.user_id)
+
+
+@bp.route('/upload', methods=['POST'])
+@jwt_required()
+def upload_activity():
+    """Create an activity from a GPX, TCX or CSV file, storing its sample streams."""
+    user_id = get_jwt_identity()
+    upload = request.files.get('file')
+    
+    if not upload or not upload.filename:
+        return jsonify({'error': 'A GPX, TCX or CSV file is required'}), 400
+    
+    file_format = (request.form.get('format') or upload.filename.rsplit('.', 1)[-1]).lower()
+    if file_format not in activity_streams.FORMATS:
+        return jsonify({'error': f"Unsupported file type; use one of: {', '.join(activity_streams.FORMATS)}"}), 400
+    
+    calories_burned = request.form.get('calories_burned')
+    try:
+        calories_burned = int(calories_burned) if calories_burned else None
+    except ValueError:
+        return jsonify({'error': 'calories_burned must be a whole number'}), 400
+    if calories_burned is not None and calories_burned < 0:
+        return jsonify({'error': 'calories_burned must not be negative'}), 400
+    
+    try:
+        parsed = activity_streams.parse(upload.stream, file_format)
+    except activity_streams.StreamFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    summary = activity_streams.summarize(parsed)
+    tz_name = local_time.timezone_for(user_id)
+    if summary['date']:
+        entry_date, local_date = summary['date'], local_time.local_date_for(summary['date'], tz_name)
+    else:
+        entry_date, local_date = local_time.parse_entry_date(None, tz_name)
+    
+    activity = Activity(
+        user_id=user_id,
+        activity_type=request.form.get('activity_type', 'other'),
+        title=request.form.get('title') or upload.filename.rsplit('.', 1)[0],
+        description=request.form.get('description'),
+        duration_minutes=summary['duration_minutes'],
+        distance=summary['distance'],
+        calories_burned=calories_burned,
+        intensity=request.form.get('intensity', 'moderate'),
+        date=entry_date,
+        local_date=local_date
+    )
+    
+    if activity.calories_burned is None:
+        _estimate_calories(activity)
+    
+    _add_activity(activity)
+    stored_bytes = activity_streams.save(activity, parsed['channels'])
     db.session.commit()
     
     return jsonify({
-        'message': 'Activity logged successfully',
-        'activity': activity.to_dict()
+        'message': 'Activity uploaded successfully',
+        'activity': activity.to_dict(),
+        'streams': {
+            'channels': sorted(parsed['channels']),
+            'samples': summary['samples'],
+            'stored_bytes': stored_bytes
+        }
     }), 201
 
 
+@bp.route('/calorie-estimate', methods=['GET'])
+@jwt_required()
+def get_calorie_estimate():
+    """Preview the MET-based estimate the activity form would store if calories are left blank."""
+    user_id = get_jwt_identity()
+    duration_minutes = request.args.get('duration_minutes', type=float)
+    
+    if not duration_minutes or duration_minutes <= 0:
+        return jsonify({'error': 'duration_minutes must be positive'}), 400
+    
+    weight_lbs = User.query.with_entities(User.weight_lbs).filter_by(id=user_id).scalar()
+    return jsonify(MetEstimator.describe(
+        request.args.get('activity_type'),
+        request.args.get('intensity'),
+        duration_minutes,
+        weight_lbs,
+        request.args.get('distance', type=float)
+    )), 200
+
+
 @bp.route('/<int:activity_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('activities')
 def get_activity(activity_id):
     user_id = get_jwt_identity()
     activity = Activity.query.filter_by(id=activity_id, user_id=user_id).first()
@@ -83,6 +218,36 @@ def get_activity(activity_id):
     return jsonify(activity.to_dict()), 200
 
 
+@bp.route('/<int:activity_id>/streams', methods=['GET'])
+@jwt_required()
+@conditional_get('activities')
+def get_activity_streams(activity_id):
+    user_id = get_jwt_identity()
+    activity = Activity.query.filter_by(id=activity_id, user_id=user_id).first()
+    
+    if not activity:
+        return jsonify({'error': 'Activity not found'}), 404
+    
+    resolution = request.args.get('resolution', 'medium')
+    if resolution in activity_streams.RESOLUTIONS:
+        points = activity_streams.RESOLUTIONS[resolution]
+    elif resolution.isdigit() and int(resolution) >= 2:
+        points = int(resolution)
+    else:
+        return jsonify({'error': 'resolution must be low, medium, high or a number of points >= 2'}), 400
+    
+    channels = [c for c in request.args.get('channels', '').split(',') if c] or None
+    if channels and not set(channels) <= set(activity_streams.CHANNELS):
+        return jsonify({'error': f"channels must be some of: {', '.join(activity_streams.CHANNELS)}"}), 400
+    
+    return jsonify({
+        'activity_id': activity.id,
+        'start_time': activity.date.isoformat() if activity.date else None,
+        'resolution': resolution,
+        **activity_streams.load(activity, points, channels)
+    }), 200
+
+
 @bp.route('/<int:activity_id>', methods=['PUT'])
 @jwt_required()
 def update_activity(activity_id):
@@ -92,7 +257,25 @@ def update_activity(activity_id):
     if not activity:
         return jsonify({'error': 'Activity not found'}), 404
     
-    data = request.get_json()
+    try:
+        update_activity_entry(activity, request.get_json())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Activity updated successfully',
+        'activity': activity.to_dict()
+    }), 200
+
+
+def update_activity_entry(activity, data):
+    """Apply request data to an activity and re-run its hooks. Raises ValueError; caller commits."""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be an object')
+    
+    previous = GoalTracker.snapshot(activity)
     
     if 'activity_type' in data:
         activity.activity_type = data['activity_type']
@@ -104,22 +287,27 @@ def update_activity(activity_id):
         val = data['duration_minutes']
         activity.duration_minutes = int(val) if val and val != '' else None
     if 'distance' in data:
-        val = data['distance']
-        activity.distance = float(val) if val and val != '' else None
+        activity.distance = _parse_distance(data['distance'])
     if 'calories_burned' in data:
         val = data['calories_burned']
         activity.calories_burned = int(val) if val and val != '' else None
+        activity.calories_estimated = False
     if 'intensity' in data:
         activity.intensity = data['intensity']
     if 'date' in data:
-        activity.date = datetime.fromisoformat(data['date'])
+        activity.date, activity.local_date = local_time.parse_entry_date(data['date'], local_time.timezone_for(activity.user_id))
     
-    db.session.commit()
+    # Clearing calories asks for an estimate; estimates follow edits to their inputs
+    estimate_inputs = ('activity_type', 'intensity', 'duration_minutes', 'distance')
+    if activity.calories_burned is None or (activity.calories_estimated and any(k in data for k in estimate_inputs)):
+        _estimate_calories(activity)
     
-    return jsonify({
-        'message': 'Activity updated successfully',
-        'activity': activity.to_dict()
-    }), 200
+    GoalTracker.replace(previous, activity)
+    if activity.local_date != previous.local_date:
+        StreakTracker.mark_active(activity.user_id, activity.local_date)
+        StreakTracker.mark_inactive_if_empty(activity.user_id, previous.local_date)
+    PersonalRecords.on_update(activity, previous.local_date)
+    User.bump_data_version(activity.user_id)
 
 
 @bp.route('/<int:activity_id>', methods=['DELETE'])
@@ -131,20 +319,30 @@ def delete_activity(activity_id):
     if not activity:
         return jsonify({'error': 'Activity not found'}), 404
     
-    db.session.delete(activity)
+    delete_activity_entry(activity)
     db.session.commit()
     
     return jsonify({'message': 'Activity deleted successfully'}), 200
 
 
+def delete_activity_entry(activity):
+    """Delete an activity and withdraw it from derived data. Caller commits."""
+    db.session.delete(activity)
+    GoalTracker.record(activity, sign=-1)
+    StreakTracker.mark_inactive_if_empty(activity.user_id, activity.local_date)
+    PersonalRecords.on_delete(activity)
+    User.bump_data_version(activity.user_id)
+
+
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional_get('activities', daily=True)
 def get_activity_stats():
     user_id = get_jwt_identity()
     days = request.args.get('days', 30, type=int)
     
-    start_date = datetime.utcnow() - timedelta(days=days)
-    activities = Activity.query.filter_by(user_id=user_id).filter(Activity.date >= start_date).all()
+    start_date = local_time.local_today(local_time.timezone_for(user_id)) - timedelta(days=days)
+    activities = Activity.query.filter_by(user_id=user_id).filter(Activity.local_date >= start_date).all()
     
     total_activities = len(activities)
     total_duration = sum(a.duration_minutes for a in activities if a.duration_minutes)
@@ -165,4 +363,54 @@ def get_activity_stats():
     }), 200
 
 
+@bp.route('/records', methods=['GET'])
+@jwt_required()
+@conditional_get('activities')
+def get_personal_records():
+    user_id = get_jwt_identity()
+    records = PersonalRecords.serialize(user_id)
+    
+    return jsonify({
+        'records': records,
+        'count': len(records)
+    }), 200
+
 
+@bp.route('/streaks', methods=['GET'])
+@jwt_required()
+@conditional_get('activities', daily=True)
+def get_streaks():
+    user_id = get_jwt_identity()
+    days = request.args.get('days', 30, type=int)
+    
+    if days < 1 or days > 3660:
+        return jsonify({'error': 'days must be between 1 and 3660'}), 400
+    
+    today = local_time.local_today(local_time.timezone_for(user_id))
+    
+    return jsonify({
+        **StreakTracker.summary(user_id, today),
+        'consistency': StreakTracker.consistency(user_id, today - timedelta(days=days - 1), today)
+    }), 200
+
+
+@bp.route('/heatmap', methods=['GET'])
+@jwt_required()
+@conditional_get('activities', daily=True)
+def get_heatmap():
+    user_id = get_jwt_identity()
+    year = request.args.get('year', type=int)
+    
+    if year is None:
+        year = local_time.local_today(local_time.timezone_for(user_id)).year
+    if year < 1900 or year > 9999:
+        return jsonify({'error': 'Invalid year'}), 400
+    
+    days = StreakTracker.heatmap(user_id, year)
+    
+    return jsonify({
+        'year': year,
+        'start': date(year, 1, 1).isoformat(),
+        'days': days,
+        'active_days': sum(days)
+    }), 200
@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify
+import time
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import User
+from app.services import local_time
+from app.services.http_cache import conditional_get
+from app.services.meal_planner import MealPlanner
+from app.services.result_cache import VersionedCache
 
 bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
+# Recommendations and insights only change when the user logs something
+result_cache = VersionedCache()
+
 
 @bp.route('/test', methods=['GET'])
 def test_route():
@@ -17,10 +25,22 @@ def get_ai_service():
     return AIService()
 
 
+@bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_llm_metrics():
+    """Circuit breaker and hedging metrics for the completions endpoint"""
+    from app.services.ai_service import llm_breaker, hedge_metrics
+    return jsonify({
+        'breaker': llm_breaker.metrics(),
+        'hedging': hedge_metrics()
+    }), 200
+
+
 @bp.route('/chat', methods=['POST'])
 @jwt_required()
 def chat():
     import os
+    started = time.monotonic()
     print(f"\n=== AI CHAT REQUEST ===")
     print(f"NVIDIA_API_KEY set: {bool(os.environ.get('NVIDIA_API_KEY'))}")
     print(f"NVIDIA_API_KEY length: {len(os.environ.get('NVIDIA_API_KEY', ''))}")
@@ -43,6 +63,9 @@ def chat():
         print("ERROR: Message is required")
         return jsonify({'error': 'Message is required'}), 400
     
+    # Deadline starts when the request arrives so slow lookups eat into the LLM budget
+    deadline = started + current_app.config['AI_CHAT_TIMEOUT_SECONDS']
+    
     try:
         print("Calling AI service...")
         ai_service = get_ai_service()
@@ -51,7 +74,8 @@ def chat():
         response = ai_service.chat_with_coach(
             user=user,
             user_message=data['message'],
-            conversation_history=data.get('history', [])
+            conversation_history=data.get('history', []),
+            deadline=deadline
         )
         
         print(f"AI Response received: {response[:100]}..." if len(response) > 100 else f"AI Response: {response}")
@@ -73,6 +97,7 @@ def chat():
 
 @bp.route('/recommendations', methods=['GET'])
 @jwt_required()
+@conditional_get('data')
 def get_recommendations():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -80,8 +105,13 @@ def get_recommendations():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
+    version = user.data_version or 0
+    
     try:
-        recommendations = get_ai_service().generate_recommendations(user)
+        recommendations = result_cache.get_or_compute(
+            ('recommendations', user.id), version,
+            lambda: get_ai_service().generate_recommendations(user)
+        )
         
         return jsonify({
             'recommendations': recommendations,
@@ -96,6 +126,7 @@ def get_recommendations():
 
 @bp.route('/insights', methods=['GET'])
 @jwt_required()
+@conditional_get('data', daily=True)
 def get_insights():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -103,8 +134,19 @@ def get_insights():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
+    days = request.args.get('days', 30, type=int)
+    if days < 1 or days > 365:
+        return jsonify({'error': 'days must be between 1 and 365'}), 400
+    
+    # The window slides at the user's local midnight, so the day is part of the key as well as the data version
+    version = user.data_version or 0
+    today = local_time.local_today(user.timezone).isoformat()
+    
     try:
-        insights = get_ai_service().analyze_patterns(user)
+        insights = result_cache.get_or_compute(
+            ('insights', user.id, days, today), version,
+            lambda: get_ai_service().analyze_patterns(user, days)
+        )
         
         return jsonify({
             'insights': insights,
@@ -127,9 +169,15 @@ def get_meal_plan():
         return jsonify({'error': 'User not found'}), 404
     
     days = request.args.get('days', 7, type=int)
+    preference = request.args.get('preference', 'none')
+    
+    if days < 1 or days > 28:
+        return jsonify({'error': 'days must be between 1 and 28'}), 400
+    if preference not in MealPlanner.PREFERENCES:
+        return jsonify({'error': f"preference must be one of: {', '.join(MealPlanner.PREFERENCES)}"}), 400
     
     try:
-        meal_plan = get_ai_service().generate_meal_plan(user, days)
+        meal_plan = get_ai_service().generate_meal_plan(user, days, preference)
         
         return jsonify({
             'meal_plan': meal_plan,
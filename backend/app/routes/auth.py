@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
 from app.models import User
+from app.services import local_time
+from app.services.calorie_calculator import CalorieCalculator
+from app.services.http_cache import conditional_get
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -41,6 +44,10 @@ def register():
     weight_goal_rate = data.get('weight_goal_rate')
     weight_goal_rate = float(weight_goal_rate) if weight_goal_rate and weight_goal_rate != '' else None
     
+    timezone = data.get('timezone') or local_time.DEFAULT_TIMEZONE
+    if not local_time.is_valid_timezone(timezone):
+        return jsonify({'error': 'Unknown timezone'}), 400
+    
     user = User(
         email=data['email'],
         username=data['username'],
@@ -55,9 +62,11 @@ def register():
         activity_level=data.get('activity_level'),
         target_weight_lbs=target_weight_lbs,
         weight_goal_rate=weight_goal_rate,
-        daily_calorie_goal=daily_calorie_goal
+        daily_calorie_goal=daily_calorie_goal,
+        timezone=timezone
     )
     user.set_password(data['password'])
+    CalorieCalculator.refresh_stored_profile(user)
     
     db.session.add(user)
     db.session.commit()
@@ -101,6 +110,7 @@ def login():
 
 @bp.route('/profile', methods=['GET'])
 @jwt_required()
+@conditional_get('profile')
 def get_profile():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -153,7 +163,14 @@ def update_profile():
     if 'daily_calorie_goal' in data:
         val = data['daily_calorie_goal']
         user.daily_calorie_goal = int(val) if val and val != '' else None
-    
+    if 'timezone' in data:
+        val = data['timezone'] or local_time.DEFAULT_TIMEZONE
+        if not local_time.is_valid_timezone(val):
+            return jsonify({'error': 'Unknown timezone'}), 400
+        user.timezone = val
+    
+    CalorieCalculator.refresh_stored_profile(user)
+    User.bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({
@@ -0,0 +1,134 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from app import db
+
+bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+# Sub-requests accepted per batch
+MAX_REQUESTS = 20
+
+# Blueprints whose views mostly wait on remote LLM calls. Their sub-requests run on
+# worker threads, each with its own app context and session, while the rest run one
+# after another on the batch's own session.
+CONCURRENT_BLUEPRINTS = {'ai'}
+
+# Request headers passed through to sub-requests
+FORWARDED_HEADERS = ('Authorization', 'Cookie', 'Accept-Language')
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='batch')
+
+
+def _parse_item(index, item):
+    """(id, path, query string, If-None-Match) for one sub-request; raises ValueError."""
+    if isinstance(item, str):
+        item = {'path': item}
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        raise ValueError('Each request must be a path or an object with a path')
+
+    parts = urlsplit(item['path'])
+    if parts.scheme or parts.netloc or not parts.path.startswith('/api/'):
+        raise ValueError('path must be an /api/ path on this server')
+    return item.get('id', index), parts.path, parts.query, item.get('if_none_match')
+
+
+def _dispatch(app, path, query_string, headers):
+    """Run one GET through the full request pipeline in the current app context."""
+    with app.test_request_context(path, method='GET', query_string=query_string, headers=headers):
+        try:
+            return app.full_dispatch_request()
+        except Exception:
+            # Unhandled view errors would normally be turned into a 500 by the WSGI layer
+            db.session.rollback()
+            app.logger.exception('[batch] %s failed', path)
+            return app.response_class(json.dumps({'error': 'Internal server error'}),
+                                      status=500, mimetype='application/json')
+
+
+def _dispatch_isolated(app, path, query_string, headers):
+    with app.app_context():
+        return _dispatch(app, path, query_string, headers)
+
+
+def _envelope_entry(request_id, path, response):
+    """Serialize one sub-response, splicing its JSON body in without decoding it."""
+    meta = {'id': request_id, 'path': path, 'status': response.status_code}
+    if response.headers.get('ETag'):
+        meta['etag'] = response.headers['ETag']
+
+    if response.status_code == 304:
+        body = 'null'
+    elif response.is_json:
+        body = response.get_data(as_text=True)
+    else:
+        body = json.dumps(response.get_data(as_text=True))
+    return json.dumps(meta)[:-1] + ', "body": ' + body + '}'
+
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """
+    Run several GET requests in one round trip.
+
+    Body: {"requests": ["/api/goals?status=active", {"id": "profile",
+    "path": "/api/auth/profile", "if_none_match": "<etag>"}, ...]}
+
+    Sub-requests run as the caller and share this request's app context, so
+    the SQLAlchemy session, its connection and its identity map (the user row
+    most views load) are reused across them. Responses come back in request
+    order as {"id", "path", "status", "etag", "body"}.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('requests') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(items) > MAX_REQUESTS:
+        return jsonify({'error': f'At most {MAX_REQUESTS} requests per batch'}), 400
+
+    app = current_app._get_current_object()
+    adapter = app.url_map.bind('')
+    forwarded = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+
+    parsed = []
+    for index, item in enumerate(items):
+        try:
+            request_id, path, query_string, etag = _parse_item(index, item)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'index': index}), 400
+
+        try:
+            endpoint, _ = adapter.match(path, method='GET')
+        except HTTPException as e:
+            parsed.append((request_id, path, query_string, etag, None, e))
+            continue
+        parsed.append((request_id, path, query_string, etag, endpoint.split('.')[0], None))
+
+    # Start the slow, independent sub-requests first so they overlap with the rest
+    responses = {}
+    for index, (request_id, path, query_string, etag, blueprint, _) in enumerate(parsed):
+        if blueprint in CONCURRENT_BLUEPRINTS:
+            headers = {**forwarded, 'If-None-Match': etag} if etag else forwarded
+            responses[index] = _pool.submit(_dispatch_isolated, app, path, query_string, headers)
+
+    entries = []
+    for index, (request_id, path, query_string, etag, blueprint, error) in enumerate(parsed):
+        if error is not None:
+            entries.append(json.dumps({'id': request_id, 'path': path, 'status': error.code, 'body': {'error': error.name}}))
+            continue
+
+        if index in responses:
+            response = responses[index].result()
+        else:
+            headers = {**forwarded, 'If-None-Match': etag} if etag else forwarded
+            response = _dispatch(app, path, query_string, headers)
+        entries.append(_envelope_entry(request_id, path, response))
+
+    return current_app.response_class(
+        '{"responses": [' + ', '.join(entries) + '], "count": ' + str(len(entries)) + '}',
+        status=200, mimetype='application/json'
+    )
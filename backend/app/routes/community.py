@@ -2,25 +2,42 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
-from app.models import CommunityPost, Challenge, Comment, PostLike, ChallengeParticipant
+from app.models import CommunityPost, Challenge, Comment, PostLike, ChallengeParticipant, User
+from app.services.http_cache import public_cache
 
 bp = Blueprint('community', __name__, url_prefix='/api/community')
 
 
 @bp.route('/posts', methods=['GET'])
+@public_cache
 def get_posts():
     post_type = request.args.get('type')
     limit = request.args.get('limit', 50, type=int)
     
-    query = CommunityPost.query
+    # Plain rows with the author joined in, and every listed post's comments in one more query
+    query = db.session.query(*CommunityPost.serializer.columns, User.username).outerjoin(
+        User, User.id == CommunityPost.user_id
+    )
     
     if post_type:
-        query = query.filter_by(post_type=post_type)
+        query = query.filter(CommunityPost.post_type == post_type)
+    
+    posts = CommunityPost.serializer.rows(
+        query.order_by(CommunityPost.created_at.desc()).limit(limit), extra=('username',)
+    )
     
-    posts = query.order_by(CommunityPost.created_at.desc()).limit(limit).all()
+    comments = {post['id']: [] for post in posts}
+    if comments:
+        rows = db.session.query(*Comment.serializer.columns, User.username).outerjoin(
+            User, User.id == Comment.user_id
+        ).filter(Comment.post_id.in_(comments)).order_by(Comment.created_at.desc())
+        for comment in Comment.serializer.rows(rows, extra=('username',)):
+            comments[comment['post_id']].append(comment)
+    for post in posts:
+        post['comments'] = comments[post['id']]
     
     return jsonify({
-        'posts': [post.to_dict(include_comments=True) for post in posts],
+        'posts': posts,
         'count': len(posts)
     }), 200
 
@@ -115,19 +132,20 @@ def comment_on_post(post_id):
 
 
 @bp.route('/challenges', methods=['GET'])
+@public_cache
 def get_challenges():
     active_only = request.args.get('active', 'true').lower() == 'true'
     
-    query = Challenge.query
+    query = db.session.query(*Challenge.serializer.columns)
     
     if active_only:
-        query = query.filter_by(is_active=True)
+        query = query.filter(Challenge.is_active.is_(True))
         query = query.filter(Challenge.end_date >= datetime.utcnow())
     
-    challenges = query.order_by(Challenge.start_date.desc()).all()
+    challenges = Challenge.serializer.rows(query.order_by(Challenge.start_date.desc()))
     
     return jsonify({
-        'challenges': [challenge.to_dict() for challenge in challenges],
+        'challenges': challenges,
         'count': len(challenges)
     }), 200
 
@@ -1,16 +1,21 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Activity, Nutrition
+from app.services import downsampling, local_time
+from app.services.adaptive_tdee import AdaptiveTdee
 from app.services.calorie_calculator import CalorieCalculator
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from app.services.http_cache import conditional_get
+from datetime import date, timedelta
+from sqlalchemy import func, select, union_all, literal
+import numpy as np
 
 bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
 
 @bp.route('/calorie-balance', methods=['GET'])
 @jwt_required()
+@conditional_get('activities', 'nutrition', 'weight', 'profile', daily=True)
 def get_calorie_balance():
     """
     Get comprehensive calorie balance information for today.
@@ -23,30 +28,28 @@ def get_calorie_balance():
         return jsonify({'error': 'User not found'}), 404
     
     # Calculate user's calorie profile (BMR, TDEE, target calories)
-    calorie_profile = CalorieCalculator.calculate_full_profile(user)
+    calorie_profile = CalorieCalculator.get_profile(user)
     
-    # Get today's date range
-    today = datetime.utcnow().date()
-    start_of_day = datetime.combine(today, datetime.min.time())
-    end_of_day = datetime.combine(today, datetime.max.time())
+    # "Today" is the user's local calendar day
+    today = local_time.local_today(user.timezone)
     
     # Get today's nutrition (calories consumed)
-    nutrition_logs = Nutrition.query.filter(
+    meal_count, calories_consumed = db.session.query(
+        func.count(Nutrition.id),
+        func.coalesce(func.sum(Nutrition.calories), 0)
+    ).filter(
         Nutrition.user_id == user_id,
-        Nutrition.date >= start_of_day,
-        Nutrition.date <= end_of_day
-    ).all()
-    
-    calories_consumed = sum(log.calories or 0 for log in nutrition_logs)
+        Nutrition.local_date == today
+    ).one()
     
     # Get today's activities (calories burned from exercise)
-    activities = Activity.query.filter(
+    workout_count, calories_burned_exercise = db.session.query(
+        func.count(Activity.id),
+        func.coalesce(func.sum(Activity.calories_burned), 0)
+    ).filter(
         Activity.user_id == user_id,
-        Activity.date >= start_of_day,
-        Activity.date <= end_of_day
-    ).all()
-    
-    calories_burned_exercise = sum(activity.calories_burned or 0 for activity in activities)
+        Activity.local_date == today
+    ).one()
     
     # Calculate net calories and remaining
     # Net calories = calories consumed - calories burned from exercise
@@ -65,6 +68,8 @@ def get_calorie_balance():
     # Build response
     response = {
         'calorie_profile': calorie_profile,
+        # Expenditure estimated from logged intake vs. weight trend; None until the first weigh-in
+        'adaptive_tdee': AdaptiveTdee.summary(user),
         'today': {
             'date': today.isoformat(),
             'calories_consumed': calories_consumed,
@@ -73,8 +78,8 @@ def get_calorie_balance():
             'target_calories': target_calories,
             'remaining_calories': remaining_calories,
             'percentage_consumed': percentage_consumed,
-            'meal_count': len(nutrition_logs),
-            'workout_count': len(activities)
+            'meal_count': meal_count,
+            'workout_count': workout_count
         },
         'user_goals': {
             'current_weight': user.weight_lbs,
@@ -107,6 +112,7 @@ def get_calorie_balance():
 
 @bp.route('/weekly-summary', methods=['GET'])
 @jwt_required()
+@conditional_get('activities', 'nutrition', 'weight', 'profile', daily=True)
 def get_weekly_summary():
     """
     Get calorie balance summary for the past 7 days.
@@ -118,31 +124,30 @@ def get_weekly_summary():
         return jsonify({'error': 'User not found'}), 404
     
     # Calculate target calories
-    calorie_profile = CalorieCalculator.calculate_full_profile(user)
+    calorie_profile = CalorieCalculator.get_profile(user)
     target_calories = calorie_profile.get('target_calories')
     
-    # Get data for the past 7 days
-    today = datetime.utcnow().date()
+    # Get data for the past 7 days, as local calendar days
+    today = local_time.local_today(user.timezone)
     seven_days_ago = today - timedelta(days=7)
-    start_date = datetime.combine(seven_days_ago, datetime.min.time())
     
     # Get nutrition data
     nutrition_by_day = db.session.query(
-        func.date(Nutrition.date).label('day'),
-        func.sum(Nutrition.calories).label('total_calories')
+        Nutrition.local_date,
+        func.coalesce(func.sum(Nutrition.calories), 0).label('total_calories')
     ).filter(
         Nutrition.user_id == user_id,
-        Nutrition.date >= start_date
-    ).group_by(func.date(Nutrition.date)).all()
+        Nutrition.local_date >= seven_days_ago
+    ).group_by(Nutrition.local_date).all()
     
     # Get activity data
     activity_by_day = db.session.query(
-        func.date(Activity.date).label('day'),
-        func.sum(Activity.calories_burned).label('total_burned')
+        Activity.local_date,
+        func.coalesce(func.sum(Activity.calories_burned), 0).label('total_burned')
     ).filter(
         Activity.user_id == user_id,
-        Activity.date >= start_date
-    ).group_by(func.date(Activity.date)).all()
+        Activity.local_date >= seven_days_ago
+    ).group_by(Activity.local_date).all()
     
     # Build daily summaries
     nutrition_dict = {str(day): calories for day, calories in nutrition_by_day}
@@ -190,3 +195,124 @@ def get_weekly_summary():
     
     return jsonify(response), 200
 
+
+
+# Longest range a single /history request may span
+MAX_HISTORY_DAYS = 5 * 366
+
+
+def _bucket_starts(days, bucket):
+    """Start date of the day/week/month bucket for each date in a datetime64[D] array."""
+    if bucket == 'week':
+        # 1970-01-01 was a Thursday; shift so buckets start on Monday
+        return days - ((days.astype(np.int64) + 3) % 7)
+    if bucket == 'month':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    return days
+
+
+@bp.route('/history', methods=['GET'])
+@jwt_required()
+@conditional_get('activities', 'nutrition', 'weight', 'profile', daily=True)
+def get_calorie_history():
+    """
+    Get consumed/burned/net/target calorie series over an arbitrary date range.
+    
+    Query params: from, to (YYYY-MM-DD, inclusive; default last 30 days),
+    bucket (day|week|month). Series are returned as parallel arrays, gap-filled
+    with zeros, and each bucket's values are totals over its days.
+    
+    points (optional) caps the number of returned buckets; the series is then
+    downsampled on net calories with downsample=lttb (default) or minmax.
+    """
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ('day', 'week', 'month'):
+        return jsonify({'error': 'bucket must be one of: day, week, month'}), 400
+    
+    points = request.args.get('points', type=int)
+    method = request.args.get('downsample', 'lttb')
+    if points is not None and points < 3:
+        return jsonify({'error': 'points must be at least 3'}), 400
+    if method not in downsampling.METHODS:
+        return jsonify({'error': f"downsample must be one of: {', '.join(downsampling.METHODS)}"}), 400
+    
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else local_time.local_today(user.timezone)
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
+    
+    if start > end:
+        return jsonify({'error': 'from must not be after to'}), 400
+    if (end - start).days + 1 > MAX_HISTORY_DAYS:
+        return jsonify({'error': f'Range cannot exceed {MAX_HISTORY_DAYS} days'}), 400
+    
+    target_calories = CalorieCalculator.get_profile(user).get('target_calories')
+    
+    # One round trip: meals and workouts unioned, then summed per local day.
+    # Both halves are range scans on their (user_id, local_date) index.
+    combined = union_all(
+        select(
+            Nutrition.local_date.label('day'),
+            Nutrition.calories.label('consumed'),
+            literal(0).label('burned')
+        ).where(Nutrition.user_id == user_id, Nutrition.local_date.between(start, end)),
+        select(
+            Activity.local_date.label('day'),
+            literal(0).label('consumed'),
+            func.coalesce(Activity.calories_burned, 0).label('burned')
+        ).where(Activity.user_id == user_id, Activity.local_date.between(start, end))
+    ).subquery()
+    
+    rows = db.session.execute(
+        select(combined.c.day, func.sum(combined.c.consumed), func.sum(combined.c.burned))
+        .group_by(combined.c.day)
+    ).all()
+    
+    # Gap-fill by scattering the per-day sums into a zeroed array covering the range
+    all_days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    consumed = np.zeros(len(all_days))
+    burned = np.zeros(len(all_days))
+    if rows:
+        days, day_consumed, day_burned = zip(*rows)
+        offsets = (np.array([str(d) for d in days], dtype='datetime64[D]') - all_days[0]).astype(np.int64)
+        consumed[offsets] = np.array(day_consumed, dtype=float)
+        burned[offsets] = np.array(day_burned, dtype=float)
+    
+    bucket_days = _bucket_starts(all_days, bucket)
+    labels, bucket_index, day_counts = np.unique(bucket_days, return_inverse=True, return_counts=True)
+    consumed = np.bincount(bucket_index, weights=consumed)
+    burned = np.bincount(bucket_index, weights=burned)
+    
+    series = {
+        'date': [str(label) for label in labels],
+        'days': day_counts.tolist(),
+        'consumed': consumed.astype(np.int64).tolist(),
+        'burned': burned.astype(np.int64).tolist(),
+        'net': (consumed - burned).astype(np.int64).tolist(),
+        'target': (day_counts * target_calories).tolist() if target_calories else None
+    }
+    
+    bucket_count = len(labels)
+    if points and points < bucket_count:
+        series = downsampling.downsample_series(series, points, driver='net', method=method)
+    
+    return jsonify({
+        'period': {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'days': len(all_days),
+            'bucket': bucket,
+            'buckets': bucket_count,
+            'points': len(series['date']),
+            'downsample': method if len(series['date']) < bucket_count else None
+        },
+        'series': series,
+        'target_calories': target_calories
+    }), 200
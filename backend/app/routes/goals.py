@@ -2,16 +2,21 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
-from app.models import Goal
+from app.models import Goal, GoalProgressEvent, User
+from app.services import local_time
+from app.services.goal_tracker import GoalTracker, METRICS
+from app.services.http_cache import conditional_get
 
 bp = Blueprint('goals', __name__, url_prefix='/api/goals')
 
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional_get('goals', daily=True)
 def get_goals():
     user_id = get_jwt_identity()
     status = request.args.get('status')
+    today = local_time.local_today(local_time.timezone_for(user_id))
     
     query = Goal.query.filter_by(user_id=user_id)
     
@@ -21,7 +26,7 @@ def get_goals():
     goals = query.order_by(Goal.created_at.desc()).all()
     
     return jsonify({
-        'goals': [goal.to_dict() for goal in goals],
+        'goals': [GoalTracker.to_dict(goal, today) for goal in goals],
         'count': len(goals)
     }), 200
 
@@ -30,10 +35,23 @@ def get_goals():
 @jwt_required()
 def create_goal():
     user_id = get_jwt_identity()
-    data = request.get_json()
     
+    try:
+        goal = create_goal_entry(user_id, request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Goal created successfully',
+        'goal': goal.to_dict()
+    }), 201
+
+
+def create_goal_entry(user_id, data):
+    """Build and add a goal from request data. Raises ValueError; caller commits."""
     if not data or not data.get('goal_type') or not data.get('title') or not data.get('target_value'):
-        return jsonify({'error': 'Missing required fields'}), 400
+        raise ValueError('Missing required fields')
     
     goal = Goal(
         user_id=user_id,
@@ -47,17 +65,19 @@ def create_goal():
         target_date=datetime.fromisoformat(data['target_date']) if data.get('target_date') else None
     )
     
-    db.session.add(goal)
-    db.session.commit()
+    # Metric-linked goals start from what the user has already logged
+    if goal.goal_type in METRICS and 'current_value' not in data:
+        GoalTracker.initialize(goal, local_time.timezone_for(user_id))
     
-    return jsonify({
-        'message': 'Goal created successfully',
-        'goal': goal.to_dict()
-    }), 201
+    db.session.add(goal)
+    GoalTracker.log_change(goal, 'created')
+    User.bump_data_version(user_id)
+    return goal
 
 
 @bp.route('/<int:goal_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('goals', daily=True)
 def get_goal(goal_id):
     user_id = get_jwt_identity()
     goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
@@ -65,7 +85,7 @@ def get_goal(goal_id):
     if not goal:
         return jsonify({'error': 'Goal not found'}), 404
     
-    return jsonify(goal.to_dict()), 200
+    return jsonify(GoalTracker.to_dict(goal, local_time.local_today(local_time.timezone_for(user_id)))), 200
 
 
 @bp.route('/<int:goal_id>', methods=['PUT'])
@@ -77,10 +97,30 @@ def update_goal(goal_id):
     if not goal:
         return jsonify({'error': 'Goal not found'}), 404
     
-    data = request.get_json()
+    try:
+        update_goal_entry(goal, request.get_json())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Goal updated successfully',
+        'goal': goal.to_dict()
+    }), 200
+
+
+def update_goal_entry(goal, data):
+    """Apply request data to a goal. Raises ValueError; caller commits."""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be an object')
+    
+    previous_value = goal.current_value
     
     if 'goal_type' in data:
         goal.goal_type = data['goal_type']
+        if goal.goal_type in METRICS and 'current_value' not in data:
+            GoalTracker.initialize(goal, local_time.timezone_for(goal.user_id))
     if 'title' in data:
         goal.title = data['title']
     if 'description' in data:
@@ -98,17 +138,22 @@ def update_goal(goal_id):
         goal.unit = data['unit']
     if 'status' in data:
         goal.status = data['status']
+        goal.auto_completed = False
         if data['status'] == 'completed' and not goal.completed_at:
             goal.completed_at = datetime.utcnow()
+    
+    # A raised target or lowered value can take a goal the tracker completed back below target
+    if goal.auto_completed and (goal.current_value or 0) < goal.target_value:
+        goal.status = 'active'
+        goal.completed_at = None
+        goal.auto_completed = False
     if 'target_date' in data:
         goal.target_date = datetime.fromisoformat(data['target_date'])
     
-    db.session.commit()
+    if goal.current_value != previous_value:
+        GoalTracker.log_change(goal, 'manual', goal.current_value - (previous_value or 0))
     
-    return jsonify({
-        'message': 'Goal updated successfully',
-        'goal': goal.to_dict()
-    }), 200
+    User.bump_data_version(goal.user_id)
 
 
 @bp.route('/<int:goal_id>', methods=['DELETE'])
@@ -120,12 +165,18 @@ def delete_goal(goal_id):
     if not goal:
         return jsonify({'error': 'Goal not found'}), 404
     
-    db.session.delete(goal)
+    delete_goal_entry(goal)
     db.session.commit()
     
     return jsonify({'message': 'Goal deleted successfully'}), 200
 
 
+def delete_goal_entry(goal):
+    """Delete a goal. Caller commits."""
+    db.session.delete(goal)
+    User.bump_data_version(goal.user_id)
+
+
 @bp.route('/<int:goal_id>/progress', methods=['POST'])
 @jwt_required()
 def update_goal_progress(goal_id):
@@ -136,6 +187,7 @@ def update_goal_progress(goal_id):
         return jsonify({'error': 'Goal not found'}), 404
     
     data = request.get_json()
+    previous_value = goal.current_value
     
     if 'increment' in data:
         goal.current_value += data['increment']
@@ -148,6 +200,8 @@ def update_goal_progress(goal_id):
         goal.status = 'completed'
         goal.completed_at = datetime.utcnow()
     
+    GoalTracker.log_change(goal, 'manual', goal.current_value - (previous_value or 0))
+    User.bump_data_version(user_id)
     db.session.commit()
     
     return jsonify({
@@ -156,4 +210,21 @@ def update_goal_progress(goal_id):
     }), 200
 
 
-
+@bp.route('/<int:goal_id>/history', methods=['GET'])
+@jwt_required()
+@conditional_get('goals')
+def get_goal_history(goal_id):
+    user_id = get_jwt_identity()
+    goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+    
+    if not goal:
+        return jsonify({'error': 'Goal not found'}), 404
+    
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    events = goal.events.order_by(GoalProgressEvent.recorded_at.desc(), GoalProgressEvent.id.desc()).limit(limit).all()
+    
+    return jsonify({
+        'goal': goal.to_dict(),
+        'events': [event.to_dict() for event in events],
+        'count': len(events)
+    }), 200
@@ -0,0 +1,85 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import timedelta
+from app import db
+from app.models import DailyWearableSummary
+from app.services import local_time
+from app.services.ingest import IngestBuffer
+
+bp = Blueprint('ingest', __name__, url_prefix='/api/ingest')
+
+
+@bp.route('/events', methods=['POST'])
+@jwt_required()
+def ingest_events():
+    """
+    Append a batch of device events to the ingest log and acknowledge with 202.
+
+    Events are materialized later by the ingest consumer. When the log is backed
+    up the response carries Retry-After: advisory while accepted ('slow'),
+    mandatory with 503 once the hard limit is reached ('full').
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+    config = current_app.config
+
+    if not data or not isinstance(data.get('events'), list) or not data['events']:
+        return jsonify({'error': 'A non-empty events list is required'}), 400
+
+    if len(data['events']) > config['INGEST_MAX_BATCH']:
+        return jsonify({'error': f"At most {config['INGEST_MAX_BATCH']} events per request"}), 413
+
+    depth = IngestBuffer.depth()
+    pressure = IngestBuffer.pressure(depth, config)
+
+    if pressure == 'full':
+        retry_after = config['INGEST_RETRY_AFTER_FULL']
+        response = jsonify({
+            'error': 'Ingest buffer is full, retry later',
+            'buffer_depth': depth,
+            'backpressure': pressure,
+            'retry_after': retry_after
+        })
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 503
+
+    result = IngestBuffer.append(user_id, data.get('device_id'), data['events'])
+    db.session.commit()
+
+    response = jsonify({
+        **result,
+        'buffer_depth': depth + result['accepted'],
+        'backpressure': pressure
+    })
+    if pressure == 'slow':
+        response.headers['Retry-After'] = str(config['INGEST_RETRY_AFTER_SLOW'])
+    return response, 202
+
+
+@bp.route('/status', methods=['GET'])
+@jwt_required()
+def ingest_status():
+    depth = IngestBuffer.depth()
+    return jsonify({
+        'buffer_depth': depth,
+        'backpressure': IngestBuffer.pressure(depth, current_app.config)
+    }), 200
+
+
+@bp.route('/daily', methods=['GET'])
+@jwt_required()
+def get_daily_summaries():
+    """Step and heart-rate rollups from devices, newest day first."""
+    user_id = get_jwt_identity()
+    days = request.args.get('days', 30, type=int)
+    start_date = local_time.local_today(local_time.timezone_for(user_id)) - timedelta(days=days)
+
+    summaries = DailyWearableSummary.query.filter(
+        DailyWearableSummary.user_id == user_id,
+        DailyWearableSummary.local_date >= start_date
+    ).order_by(DailyWearableSummary.local_date.desc()).all()
+
+    return jsonify({
+        'days': [summary.to_dict() for summary in summaries],
+        'count': len(summaries)
+    }), 200
@@ -1,9 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+import math
 import requests
+from sqlalchemy import update
 from app import db
-from app.models import Nutrition
+from app.models import Nutrition, SavedMeal, SavedMealItem, User
+from app.services import local_time
+from app.services.adaptive_tdee import AdaptiveTdee
+from app.services.frequent_foods import FrequentFoods
+from app.services.goal_tracker import GoalTracker
+from app.services.http_cache import conditional_get
+from app.services.sync import SyncLog
 
 import os
 
@@ -78,24 +87,27 @@ def search_foods():
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional_get('nutrition', daily=True)
 def get_nutrition_logs():
     user_id = get_jwt_identity()
     
     days = request.args.get('days', 7, type=int)
     meal_type = request.args.get('meal_type')
     
-    query = Nutrition.query.filter_by(user_id=user_id)
+    # Plain rows rather than ORM objects; the list is read-only
+    query = db.session.query(*Nutrition.serializer.columns).filter(Nutrition.user_id == user_id)
     
-    start_date = datetime.utcnow() - timedelta(days=days)
-    query = query.filter(Nutrition.date >= start_date)
+    # Whole local days, so the list only changes on a write or at the user's midnight (see conditional_get)
+    start_date = local_time.local_today(local_time.timezone_for(user_id)) - timedelta(days=days)
+    query = query.filter(Nutrition.local_date >= start_date)
     
     if meal_type:
-        query = query.filter_by(meal_type=meal_type)
+        query = query.filter(Nutrition.meal_type == meal_type)
     
-    nutrition_logs = query.order_by(Nutrition.date.desc()).all()
+    nutrition_logs = Nutrition.serializer.rows(query.order_by(Nutrition.date.desc()))
     
     return jsonify({
-        'nutrition_logs': [log.to_dict() for log in nutrition_logs],
+        'nutrition_logs': nutrition_logs,
         'count': len(nutrition_logs)
     }), 200
 
@@ -104,10 +116,23 @@ def get_nutrition_logs():
 @jwt_required()
 def create_nutrition_log():
     user_id = get_jwt_identity()
-    data = request.get_json()
     
+    try:
+        nutrition = create_nutrition_entry(user_id, request.get_json())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Nutrition logged successfully',
+        'nutrition': nutrition.to_dict()
+    }), 201
+
+
+def create_nutrition_entry(user_id, data):
+    """Build and add a nutrition entry from request data with its hooks. Raises ValueError; caller commits."""
     if not data or not data.get('meal_type') or not data.get('food_name') or not data.get('calories'):
-        return jsonify({'error': 'Missing required fields'}), 400
+        raise ValueError('Missing required fields')
     
     # Convert empty strings to None for numeric fields
     protein = data.get('protein')
@@ -125,6 +150,8 @@ def create_nutrition_log():
     quantity = data.get('quantity', 1.0)
     quantity = float(quantity) if quantity and quantity != '' else 1.0
     
+    entry_date, local_date = local_time.parse_entry_date(data.get('date'), local_time.timezone_for(user_id))
+    
     nutrition = Nutrition(
         user_id=user_id,
         meal_type=data['meal_type'],
@@ -137,16 +164,16 @@ def create_nutrition_log():
         fiber=fiber,
         serving_size=data.get('serving_size'),
         quantity=quantity,
-        date=datetime.fromisoformat(data['date']) if data.get('date') else datetime.utcnow()
+        date=entry_date,
+        local_date=local_date
     )
     
     db.session.add(nutrition)
-    db.session.commit()
-    
-    return jsonify({
-        'message': 'Nutrition logged successfully',
-        'nutrition': nutrition.to_dict()
-    }), 201
+    AdaptiveTdee.record_intake(user_id, nutrition.local_date, nutrition.calories)
+    GoalTracker.record(nutrition)
+    FrequentFoods.on_create(nutrition)
+    User.bump_data_version(user_id)
+    return nutrition
 
 
 @bp.route('/<int:nutrition_id>', methods=['PUT'])
@@ -158,7 +185,27 @@ def update_nutrition_log(nutrition_id):
     if not nutrition:
         return jsonify({'error': 'Nutrition log not found'}), 404
     
-    data = request.get_json()
+    try:
+        update_nutrition_entry(nutrition, request.get_json())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Nutrition log updated successfully',
+        'nutrition': nutrition.to_dict()
+    }), 200
+
+
+def update_nutrition_entry(nutrition, data):
+    """Apply request data to a nutrition entry and re-run its hooks. Raises ValueError; caller commits."""
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be an object')
+    
+    previous_date, previous_calories = nutrition.local_date, nutrition.calories
+    previous_name = nutrition.food_name
+    previous = GoalTracker.snapshot(nutrition)
     
     if 'meal_type' in data:
         nutrition.meal_type = data['meal_type']
@@ -181,14 +228,15 @@ def update_nutrition_log(nutrition_id):
     if 'quantity' in data:
         nutrition.quantity = data['quantity']
     if 'date' in data:
-        nutrition.date = datetime.fromisoformat(data['date'])
+        nutrition.date, nutrition.local_date = local_time.parse_entry_date(data['date'], local_time.timezone_for(nutrition.user_id))
     
-    db.session.commit()
+    if (nutrition.local_date, nutrition.calories) != (previous_date, previous_calories):
+        AdaptiveTdee.record_intake(nutrition.user_id, previous_date, -previous_calories)
+        AdaptiveTdee.record_intake(nutrition.user_id, nutrition.local_date, int(nutrition.calories))
     
-    return jsonify({
-        'message': 'Nutrition log updated successfully',
-        'nutrition': nutrition.to_dict()
-    }), 200
+    GoalTracker.replace(previous, nutrition)
+    FrequentFoods.on_update(nutrition, previous_name)
+    User.bump_data_version(nutrition.user_id)
 
 
 @bp.route('/<int:nutrition_id>', methods=['DELETE'])
@@ -200,20 +248,30 @@ def delete_nutrition_log(nutrition_id):
     if not nutrition:
         return jsonify({'error': 'Nutrition log not found'}), 404
     
-    db.session.delete(nutrition)
+    delete_nutrition_entry(nutrition)
     db.session.commit()
     
     return jsonify({'message': 'Nutrition log deleted successfully'}), 200
 
 
+def delete_nutrition_entry(nutrition):
+    """Delete a nutrition entry and withdraw it from derived data. Caller commits."""
+    db.session.delete(nutrition)
+    AdaptiveTdee.record_intake(nutrition.user_id, nutrition.local_date, -nutrition.calories)
+    GoalTracker.record(nutrition, sign=-1)
+    FrequentFoods.on_delete(nutrition)
+    User.bump_data_version(nutrition.user_id)
+
+
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional_get('nutrition', daily=True)
 def get_nutrition_stats():
     user_id = get_jwt_identity()
     days = request.args.get('days', 7, type=int)
     
-    start_date = datetime.utcnow() - timedelta(days=days)
-    nutrition_logs = Nutrition.query.filter_by(user_id=user_id).filter(Nutrition.date >= start_date).all()
+    start_date = local_time.local_today(local_time.timezone_for(user_id)) - timedelta(days=days)
+    nutrition_logs = Nutrition.query.filter_by(user_id=user_id).filter(Nutrition.local_date >= start_date).all()
     
     total_calories = sum(log.calories for log in nutrition_logs)
     total_protein = sum(log.protein for log in nutrition_logs if log.protein)
@@ -237,4 +295,262 @@ def get_nutrition_stats():
     }), 200
 
 
+@bp.route('/frequent', methods=['GET'])
+@jwt_required()
+def get_frequent_foods():
+    """The user's most-logged recent foods, for quick-log and autocomplete before a remote search."""
+    user_id = get_jwt_identity()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    foods = FrequentFoods.top(user_id, limit, request.args.get('q', '').strip() or None)
+    now = datetime.utcnow()
+    
+    return jsonify({
+        'foods': [FrequentFoods.serialize(food, now) for food in foods],
+        'count': len(foods)
+    }), 200
+
+
+def _parse_meal_items(items):
+    """Validate client meal items into SavedMealItem column values. Raises ValueError."""
+    if not isinstance(items, list) or not items:
+        raise ValueError('items must be a non-empty list')
+    
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('food_name') or item.get('calories') in (None, ''):
+            raise ValueError(f'Item {index} needs food_name and calories')
+        try:
+            values = {
+                'food_name': str(item['food_name'])[:200],
+                'serving_size': item.get('serving_size'),
+                'quantity': float(item['quantity']) if item.get('quantity') not in (None, '') else 1.0,
+                'calories': float(item['calories']),
+            }
+            for field in ('protein', 'carbohydrates', 'fats', 'fiber'):
+                value = item.get(field)
+                values[field] = float(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f'Item {index} has a non-numeric value')
+        if not all(math.isfinite(value) for value in values.values() if isinstance(value, float)):
+            raise ValueError(f'Item {index} has a non-numeric value')
+        if values['quantity'] <= 0 or any(values[field] and values[field] < 0 for field in SavedMeal.TOTAL_FIELDS):
+            raise ValueError(f'Item {index} has a negative or zero value')
+        parsed.append(values)
+    return parsed
+
+
+@bp.route('/meals', methods=['GET'])
+@jwt_required()
+@conditional_get('nutrition')
+def get_saved_meals():
+    user_id = get_jwt_identity()
+    include_items = request.args.get('include_items', 'false').lower() == 'true'
+    
+    meals = SavedMeal.query.filter_by(user_id=user_id).order_by(
+        SavedMeal.last_logged_at.desc().nulls_last(), SavedMeal.name
+    ).all()
+    
+    return jsonify({
+        'meals': [meal.to_dict(include_items=include_items) for meal in meals],
+        'count': len(meals)
+    }), 200
+
+
+@bp.route('/meals', methods=['POST'])
+@jwt_required()
+def create_saved_meal():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data or not data.get('name'):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    try:
+        items = _parse_meal_items(data.get('items'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    meal = SavedMeal(
+        user_id=user_id,
+        name=data['name'],
+        meal_type=data.get('meal_type'),
+        description=data.get('description')
+    )
+    meal.set_items(items)
+    
+    db.session.add(meal)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Meal saved successfully',
+        'meal': meal.to_dict(include_items=True)
+    }), 201
+
+
+@bp.route('/meals/<int:meal_id>', methods=['GET'])
+@jwt_required()
+@conditional_get('nutrition')
+def get_saved_meal(meal_id):
+    user_id = get_jwt_identity()
+    meal = SavedMeal.query.filter_by(id=meal_id, user_id=user_id).first()
+    
+    if not meal:
+        return jsonify({'error': 'Saved meal not found'}), 404
+    
+    return jsonify(meal.to_dict(include_items=True)), 200
+
+
+@bp.route('/meals/<int:meal_id>', methods=['PUT'])
+@jwt_required()
+def update_saved_meal(meal_id):
+    user_id = get_jwt_identity()
+    meal = SavedMeal.query.filter_by(id=meal_id, user_id=user_id).first()
+    
+    if not meal:
+        return jsonify({'error': 'Saved meal not found'}), 404
+    
+    data = request.get_json() or {}
+    
+    # Validated first, so a rejected request leaves the item rows untouched
+    if 'name' in data and not data['name']:
+        return jsonify({'error': 'name cannot be empty'}), 400
+    
+    if 'items' in data:
+        try:
+            meal.set_items(_parse_meal_items(data['items']))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    if 'name' in data:
+        meal.name = data['name']
+    if 'meal_type' in data:
+        meal.meal_type = data['meal_type']
+    if 'description' in data:
+        meal.description = data['description']
+    
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Saved meal updated successfully',
+        'meal': meal.to_dict(include_items=True)
+    }), 200
+
+
+@bp.route('/meals/<int:meal_id>', methods=['DELETE'])
+@jwt_required()
+def delete_saved_meal(meal_id):
+    user_id = get_jwt_identity()
+    meal = SavedMeal.query.filter_by(id=meal_id, user_id=user_id).first()
+    
+    if not meal:
+        return jsonify({'error': 'Saved meal not found'}), 404
+    
+    # Logged entries stay; they just stop pointing at the meal
+    rows = db.session.execute(
+        update(Nutrition).where(Nutrition.saved_meal_id == meal.id).values(saved_meal_id=None).returning(Nutrition.id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    SyncLog.record((user_id, 'nutrition', nutrition_id, 'upsert') for (nutrition_id,) in rows)
+    db.session.delete(meal)
+    db.session.commit()
+    
+    return jsonify({'message': 'Saved meal deleted successfully'}), 200
+
 
+@bp.route('/log-meal', methods=['POST'])
+@jwt_required()
+def log_meal():
+    """
+    Log every item of a meal as nutrition entries in one transaction.
+    
+    Body is either {meal_id} to re-log a saved meal, or {items} for an ad-hoc
+    meal, optionally with save_as to save it at the same time. `servings`
+    scales the whole meal.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data or not (data.get('meal_id') or data.get('items')):
+        return jsonify({'error': 'meal_id or items is required'}), 400
+    
+    try:
+        servings = float(data.get('servings', 1))
+        entry_date, local_date = local_time.parse_entry_date(data.get('date'), local_time.timezone_for(user_id))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid servings or date'}), 400
+    
+    if not math.isfinite(servings) or servings <= 0:
+        return jsonify({'error': 'servings must be a positive number'}), 400
+    
+    meal = None
+    if data.get('meal_id'):
+        meal = SavedMeal.query.filter_by(id=data['meal_id'], user_id=user_id).first()
+        if not meal:
+            return jsonify({'error': 'Saved meal not found'}), 404
+        items = meal.items
+    
+    meal_type = data.get('meal_type') or (meal.meal_type if meal else None)
+    if not meal_type:
+        return jsonify({'error': 'meal_type is required'}), 400
+    
+    if not meal:
+        try:
+            parsed = _parse_meal_items(data['items'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if data.get('save_as'):
+            meal = SavedMeal(user_id=user_id, name=data['save_as'], meal_type=meal_type)
+            meal.set_items(parsed)
+            db.session.add(meal)
+            db.session.flush()
+            items = meal.items
+        else:
+            items = [SavedMealItem(**values) for values in parsed]
+    
+    def scaled(item, field):
+        value = getattr(item, field)
+        return round(item.amount(field, servings), 1) if value is not None else None
+    
+    entries = [
+        Nutrition(
+            user_id=user_id,
+            meal_type=meal_type,
+            food_name=item.food_name,
+            calories=round(item.amount('calories', servings)),
+            protein=scaled(item, 'protein'),
+            carbohydrates=scaled(item, 'carbohydrates'),
+            fats=scaled(item, 'fats'),
+            fiber=scaled(item, 'fiber'),
+            serving_size=item.serving_size,
+            quantity=round(item.quantity * servings, 2),
+            saved_meal_id=meal.id if meal else None,
+            date=entry_date,
+            local_date=local_date
+        )
+        for item in items
+    ]
+    db.session.add_all(entries)
+    
+    totals = {field: sum(getattr(entry, field) or 0 for entry in entries) for field in SavedMeal.TOTAL_FIELDS}
+    
+    # The whole meal is one intake and one goal contribution, so the hooks run once, not per item
+    AdaptiveTdee.record_intake(user_id, local_date, totals['calories'])
+    GoalTracker.record(
+        SimpleNamespace(user_id=user_id, date=entry_date, local_date=local_date, protein=totals['protein']),
+        source=Nutrition
+    )
+    for entry in entries:
+        FrequentFoods.on_create(entry)
+    if meal:
+        meal.times_logged = (meal.times_logged or 0) + 1
+        meal.last_logged_at = datetime.utcnow()
+    User.bump_data_version(user_id)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Meal logged successfully',
+        'nutrition': [entry.to_dict() for entry in entries],
+        'totals': {field: round(value, 1) for field, value in totals.items()},
+        'saved_meal': meal.to_dict() if meal else None
+    }), 201
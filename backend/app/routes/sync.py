@@ -0,0 +1,164 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.routes import activities, goals, nutrition
+from app.services.sync import ENTITIES, SyncLog
+
+bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+# Offline edits accepted per POST
+MAX_PUSH = 500
+
+OPS = ('create', 'update', 'delete')
+
+# entity -> (create, update, delete) write helpers shared with the resource routes
+WRITERS = {
+    'activity': (activities.create_activity_entry, activities.update_activity_entry, activities.delete_activity_entry),
+    'nutrition': (nutrition.create_nutrition_entry, nutrition.update_nutrition_entry, nutrition.delete_nutrition_entry),
+    'goal': (goals.create_goal_entry, goals.update_goal_entry, goals.delete_goal_entry),
+}
+
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+def pull_changes():
+    """
+    Activities, nutrition entries and goals changed after `since`, oldest first.
+
+    Start with since=0 (a full snapshot), then pass back the returned token;
+    keep pulling while has_more is true.
+    """
+    user_id = get_jwt_identity()
+    since = request.args.get('since', 0, type=int)
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 1000)
+
+    try:
+        page = SyncLog.changes_since(user_id, since, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({**page, 'count': len(page['changes'])}), 200
+
+
+def _validate_change(change):
+    if not isinstance(change, dict):
+        raise ValueError('Change must be an object')
+    if change.get('entity') not in ENTITIES:
+        raise ValueError(f"entity must be one of: {', '.join(ENTITIES)}")
+    if change.get('op') not in OPS:
+        raise ValueError(f"op must be one of: {', '.join(OPS)}")
+    if change['op'] != 'create':
+        if not isinstance(change.get('id'), int):
+            raise ValueError(f"id is required to {change['op']}")
+        if not isinstance(change.get('base_seq'), int):
+            raise ValueError(f"base_seq is required to {change['op']}")
+    if change['op'] != 'delete' and not isinstance(change.get('data'), dict):
+        raise ValueError(f"data is required to {change['op']}")
+    if change['op'] != 'delete':
+        # The write helpers take form-style scalars; nested values would only fail inside them
+        for field, value in change['data'].items():
+            if value is not None and not isinstance(value, (str, int, float)):
+                raise ValueError(f'data.{field} must be a string, number or null')
+
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def push_changes():
+    """
+    Apply a batch of offline edits in one transaction.
+
+    Each change is {entity, op, id, base_seq, data, client_id}. An update or
+    delete whose entity changed on the server after base_seq (the seq the
+    client last pulled for it) is not applied: it comes back as a conflict
+    carrying the server's current version. Any invalid change rejects the
+    whole batch. Pull afterwards to pick up changes from other devices.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    changes = data.get('changes') if isinstance(data, dict) else None
+
+    if not isinstance(changes, list) or not changes:
+        return jsonify({'error': 'changes must be a non-empty list'}), 400
+    if len(changes) > MAX_PUSH:
+        return jsonify({'error': f'At most {MAX_PUSH} changes per request'}), 400
+    for index, change in enumerate(changes):
+        try:
+            _validate_change(change)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'index': index}), 400
+
+    # Conflicts are judged against the log before this batch, so a batch's own
+    # side effects (e.g. an activity moving a goal) never conflict with it
+    ids_by_entity = {}
+    for change in changes:
+        if change['op'] != 'create':
+            ids_by_entity.setdefault(change['entity'], set()).add(change['id'])
+    seqs = {entity: SyncLog.current_seqs(user_id, entity, ids) for entity, ids in ids_by_entity.items()}
+    loaded = {
+        entity: {obj.id: obj for obj in ENTITIES[entity].query.filter(
+            ENTITIES[entity].user_id == user_id, ENTITIES[entity].id.in_(ids)
+        )}
+        for entity, ids in ids_by_entity.items()
+    }
+
+    results, applied = [], []
+    for index, change in enumerate(changes):
+        entity, op = change['entity'], change['op']
+        create, update, delete = WRITERS[entity]
+        result = {'index': index, 'entity': entity, 'op': op, 'client_id': change.get('client_id')}
+
+        try:
+            if op == 'create':
+                obj = create(user_id, change['data'])
+                db.session.flush()
+                result.update(status='applied', id=obj.id)
+                applied.append((result, obj))
+                results.append(result)
+                continue
+
+            result['id'] = change['id']
+            obj = loaded[entity].get(change['id'])
+            current_seq, current_op = seqs[entity].get(change['id'], (None, None))
+
+            if obj is None:
+                # Deleting something already gone is a no-op; editing it is a conflict
+                if op == 'delete' and current_op == 'delete':
+                    result.update(status='applied', seq=current_seq)
+                elif current_op == 'delete':
+                    result.update(status='conflict', seq=current_seq, server_op='delete', data=None)
+                else:
+                    result.update(status='not_found')
+            elif current_seq is not None and current_seq > change['base_seq']:
+                result.update(status='conflict', seq=current_seq, server_op='upsert', data=obj.to_dict())
+            elif op == 'update':
+                update(obj, change['data'])
+                result['status'] = 'applied'
+                applied.append((result, obj))
+            else:
+                delete(obj)
+                loaded[entity].pop(change['id'])
+                result['status'] = 'applied'
+                applied.append((result, None))
+        except (TypeError, ValueError) as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'index': index}), 400
+
+        results.append(result)
+
+    db.session.commit()
+
+    # Report the seq each applied change landed at so the client can use it as base_seq
+    touched = {}
+    for result, _ in applied:
+        touched.setdefault(result['entity'], set()).add(result['id'])
+    landed = {entity: SyncLog.current_seqs(user_id, entity, ids) for entity, ids in touched.items()}
+    for result, obj in applied:
+        result['seq'] = landed[result['entity']].get(result['id'], (None, None))[0]
+        if obj is not None:
+            result['data'] = obj.to_dict()
+
+    return jsonify({
+        'results': results,
+        'applied': sum(1 for result in results if result['status'] == 'applied'),
+        'conflicts': sum(1 for result in results if result['status'] == 'conflict')
+    }), 200
@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.http_cache import conditional_get
+from app.services.timeline import Timeline, TYPES
+
+bp = Blueprint('timeline', __name__, url_prefix='/api/timeline')
+
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+@conditional_get('activities', 'nutrition', 'goals')
+def get_timeline():
+    """
+    Activities, meals and goal milestones merged newest first.
+    
+    Pass the returned next_cursor back as `cursor` for the following page;
+    `types` is an optional comma-separated subset of item types.
+    """
+    user_id = get_jwt_identity()
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    
+    types = None
+    if request.args.get('types'):
+        types = {value.strip() for value in request.args['types'].split(',') if value.strip()}
+        if not types or not types <= set(TYPES):
+            return jsonify({'error': f"types must be a subset of: {', '.join(TYPES)}"}), 400
+    
+    try:
+        page = Timeline.page(user_id, request.args.get('cursor'), limit, types)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({**page, 'count': len(page['items'])}), 200
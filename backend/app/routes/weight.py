@@ -0,0 +1,128 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import timedelta
+from app import db
+from app.models import User, WeightLog
+from app.services import downsampling, local_time
+from app.services.adaptive_tdee import AdaptiveTdee
+from app.services.calorie_calculator import CalorieCalculator
+from app.services.http_cache import conditional_get
+
+bp = Blueprint('weight', __name__, url_prefix='/api/weight')
+
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+@conditional_get('weight', 'nutrition', 'profile', daily=True)
+def get_weight_logs():
+    """
+    Get weight logs from the last `days` days, newest first.
+    
+    points (optional) caps the number of returned logs; the series is then
+    downsampled on weight with downsample=lttb (default) or minmax.
+    """
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    points = request.args.get('points', type=int)
+    method = request.args.get('downsample', 'lttb')
+    if points is not None and points < 3:
+        return jsonify({'error': 'points must be at least 3'}), 400
+    if method not in downsampling.METHODS:
+        return jsonify({'error': f"downsample must be one of: {', '.join(downsampling.METHODS)}"}), 400
+    
+    days = request.args.get('days', 90, type=int)
+    start_date = local_time.local_today(user.timezone) - timedelta(days=days)
+    
+    logs = WeightLog.query.filter(
+        WeightLog.user_id == user_id,
+        WeightLog.local_date >= start_date
+    ).order_by(WeightLog.date.desc()).all()
+    
+    total = len(logs)
+    if points and points < total:
+        # Downsample oldest-first so the kept points follow the trend forward in time
+        series = {'log': logs[::-1], 'weight_lbs': [log.weight_lbs for log in reversed(logs)]}
+        logs = downsampling.downsample_series(series, points, driver='weight_lbs', method=method)['log'][::-1]
+    
+    return jsonify({
+        'weight_logs': [log.to_dict() for log in logs],
+        'count': len(logs),
+        'total': total,
+        'downsample': method if len(logs) < total else None,
+        'adaptive_tdee': AdaptiveTdee.summary(user)
+    }), 200
+
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def create_weight_log():
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+    data = request.get_json()
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if not data or not data.get('weight_lbs'):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    try:
+        weight_lbs = float(data['weight_lbs'])
+        entry_date, local_date = local_time.parse_entry_date(data.get('date'), user.timezone)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid weight_lbs or date'}), 400
+    
+    if weight_lbs <= 0:
+        return jsonify({'error': 'weight_lbs must be positive'}), 400
+    
+    latest = db.session.query(db.func.max(WeightLog.local_date)).filter(WeightLog.user_id == user_id).scalar()
+    
+    log = WeightLog(user_id=user_id, weight_lbs=weight_lbs, note=data.get('note'),
+                    date=entry_date, local_date=local_date)
+    db.session.add(log)
+    
+    # The newest weigh-in is the profile weight, so formula targets follow it
+    if latest is None or local_date >= latest:
+        user.weight_lbs = round(weight_lbs)
+        CalorieCalculator.refresh_stored_profile(user)
+    
+    AdaptiveTdee.record_weight(user, weight_lbs, local_date)
+    User.bump_data_version(user_id)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Weight logged successfully',
+        'weight_log': log.to_dict(),
+        'adaptive_tdee': AdaptiveTdee.summary(user)
+    }), 201
+
+
+@bp.route('/<int:log_id>', methods=['DELETE'])
+@jwt_required()
+def delete_weight_log(log_id):
+    user_id = get_jwt_identity()
+    log = WeightLog.query.filter_by(id=log_id, user_id=user_id).first()
+    
+    if not log:
+        return jsonify({'error': 'Weight log not found'}), 404
+    
+    db.session.delete(log)
+    db.session.flush()
+    
+    # Deleting the newest weigh-in hands the profile weight back to the one before it
+    previous = WeightLog.query.filter_by(user_id=user_id).order_by(
+        WeightLog.local_date.desc(), WeightLog.date.desc(), WeightLog.id.desc()
+    ).first()
+    if previous is not None and log.local_date >= previous.local_date:
+        log.user.weight_lbs = round(previous.weight_lbs)
+        CalorieCalculator.refresh_stored_profile(log.user)
+    
+    AdaptiveTdee.rebuild(log.user)
+    User.bump_data_version(user_id)
+    db.session.commit()
+    
+    return jsonify({'message': 'Weight log deleted successfully'}), 200
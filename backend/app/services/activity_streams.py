@@ -0,0 +1,335 @@
+"""
+Activity Streams Service
+Parses GPX, TCX and CSV sample files and stores them as compact per-channel streams.
+
+Each channel is quantized to integers at a fixed scale, delta-encoded, byte-shuffled
+(so the mostly-zero high bytes of the deltas sit together) and zlib-compressed
+into one blob. A 1 Hz run with GPS, altitude, heart rate and cadence takes about
+5 bytes per sample across all channels, against ~100 bytes per sample as one
+row per point (see scripts/benchmark_streams.py).
+
+Next to the full-resolution blobs, every channel also gets a fixed-size overview
+blob, so chart-sized requests decode at most OVERVIEW_POINTS samples.
+"""
+import csv
+import io
+import math
+import struct
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, Optional
+from xml.etree import ElementTree
+import numpy as np
+from app import db
+from app.models import ActivityStream
+
+
+# channel -> quantization step, in the channel's unit
+CHANNELS = {
+    'time': 0.1,          # seconds since the first sample
+    'lat': 1e-7,          # degrees
+    'lng': 1e-7,          # degrees
+    'altitude': 0.1,      # meters
+    'distance': 0.1,      # meters from the start
+    'heart_rate': 1.0,    # bpm
+    'cadence': 1.0,       # steps or revolutions per minute
+    'power': 1.0,         # watts
+    'speed': 0.01,        # meters per second
+}
+
+# Named resolutions for GET .../streams; None means every sample
+RESOLUTIONS = {'low': 100, 'medium': 1000, 'high': None}
+OVERVIEW_POINTS = 1000
+MAX_SAMPLES = 200000
+
+FORMATS = ('gpx', 'tcx', 'csv')
+
+_HEADER = struct.Struct('<BBI')  # version, flags, sample count
+_VERSION = 1
+_HAS_MASK = 1
+_WIDE = 2
+
+# Element/column names mapped to channels, for all three formats
+_FIELD_NAMES = {
+    'time': 'time', 'timestamp': 'time',
+    'lat': 'lat', 'latitude': 'lat', 'latitudedegrees': 'lat',
+    'lon': 'lng', 'lng': 'lng', 'longitude': 'lng', 'longitudedegrees': 'lng',
+    'ele': 'altitude', 'elevation': 'altitude', 'altitude': 'altitude', 'altitudemeters': 'altitude',
+    'distance': 'distance', 'distancemeters': 'distance',
+    'hr': 'heart_rate', 'heart_rate': 'heart_rate', 'heartrate': 'heart_rate',
+    'cad': 'cadence', 'cadence': 'cadence', 'runcadence': 'cadence',
+    'power': 'power', 'watts': 'power',
+    'speed': 'speed',
+}
+
+
+class StreamFormatError(ValueError):
+    """Raised for sample files that cannot be parsed."""
+
+
+def encode(values, scale: float) -> bytes:
+    """Quantize, delta-encode, byte-shuffle and compress one channel. NaN marks a missing sample."""
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    flags = 0 if present.all() else _HAS_MASK
+
+    deltas = np.diff(np.round(values[present] / scale).astype(np.int64), prepend=0)
+    if len(deltas) and (deltas.min() < -2 ** 31 or deltas.max() >= 2 ** 31):
+        flags |= _WIDE
+        deltas = deltas.astype('<i8')
+    else:
+        deltas = deltas.astype('<i4')
+
+    shuffled = deltas.view(np.uint8).reshape(-1, deltas.itemsize).T.tobytes()
+    mask = np.packbits(present, bitorder='little').tobytes() if flags & _HAS_MASK else b''
+    return _HEADER.pack(_VERSION, flags, len(values)) + zlib.compress(mask + shuffled, 6)
+
+
+def decode(blob: bytes, scale: float) -> np.ndarray:
+    """Inverse of encode(); missing samples come back as NaN."""
+    version, flags, count = _HEADER.unpack_from(blob)
+    if version != _VERSION:
+        raise ValueError(f'Unsupported stream encoding version {version}')
+    body = zlib.decompress(blob[_HEADER.size:])
+
+    if flags & _HAS_MASK:
+        mask_bytes = (count + 7) // 8
+        present = np.unpackbits(np.frombuffer(body[:mask_bytes], dtype=np.uint8),
+                                count=count, bitorder='little').astype(bool)
+        body = body[mask_bytes:]
+    else:
+        present = np.ones(count, dtype=bool)
+
+    width = 8 if flags & _WIDE else 4
+    shuffled = np.frombuffer(body, dtype=np.uint8).reshape(width, -1)
+    deltas = np.ascontiguousarray(shuffled.T).view(f'<i{width}').ravel()
+
+    values = np.full(count, np.nan)
+    values[present] = np.cumsum(deltas, dtype=np.int64) * scale
+    return values
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _parse_time(text: str) -> Optional[datetime]:
+    """ISO timestamp to naive UTC."""
+    text = text.strip()
+    if not text:
+        return None
+    moment = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _iter_xml_points(stream, point_tag: str) -> Iterable[Dict[str, Any]]:
+    """Yield one dict per track point, clearing each element after use so memory stays flat."""
+    try:
+        for _, elem in ElementTree.iterparse(stream, events=('end',)):
+            if _local_name(elem.tag) != point_tag:
+                continue
+
+            sample = {}
+            for name in ('lat', 'lon'):
+                if name in elem.attrib:
+                    sample[_FIELD_NAMES[name]] = elem.attrib[name]
+            for child in elem.iter():
+                name = _local_name(child.tag)
+                if name == 'heartratebpm':
+                    # TCX nests the value: <HeartRateBpm><Value>142</Value></HeartRateBpm>
+                    value = next((c.text for c in child if _local_name(c.tag) == 'value'), None)
+                    if value:
+                        sample['heart_rate'] = value
+                elif name in _FIELD_NAMES and child.text and child.text.strip():
+                    sample[_FIELD_NAMES[name]] = child.text
+
+            elem.clear()
+            yield sample
+    except ElementTree.ParseError as e:
+        raise StreamFormatError(f'Invalid XML: {e}')
+
+
+def _iter_csv_points(stream) -> Iterable[Dict[str, Any]]:
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if not reader.fieldnames:
+        raise StreamFormatError('CSV file has no header row')
+
+    columns = {name: _FIELD_NAMES.get(name.strip().lower()) for name in reader.fieldnames}
+    if not any(columns.values()):
+        raise StreamFormatError(f"No known columns; expected some of: {', '.join(CHANNELS)}")
+
+    for row in reader:
+        yield {channel: row[name] for name, channel in columns.items() if channel and row.get(name)}
+
+
+def parse(stream, file_format: str) -> Dict[str, Any]:
+    """
+    Parse a GPX, TCX or CSV file object into channel arrays.
+
+    Returns:
+        Dict with 'start_time' (naive UTC or None) and 'channels' {channel: float array
+        with NaN for missing samples}. 'time' is seconds since the first sample.
+    """
+    if file_format == 'gpx':
+        points = _iter_xml_points(stream, 'trkpt')
+    elif file_format == 'tcx':
+        points = _iter_xml_points(stream, 'trackpoint')
+    elif file_format == 'csv':
+        points = _iter_csv_points(stream)
+    else:
+        raise StreamFormatError(f"Unsupported format; use one of: {', '.join(FORMATS)}")
+
+    columns = {channel: array('d') for channel in CHANNELS}
+    start_time = None
+    count = 0
+
+    for sample in points:
+        count += 1
+        if count > MAX_SAMPLES:
+            raise StreamFormatError(f'Too many samples (limit {MAX_SAMPLES})')
+
+        for channel, column in columns.items():
+            raw = sample.get(channel)
+            if raw is None:
+                column.append(math.nan)
+            elif channel == 'time':
+                column.append(_time_offset(raw, start_time))
+                if start_time is None and not _is_number(raw):
+                    start_time = _parse_time(raw)
+            else:
+                try:
+                    column.append(float(raw))
+                except ValueError:
+                    raise StreamFormatError(f'Invalid {channel} value {raw!r} at sample {count}')
+
+    if not count:
+        raise StreamFormatError('No samples found')
+
+    channels = {channel: np.frombuffer(column, dtype=float) for channel, column in columns.items()}
+    channels = {channel: values for channel, values in channels.items() if not np.isnan(values).all()}
+
+    if 'time' not in channels:
+        # No timestamps: assume one sample per second
+        channels['time'] = np.arange(count, dtype=float)
+    if 'distance' not in channels and 'lat' in channels and 'lng' in channels:
+        channels['distance'] = _track_distance(channels['lat'], channels['lng'])
+
+    return {'start_time': start_time, 'channels': channels}
+
+
+def _is_number(text) -> bool:
+    try:
+        float(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _time_offset(raw, start_time) -> float:
+    if _is_number(raw):
+        return float(raw)
+    try:
+        moment = _parse_time(raw)
+    except ValueError:
+        raise StreamFormatError(f'Invalid time value {raw!r}')
+    if moment is None:
+        return math.nan
+    return (moment - start_time).total_seconds() if start_time else 0.0
+
+
+def _track_distance(lat, lng) -> np.ndarray:
+    """Cumulative haversine distance in meters; NaN where there is no fix."""
+    phi, lam = np.radians(lat), np.radians(lng)
+    dphi, dlam = np.diff(phi), np.diff(lam)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlam / 2) ** 2
+    steps = 2 * 6371000 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    distance = np.concatenate([[0.0], np.cumsum(np.nan_to_num(steps))])
+    distance[np.isnan(lat) | np.isnan(lng)] = np.nan
+    return distance
+
+
+def summarize(parsed) -> Dict[str, Any]:
+    """Activity totals implied by parsed channels."""
+    channels = parsed['channels']
+    elapsed = np.nanmax(channels['time']) if not np.isnan(channels['time']).all() else 0
+    summary = {
+        'date': parsed['start_time'],
+        'duration_minutes': int(round(elapsed / 60)) or None,
+        'distance': None,
+        'samples': len(channels['time']),
+    }
+    if 'distance' in channels and not np.isnan(channels['distance']).all():
+        summary['distance'] = round(float(np.nanmax(channels['distance'])) / 1000, 2) or None
+    if 'heart_rate' in channels:
+        summary['average_heart_rate'] = round(float(np.nanmean(channels['heart_rate'])))
+    return summary
+
+
+def _overview_indices(count: int, points: int) -> np.ndarray:
+    if count <= points:
+        return np.arange(count)
+    return np.unique(np.linspace(0, count - 1, points).round().astype(np.int64))
+
+
+def save(activity, channels: Dict[str, np.ndarray]) -> int:
+    """
+    Replace an activity's streams with the given channels. Call before commit.
+
+    Returns:
+        Total bytes stored
+    """
+    if activity.id is None:
+        db.session.flush()
+    activity.streams.delete(synchronize_session=False)
+
+    count = len(channels['time'])
+    overview = _overview_indices(count, OVERVIEW_POINTS)
+    stored = 0
+
+    for channel, values in channels.items():
+        scale = CHANNELS[channel]
+        levels = [(0, values)] if len(overview) == count else [(0, values), (1, values[overview])]
+        for level, samples in levels:
+            blob = encode(samples, scale)
+            stored += len(blob)
+            db.session.add(ActivityStream(
+                activity_id=activity.id, channel=channel, level=level,
+                sample_count=len(samples), scale=scale, data=blob
+            ))
+    return stored
+
+
+def load(activity, points: Optional[int], channels: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Decode an activity's streams at no more than `points` samples (None for all).
+
+    Reads the overview level whenever it is large enough, so only full-resolution
+    requests touch the full blobs.
+    """
+    available = {level: count for level, count in db.session.query(
+        ActivityStream.level, ActivityStream.sample_count
+    ).filter(ActivityStream.activity_id == activity.id, ActivityStream.channel == 'time')}
+    if not available:
+        return {'original_size': 0, 'series_size': 0, 'streams': {}}
+
+    level = 1 if 1 in available and points is not None and points <= available[1] else 0
+    query = ActivityStream.query.filter_by(activity_id=activity.id, level=level)
+    if channels:
+        query = query.filter(ActivityStream.channel.in_(channels))
+
+    rows = query.all()
+    size = available[level]
+    indices = _overview_indices(size, points) if points is not None else np.arange(size)
+
+    streams = {}
+    for row in rows:
+        values = decode(row.data, row.scale)[indices]
+        decimals = max(0, -math.floor(math.log10(row.scale)))
+        streams[row.channel] = [
+            None if math.isnan(v) else (round(v, decimals) if decimals else round(v)) for v in values.tolist()
+        ]
+
+    return {'original_size': available[0], 'series_size': len(indices), 'streams': streams}
@@ -0,0 +1,181 @@
+"""
+Adaptive TDEE Service
+Estimates a user's actual energy expenditure from logged intake and weight change.
+
+Each user has one TdeeEstimate row holding two running estimates:
+- trend weight: an exponential moving average of weigh-ins that filters out
+  day-to-day water swings
+- TDEE: a scalar Kalman filter. Every weigh-in gives one observation,
+      observed = average daily intake - trend change * 3500 / days,
+  which is blended into the estimate by the relative uncertainty of each.
+
+Meals add to a running intake total for the current weigh-in interval, and a
+weigh-in folds that total into the estimate and resets it. Every new entry is
+a single UPDATE; history is only replayed by rebuild().
+"""
+from typing import Dict, Any, Optional
+from sqlalchemy import distinct, func, select
+from app import db
+from app.models import Nutrition, TdeeEstimate, WeightLog
+from app.services.calorie_calculator import CalorieCalculator
+
+
+class AdaptiveTdee:
+    """
+    Incremental trend-weight and TDEE estimator.
+    """
+    
+    # Share of the gap between trend and a new weigh-in absorbed per day
+    TREND_SMOOTHING = 0.1
+    
+    PRIOR_TDEE = 2000
+    PRIOR_VARIANCE = 400 ** 2
+    # How far true TDEE can drift per day, and how noisy a one-day observation is
+    PROCESS_VARIANCE_PER_DAY = 15 ** 2
+    OBSERVATION_VARIANCE = 800 ** 2
+    
+    # The trend lags real weight change at first, so early intervals are not observed
+    WARMUP_DAYS = 10
+    # A weigh-in interval only counts if most of its days have meals logged
+    MIN_INTAKE_COVERAGE = 0.8
+    MAX_INTERVAL_DAYS = 14
+    # Observations needed before the estimate is shown as usable
+    MIN_OBSERVATIONS = 3
+    
+    @staticmethod
+    def record_weight(user, weight_lbs: float, local_date):
+        """Fold a new weigh-in into the user's estimate. Call before commit."""
+        state = db.session.get(TdeeEstimate, user.id)
+        if state is None:
+            state = TdeeEstimate(user_id=user.id, observations=0, intake_calories=0, intake_days=0)
+            db.session.add(state)
+        
+        if state.last_weight_date is not None and local_date <= state.last_weight_date:
+            # Backdated or same-day corrections change history; replay it instead
+            AdaptiveTdee.rebuild(user)
+            return
+        
+        AdaptiveTdee._fold_weigh_in(state, weight_lbs, local_date, user.tdee)
+        
+        # The new interval starts on the weigh-in day, so meals already logged that day count towards it
+        state.intake_calories, state.intake_days, state.last_intake_date = db.session.query(
+            func.coalesce(func.sum(Nutrition.calories), 0), func.count(distinct(Nutrition.local_date)),
+            func.max(Nutrition.local_date)
+        ).filter(Nutrition.user_id == user.id, Nutrition.local_date >= local_date).one()
+    
+    @staticmethod
+    def record_intake(user_id, local_date, calories):
+        """
+        Add (or, with negative calories, remove) intake for a meal on local_date. Call
+        after the entry is added or deleted in the session.
+        
+        One atomic UPDATE; meals from before the current weigh-in interval are ignored.
+        Days with meals are recounted from the interval's entries, so backdated meals
+        and a day's last meal being deleted or moved are counted correctly.
+        """
+        if local_date is None or not calories:
+            return
+        
+        in_interval = (Nutrition.user_id == TdeeEstimate.user_id, Nutrition.local_date >= TdeeEstimate.last_weight_date)
+        TdeeEstimate.query.filter(
+            TdeeEstimate.user_id == user_id,
+            TdeeEstimate.last_weight_date <= local_date
+        ).update({
+            TdeeEstimate.intake_calories: TdeeEstimate.intake_calories + calories,
+            TdeeEstimate.intake_days: select(func.count(distinct(Nutrition.local_date))).where(*in_interval).scalar_subquery(),
+            TdeeEstimate.last_intake_date: select(func.max(Nutrition.local_date)).where(*in_interval).scalar_subquery(),
+        }, synchronize_session=False)
+    
+    @staticmethod
+    def rebuild(user):
+        """Replay a user's full weight and intake history into a fresh estimate."""
+        state = db.session.get(TdeeEstimate, user.id)
+        if state is None:
+            state = TdeeEstimate(user_id=user.id)
+            db.session.add(state)
+        
+        state.trend_weight = state.tdee = state.tdee_variance = None
+        state.first_weight_date = state.last_weight_date = None
+        state.last_intake_date = None
+        state.observations = 0
+        state.intake_calories = 0
+        state.intake_days = 0
+        
+        db.session.flush()
+        
+        # Last weigh-in of each day
+        weights = {}
+        for day, weight in db.session.query(WeightLog.local_date, WeightLog.weight_lbs).filter(
+            WeightLog.user_id == user.id, WeightLog.local_date.isnot(None)
+        ).order_by(WeightLog.local_date, WeightLog.date, WeightLog.id):
+            weights[day] = weight
+        
+        if not weights:
+            return
+        
+        intake = dict(db.session.query(Nutrition.local_date, db.func.sum(Nutrition.calories)).filter(
+            Nutrition.user_id == user.id, Nutrition.local_date >= min(weights)
+        ).group_by(Nutrition.local_date).all())
+        meal_days = sorted(intake)
+        
+        position = 0
+        for day in sorted(weights):
+            # Meals from the previous weigh-in day up to (not including) this one
+            while position < len(meal_days) and meal_days[position] < day:
+                state.intake_calories += intake[meal_days[position]]
+                state.intake_days += 1
+                state.last_intake_date = meal_days[position]
+                position += 1
+            AdaptiveTdee._fold_weigh_in(state, weights[day], day, user.tdee)
+        
+        for meal_day in meal_days[position:]:
+            state.intake_calories += intake[meal_day]
+            state.intake_days += 1
+            state.last_intake_date = meal_day
+    
+    @staticmethod
+    def _fold_weigh_in(state, weight_lbs, local_date, formula_tdee):
+        if state.trend_weight is None:
+            state.trend_weight = float(weight_lbs)
+            state.tdee = float(formula_tdee or AdaptiveTdee.PRIOR_TDEE)
+            state.tdee_variance = float(AdaptiveTdee.PRIOR_VARIANCE)
+            state.first_weight_date = local_date
+        else:
+            days = (local_date - state.last_weight_date).days
+            alpha = 1 - (1 - AdaptiveTdee.TREND_SMOOTHING) ** days
+            trend = state.trend_weight + alpha * (weight_lbs - state.trend_weight)
+            variance = state.tdee_variance + AdaptiveTdee.PROCESS_VARIANCE_PER_DAY * days
+            
+            warmed_up = (local_date - state.first_weight_date).days > AdaptiveTdee.WARMUP_DAYS
+            covered = state.intake_days >= AdaptiveTdee.MIN_INTAKE_COVERAGE * days
+            if warmed_up and days <= AdaptiveTdee.MAX_INTERVAL_DAYS and state.intake_days and covered:
+                average_intake = state.intake_calories / state.intake_days
+                stored = (trend - state.trend_weight) * CalorieCalculator.CALORIES_PER_POUND / days
+                observed = average_intake - stored
+                
+                gain = variance / (variance + AdaptiveTdee.OBSERVATION_VARIANCE / days)
+                state.tdee += gain * (observed - state.tdee)
+                variance *= 1 - gain
+                state.observations += 1
+            
+            state.trend_weight = trend
+            state.tdee_variance = min(variance, AdaptiveTdee.PRIOR_VARIANCE)
+        
+        state.last_weight_date = local_date
+        state.intake_calories = 0
+        state.intake_days = 0
+        state.last_intake_date = None
+    
+    @staticmethod
+    def summary(user) -> Optional[Dict[str, Any]]:
+        """Adaptive estimate for display, with the target it implies; None before any weigh-in."""
+        state = db.session.get(TdeeEstimate, user.id)
+        if state is None or state.tdee is None:
+            return None
+        
+        result = state.to_dict()
+        result['ready'] = state.observations >= AdaptiveTdee.MIN_OBSERVATIONS
+        result['target_calories'] = CalorieCalculator.calculate_target_calories(
+            round(state.tdee), user.weight_goal_rate
+        ) if result['ready'] else None
+        return result
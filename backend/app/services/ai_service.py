@@ -1,27 +1,83 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 import requests
+from app import db
 from app.models import Activity, Nutrition, Goal
+from app.services.circuit_breaker import CircuitBreaker
+from app.services import local_time
+from app.services.calorie_calculator import CalorieCalculator
+from app.services.coach_intents import CoachIntentEngine
+from app.services.meal_planner import MealPlanner
+from app.services.streaks import StreakTracker
+
+# Shared across requests: AIService is instantiated per request, but breaker state,
+# latency history and the hedging pool must survive between them.
+llm_breaker = CircuitBreaker(
+    'llm',
+    failure_rate_threshold=float(os.environ.get('LLM_BREAKER_FAILURE_RATE', 0.5)),
+    slow_call_seconds=float(os.environ.get('LLM_BREAKER_SLOW_SECONDS', 15)),
+    open_seconds=float(os.environ.get('LLM_BREAKER_OPEN_SECONDS', 30))
+)
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+# Updated from request and hedge threads, so always under _hedge_lock
+hedge_counters = {'hedged': 0, 'hedge_wins': 0}
+_hedge_lock = threading.Lock()
+
+
+def _count_hedge(key):
+    with _hedge_lock:
+        hedge_counters[key] += 1
+
+
+def hedge_metrics() -> Dict[str, int]:
+    """Consistent snapshot of the hedging counters."""
+    with _hedge_lock:
+        return dict(hedge_counters)
 
 
 class AIService:
+    # Local answers at or above this confidence skip the remote model entirely; a
+    # confidence of 1.0 takes a specific phrase or several agreeing signals
+    LOCAL_ANSWER_CONFIDENCE = 1.0
+    
     def __init__(self):
         self.api_key = os.environ.get('NVIDIA_API_KEY')
-        self.api_url = "https://integrate.api.nvidia.com/v1/chat/completions"
+        self.api_url = os.environ.get('NVIDIA_API_URL', "https://integrate.api.nvidia.com/v1/chat/completions")
         self.model = "meta/llama-3.1-70b-instruct"
+        self.hedge_requests = os.environ.get('LLM_HEDGE_REQUESTS', 'false').lower() == 'true'
+        self.intent_engine = CoachIntentEngine()
         print(f"[AIService] Initialized with API key: {'SET' if self.api_key else 'NOT SET'}")
         print(f"[AIService] API URL: {self.api_url}")
         print(f"[AIService] Model: {self.model}")
     
-    def chat_with_coach(self, user, user_message: str, conversation_history: List[Dict] = None) -> str:
+    def chat_with_coach(self, user, user_message: str, conversation_history: List[Dict] = None,
+                        deadline: Optional[float] = None) -> str:
+        """
+        Answer a chat message, locally when possible, otherwise via the remote model.
+        
+        deadline is an absolute time.monotonic() value; the remote call never runs past it.
+        """
         print(f"\n[AIService.chat_with_coach] Starting...")
         print(f"[AIService] API Key available: {bool(self.api_key)}")
         
+        # Follow-ups depend on the conversation so far, which canned answers cannot see
+        match = None if conversation_history else self.intent_engine.classify(user_message)
+        if match and match['confidence'] >= self.LOCAL_ANSWER_CONFIDENCE:
+            print(f"[AIService] Answered locally: {match['intent']} ({match['confidence']})")
+            return self.intent_engine.respond(user, match['intent'])
+        
         if not self.api_key:
             print("[AIService] No API key - using fallback response")
             return self._fallback_chat_response(user, user_message)
         
+        if deadline is None:
+            deadline = time.monotonic() + 60
+        
         try:
             user_context = self._build_user_context(user)
             
@@ -59,25 +115,34 @@ class AIService:
                 "temperature": 0.7
             }
             
+            # Taken only now, so nothing between here and the outcome below can leak a half-open probe slot
+            if not llm_breaker.allow_request():
+                print("[AIService] Circuit breaker OPEN - using fallback response")
+                return self._fallback_chat_response(user, user_message)
+            
             print(f"[AIService] Making API request to: {self.api_url}")
             print(f"[AIService] Model: {self.model}")
             
-            response = requests.post(self.api_url, json=payload, headers=headers, timeout=60)
-            print(f"[AIService] Response status: {response.status_code}")
+            started = time.monotonic()
+            succeeded = False
+            try:
+                ai_response = self._request_completion(payload, headers, deadline)
+                succeeded = True
+            finally:
+                if succeeded:
+                    llm_breaker.record_success(time.monotonic() - started)
+                else:
+                    llm_breaker.record_failure(time.monotonic() - started)
             
-            response.raise_for_status()
-            
-            result = response.json()
-            ai_response = result['choices'][0]['message']['content']
             print(f"[AIService] Success! Response length: {len(ai_response)}")
             return ai_response
         
         except requests.exceptions.Timeout:
-            print(f"[AIService] TIMEOUT: NVIDIA API took too long to respond")
-            return "Sorry, I'm running into an error with the AI model. This is due to Render hosting on the free tier - the request timed out. Sorry for any inconvenience!"
+            print(f"[AIService] TIMEOUT: NVIDIA API did not respond before the deadline - using fallback response")
+            return self._fallback_chat_response(user, user_message)
         except requests.exceptions.ConnectionError as e:
-            print(f"[AIService] CONNECTION ERROR: {e}")
-            return "Sorry, I'm running into an error with the AI model. This is due to Render hosting on the free tier. Sorry for any inconvenience!"
+            print(f"[AIService] CONNECTION ERROR: {e} - using fallback response")
+            return self._fallback_chat_response(user, user_message)
         except Exception as e:
             print(f"NVIDIA API error: {e}")
             print(f"Using model: {self.model}")
@@ -85,7 +150,53 @@ class AIService:
             if hasattr(e, 'response') and e.response is not None:
                 print(f"Response status: {e.response.status_code}")
                 print(f"Response text: {e.response.text}")
-            return "Sorry, I'm running into an error with the AI model. This is due to Render hosting on the free tier. Sorry for any inconvenience!"
+            return self._fallback_chat_response(user, user_message)
+    
+    def _post_completion(self, payload, headers, timeout: float) -> str:
+        response = requests.post(self.api_url, json=payload, headers=headers, timeout=timeout)
+        print(f"[AIService] Response status: {response.status_code}")
+        
+        response.raise_for_status()
+        
+        result = response.json()
+        return result['choices'][0]['message']['content']
+    
+    def _request_completion(self, payload, headers, deadline: float) -> str:
+        """
+        Call the completions endpoint without running past the deadline.
+        
+        With hedging enabled, a second identical request is sent if the first has not
+        answered within the recent p95 latency; whichever finishes first wins.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout('Deadline exceeded before the request was sent')
+        
+        hedge_delay = llm_breaker.p95_latency() if self.hedge_requests else None
+        if hedge_delay is None or hedge_delay >= remaining:
+            return self._post_completion(payload, headers, remaining)
+        
+        primary = _hedge_executor.submit(self._post_completion, payload, headers, remaining)
+        pending = {primary}
+        done, _ = wait(pending, timeout=hedge_delay)
+        
+        if not done:
+            _count_hedge('hedged')
+            print(f"[AIService] No response after {hedge_delay:.2f}s (p95) - sending hedged request")
+            pending.add(_hedge_executor.submit(self._post_completion, payload, headers, deadline - time.monotonic()))
+        
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise requests.exceptions.Timeout('Deadline exceeded waiting for the completions endpoint')
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        _count_hedge('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
     
     def generate_recommendations(self, user) -> Dict[str, Any]:
         recent_activities = Activity.query.filter_by(user_id=user.id).order_by(Activity.date.desc()).limit(10).all()
@@ -101,77 +212,49 @@ class AIService:
         
         return recommendations
     
-    def analyze_patterns(self, user) -> Dict[str, Any]:
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    def analyze_patterns(self, user, days: int = 30) -> Dict[str, Any]:
+        """
+        Analyze activity and nutrition patterns over the last `days` days.
+        
+        Only the columns the analysis needs are fetched, as tuples, and every
+        aggregate is computed over NumPy arrays rather than ORM objects.
+        """
+        today = local_time.local_today(user.timezone)
+        start_date = today - timedelta(days=days - 1)
+        
+        activity_rows = db.session.query(
+            Activity.local_date, Activity.activity_type, Activity.duration_minutes, Activity.calories_burned
+        ).filter(Activity.user_id == user.id, Activity.local_date >= start_date).all()
         
-        activities = Activity.query.filter_by(user_id=user.id).filter(Activity.date >= thirty_days_ago).all()
-        nutrition_logs = Nutrition.query.filter_by(user_id=user.id).filter(Nutrition.date >= thirty_days_ago).all()
+        nutrition_rows = db.session.query(
+            Nutrition.local_date, Nutrition.calories, Nutrition.protein
+        ).filter(Nutrition.user_id == user.id, Nutrition.local_date >= start_date).all()
+        
+        activities = self._activity_columns(activity_rows, today)
+        nutrition = self._nutrition_columns(nutrition_rows, today)
         
         patterns = {
-            'activity_trends': self._analyze_activity_trends(activities),
-            'nutrition_trends': self._analyze_nutrition_trends(nutrition_logs),
-            'consistency': self._analyze_consistency(activities),
-            'insights': self._generate_insights(user, activities, nutrition_logs)
+            'window_days': days,
+            'activity_trends': self._analyze_activity_trends(activities, days),
+            'nutrition_trends': self._analyze_nutrition_trends(nutrition),
+            'consistency': self._analyze_consistency(user, today, days),
+            'insights': self._generate_insights(user, activities, nutrition, days)
         }
         
         return patterns
     
-    def generate_meal_plan(self, user, days: int = 7) -> List[Dict[str, Any]]:
+    def generate_meal_plan(self, user, days: int = 7, preference: str = 'none') -> List[Dict[str, Any]]:
         # Determine goal from weight_goal_rate
-        if user.weight_goal_rate is not None:
-            if user.weight_goal_rate < 0:
-                goal = 'weight_loss'
-            elif user.weight_goal_rate > 0:
-                goal = 'muscle_gain'
-            else:
-                goal = 'maintenance'
+        if user.weight_goal_rate is not None and user.weight_goal_rate < 0:
+            goal_key = 'weight_loss'
+        elif user.weight_goal_rate is not None and user.weight_goal_rate > 0:
+            goal_key = 'muscle_gain'
         else:
-            goal = 'general fitness'
+            goal_key = 'general'
         
-        fitness_level = user.fitness_level or 'intermediate'
-        
-        meal_plan = []
-        
-        meal_templates = {
-            'weight_loss': {
-                'breakfast': ['Greek yogurt with berries and almonds', 'Oatmeal with banana and peanut butter', 'Egg white omelet with vegetables'],
-                'lunch': ['Grilled chicken salad', 'Quinoa bowl with vegetables', 'Tuna wrap with mixed greens'],
-                'dinner': ['Baked salmon with broccoli', 'Lean turkey with sweet potato', 'Grilled chicken with roasted vegetables'],
-                'snack': ['Apple with almond butter', 'Protein shake', 'Carrot sticks with hummus']
-            },
-            'muscle_gain': {
-                'breakfast': ['Protein pancakes with eggs', 'Oatmeal with protein powder and banana', 'Scrambled eggs with avocado toast'],
-                'lunch': ['Chicken breast with brown rice', 'Beef stir-fry with quinoa', 'Salmon with sweet potato'],
-                'dinner': ['Steak with vegetables and rice', 'Chicken pasta with marinara', 'Turkey meatballs with whole grain pasta'],
-                'snack': ['Protein shake with banana', 'Greek yogurt with granola', 'Nuts and dried fruit']
-            },
-            'general': {
-                'breakfast': ['Smoothie bowl with fruits', 'Whole grain toast with avocado', 'Oatmeal with mixed berries'],
-                'lunch': ['Mixed salad with grilled protein', 'Whole grain wrap with vegetables', 'Buddha bowl'],
-                'dinner': ['Grilled fish with quinoa', 'Chicken stir-fry with rice', 'Vegetable curry with brown rice'],
-                'snack': ['Fresh fruit', 'Nuts and seeds', 'Veggie sticks with dip']
-            }
-        }
-        
-        goal_key = 'weight_loss' if 'weight loss' in goal.lower() or 'lose' in goal.lower() else \
-                   'muscle_gain' if 'muscle' in goal.lower() or 'gain' in goal.lower() else 'general'
-        
-        templates = meal_templates[goal_key]
-        
-        for day in range(days):
-            day_plan = {
-                'day': day + 1,
-                'date': (datetime.utcnow() + timedelta(days=day)).strftime('%Y-%m-%d'),
-                'meals': {
-                    'breakfast': templates['breakfast'][day % len(templates['breakfast'])],
-                    'lunch': templates['lunch'][day % len(templates['lunch'])],
-                    'dinner': templates['dinner'][day % len(templates['dinner'])],
-                    'snack': templates['snack'][day % len(templates['snack'])]
-                }
-            }
-            meal_plan.append(day_plan)
+        target_calories = CalorieCalculator.get_profile(user)['target_calories'] or user.daily_calorie_goal
         
-        return meal_plan
+        return MealPlanner.generate(target_calories, goal_key, days, preference)
     
     def generate_workout_plan(self, user, days: int = 7) -> List[Dict[str, Any]]:
         fitness_level = user.fitness_level or 'intermediate'
@@ -287,22 +370,11 @@ class AIService:
         return context
     
     def _fallback_chat_response(self, user, user_message: str) -> str:
-        responses = {
-            'motivation': f"You're doing great, {user.first_name or user.username}! Keep pushing towards your goals. Every workout counts!",
-            'workout': "For a balanced workout, focus on compound movements like squats, deadlifts, and bench press. Don't forget cardio!",
-            'nutrition': "Remember to eat a balanced diet with plenty of protein, healthy fats, and complex carbohydrates. Stay hydrated!",
-            'default': f"Thanks for reaching out! I'm here to help you with your fitness journey. What specific area would you like guidance on?"
-        }
+        match = self.intent_engine.classify(user_message)
+        if match:
+            return self.intent_engine.respond(user, match['intent'])
         
-        message_lower = user_message.lower()
-        if any(word in message_lower for word in ['motivate', 'encourage', 'give up']):
-            return responses['motivation']
-        elif any(word in message_lower for word in ['workout', 'exercise', 'train']):
-            return responses['workout']
-        elif any(word in message_lower for word in ['eat', 'food', 'diet', 'nutrition']):
-            return responses['nutrition']
-        else:
-            return responses['default']
+        return "Thanks for reaching out! I'm here to help you with your fitness journey. What specific area would you like guidance on?"
     
     def _recommend_workouts(self, user, recent_activities) -> List[str]:
         recommendations = []
@@ -370,54 +442,103 @@ class AIService:
         
         return tips
     
-    def _analyze_activity_trends(self, activities) -> Dict[str, Any]:
-        if not activities:
-            return {'message': 'Not enough data to analyze trends'}
+    @staticmethod
+    def _day_ages(dates, today) -> np.ndarray:
+        """Whole days between each local date and today (0 = today)."""
+        ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates))
+        return today.toordinal() - ordinals
+    
+    def _activity_columns(self, rows, today) -> Dict[str, np.ndarray]:
+        if not rows:
+            return {'age': np.empty(0, dtype=np.int64), 'type': np.empty(0, dtype=str),
+                    'duration': np.empty(0), 'calories': np.empty(0)}
+        
+        dates, types, durations, calories = zip(*rows)
+        return {
+            'age': self._day_ages(dates, today),
+            'type': np.array(types, dtype=str),
+            'duration': np.array(durations, dtype=float),  # None becomes NaN
+            'calories': np.array(calories, dtype=float)
+        }
+    
+    def _nutrition_columns(self, rows, today) -> Dict[str, np.ndarray]:
+        if not rows:
+            return {'age': np.empty(0, dtype=np.int64), 'calories': np.empty(0), 'protein': np.empty(0)}
         
-        total_workouts = len(activities)
-        total_duration = sum(a.duration_minutes or 0 for a in activities)
-        avg_duration = total_duration / total_workouts if total_workouts > 0 else 0
+        dates, calories, protein = zip(*rows)
+        return {
+            'age': self._day_ages(dates, today),
+            'calories': np.array(calories, dtype=float),
+            'protein': np.array(protein, dtype=float)
+        }
+    
+    @staticmethod
+    def _week_over_week(age: np.ndarray, values: np.ndarray = None) -> Dict[str, Any]:
+        """Compare the last 7 days against the 7 days before (counts, or sums of values)."""
+        this_week = age < 7
+        last_week = (age >= 7) & (age < 14)
+        
+        if values is None:
+            current, previous = int(this_week.sum()), int(last_week.sum())
+        else:
+            current, previous = round(float(np.nansum(values[this_week]))), round(float(np.nansum(values[last_week])))
+        
+        change_pct = round((current - previous) / previous * 100, 1) if previous else None
+        return {'this_week': current, 'last_week': previous, 'change': current - previous, 'change_pct': change_pct}
+    
+    def _analyze_activity_trends(self, activities, days: int = 30) -> Dict[str, Any]:
+        total_workouts = len(activities['age'])
+        if not total_workouts:
+            return {'message': 'Not enough data to analyze trends'}
         
-        activity_types = {}
-        for activity in activities:
-            activity_types[activity.activity_type] = activity_types.get(activity.activity_type, 0) + 1
+        avg_duration = np.nansum(activities['duration']) / total_workouts
         
-        most_common = max(activity_types.items(), key=lambda x: x[1])[0] if activity_types else 'none'
+        types, counts = np.unique(activities['type'], return_counts=True)
+        activity_types = {str(t): int(n) for t, n in zip(types, counts)}
+        most_common = str(types[np.argmax(counts)])
         
         return {
             'total_workouts': total_workouts,
-            'average_duration': round(avg_duration, 1),
+            'average_duration': round(float(avg_duration), 1),
             'most_common_type': most_common,
-            'workout_distribution': activity_types
+            'workout_distribution': activity_types,
+            'total_calories_burned': round(float(np.nansum(activities['calories']))),
+            'workouts_per_week': round(total_workouts / days * 7, 1),
+            'week_over_week': {
+                'workouts': self._week_over_week(activities['age']),
+                'minutes': self._week_over_week(activities['age'], activities['duration']),
+                'calories_burned': self._week_over_week(activities['age'], activities['calories'])
+            }
         }
     
-    def _analyze_nutrition_trends(self, nutrition_logs) -> Dict[str, Any]:
-        if not nutrition_logs:
+    def _analyze_nutrition_trends(self, nutrition) -> Dict[str, Any]:
+        total_meals = len(nutrition['age'])
+        if not total_meals:
             return {'message': 'Not enough data to analyze trends'}
         
-        total_calories = sum(n.calories for n in nutrition_logs)
-        avg_calories = total_calories / len(nutrition_logs) if nutrition_logs else 0
-        
-        total_protein = sum(n.protein or 0 for n in nutrition_logs)
-        avg_protein = total_protein / len(nutrition_logs) if nutrition_logs else 0
+        # Averages are per logged day, so unlogged days don't drag the average to zero
+        logged_days = len(np.unique(nutrition['age']))
         
         return {
-            'average_daily_calories': round(avg_calories, 1),
-            'average_daily_protein': round(avg_protein, 1),
-            'total_meals_logged': len(nutrition_logs)
+            'average_daily_calories': round(float(np.nansum(nutrition['calories'])) / logged_days, 1),
+            'average_daily_protein': round(float(np.nansum(nutrition['protein'])) / logged_days, 1),
+            'total_meals_logged': total_meals,
+            'days_logged': logged_days,
+            'week_over_week': {
+                'calories': self._week_over_week(nutrition['age'], nutrition['calories']),
+                'protein': self._week_over_week(nutrition['age'], nutrition['protein'])
+            }
         }
     
-    def _analyze_consistency(self, activities) -> Dict[str, Any]:
-        if not activities:
+    def _analyze_consistency(self, user, today, days: int = 30) -> Dict[str, Any]:
+        # Read from the activity-day bitmap kept up to date on every activity write
+        window = StreakTracker.consistency(user.id, today - timedelta(days=days - 1), today)
+        if not window['active_days']:
             return {'score': 0, 'message': 'Start logging activities to track consistency'}
         
-        dates = [a.date.date() for a in activities]
-        unique_dates = len(set(dates))
-        
-        thirty_days_ago = datetime.utcnow().date() - timedelta(days=30)
-        days_in_period = min(30, (datetime.utcnow().date() - thirty_days_ago).days)
-        
-        consistency_score = (unique_dates / days_in_period * 100) if days_in_period > 0 else 0
+        unique_dates = window['active_days']
+        consistency_score = window['score']
+        current_streak = StreakTracker.summary(user.id, today)['current_streak']
         
         if consistency_score >= 70:
             message = "Excellent consistency! You're building great habits"
@@ -429,30 +550,32 @@ class AIService:
         return {
             'score': round(consistency_score, 1),
             'active_days': unique_dates,
-            'total_days': days_in_period,
+            'total_days': days,
+            'current_streak': current_streak,
             'message': message
         }
     
-    def _generate_insights(self, user, activities, nutrition_logs) -> List[str]:
+    def _generate_insights(self, user, activities, nutrition, days: int = 30) -> List[str]:
         insights = []
+        workout_count = len(activities['age'])
+        meal_count = len(nutrition['age'])
+        # Frequency thresholds below are calibrated for a 30-day window
+        monthly_workouts = workout_count * 30 / days
         
-        if len(activities) > 0:
-            insights.append(f"You've completed {len(activities)} workouts in the past 30 days")
+        if workout_count > 0:
+            insights.append(f"You've completed {workout_count} workouts in the past {days} days")
         
-        if len(nutrition_logs) > 0:
-            insights.append(f"You've logged {len(nutrition_logs)} meals, showing commitment to tracking")
+        if meal_count > 0:
+            insights.append(f"You've logged {meal_count} meals, showing commitment to tracking")
         
-        if len(activities) >= 12:
+        if monthly_workouts >= 12:
             insights.append("Your workout frequency is excellent! Aim to maintain this momentum")
-        elif len(activities) >= 8:
+        elif monthly_workouts >= 8:
             insights.append("You're working out consistently. Try to add one more session per week")
-        elif len(activities) > 0:
+        elif workout_count > 0:
             insights.append("Build towards 3-4 workouts per week for optimal results")
         
         if not insights:
             insights.append("Start tracking your activities and nutrition to get personalized insights")
         
         return insights
-
-
-
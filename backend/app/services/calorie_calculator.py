@@ -2,6 +2,13 @@
 Calorie Calculator Service
 Calculates TDEE, BMR, and adjusted calorie goals based on user data and weight goals.
 """
+import hashlib
+import numpy as np
+
+# fingerprint -> full profile dict. Profiles depend only on the fingerprinted
+# inputs, so users with identical profiles share an entry.
+_profile_memo = {}
+_PROFILE_MEMO_MAX = 50000
 
 
 class CalorieCalculator:
@@ -22,6 +29,17 @@ class CalorieCalculator:
     # Calories per pound of body weight
     CALORIES_PER_POUND = 3500
     
+    # Gender codes for batch calculations, and the Mifflin-St Jeor constant for each
+    GENDER_CODES = {'male': 0, 'female': 1}
+    OTHER_GENDER_CODE = 2
+    GENDER_OFFSETS = np.array([5, -161, -78])
+    
+    MINIMUM_TARGET_CALORIES = 1200
+    
+    # The only user fields calculate_full_profile reads
+    PROFILE_FIELDS = ('weight_lbs', 'height_feet', 'height_inches', 'age', 'gender',
+                      'activity_level', 'weight_goal_rate')
+    
     @staticmethod
     def calculate_bmr(weight_lbs, height_feet, height_inches, age, gender):
         """
@@ -98,11 +116,117 @@ class CalorieCalculator:
         
         # Safety limits: don't go below 1200 (female) or 1500 (male) minimum
         # For simplicity, use 1200 as absolute minimum
-        if target_calories < 1200:
-            target_calories = 1200
+        if target_calories < CalorieCalculator.MINIMUM_TARGET_CALORIES:
+            target_calories = CalorieCalculator.MINIMUM_TARGET_CALORIES
         
         return round(target_calories)
     
+    @staticmethod
+    def gender_code(gender):
+        """Map a gender string to its batch code; None for missing."""
+        if not gender:
+            return None
+        return CalorieCalculator.GENDER_CODES.get(gender.lower(), CalorieCalculator.OTHER_GENDER_CODE)
+    
+    @staticmethod
+    def activity_multiplier(activity_level):
+        """Map an activity level string to its multiplier; None for missing."""
+        if not activity_level:
+            return None
+        return CalorieCalculator.ACTIVITY_MULTIPLIERS.get(activity_level, 1.2)
+    
+    @staticmethod
+    def calculate_batch(weight_lbs, height_inches, age, gender_code, activity_multiplier, weight_goal_rate):
+        """
+        Vectorized BMR, TDEE and target calories for many users at once.
+        
+        Produces the same numbers as calculate_bmr, calculate_tdee and
+        calculate_full_profile's target for each row. Missing inputs are NaN
+        (or None, which NumPy converts to NaN) and yield NaN outputs.
+        
+        Args:
+            weight_lbs: Weight in pounds
+            height_inches: Total height in inches (feet * 12 + inches)
+            age: Age in years
+            gender_code: 0 male, 1 female, 2 other (see gender_code())
+            activity_multiplier: TDEE multiplier (see activity_multiplier())
+            weight_goal_rate: Desired lbs per week; NaN or 0 means maintenance
+        
+        Returns:
+            Dictionary of float arrays: 'bmr', 'tdee', 'target_calories'
+        """
+        weight = np.asarray(weight_lbs, dtype=float)
+        height = np.asarray(height_inches, dtype=float)
+        age = np.asarray(age, dtype=float)
+        gender = np.asarray(gender_code, dtype=float)
+        multiplier = np.asarray(activity_multiplier, dtype=float)
+        rate = np.asarray(weight_goal_rate, dtype=float)
+        
+        # Same validity rules as calculate_bmr: zero weight/age or missing gender means no BMR
+        valid = (weight != 0) & (age != 0) & ~np.isnan(weight + age + height + gender)
+        offsets = CalorieCalculator.GENDER_OFFSETS[np.where(valid, gender, 0).astype(np.int64)]
+        
+        bmr = (10 * weight * 0.453592) + (6.25 * height * 2.54) - (5 * age) + offsets
+        bmr = np.where(valid, np.round(bmr), np.nan)
+        
+        tdee = np.round(bmr * multiplier)
+        
+        adjusted = np.maximum(tdee + rate * (CalorieCalculator.CALORIES_PER_POUND / 7),
+                              CalorieCalculator.MINIMUM_TARGET_CALORIES)
+        maintenance = np.isnan(rate) | (rate == 0)
+        target = np.where(maintenance, tdee, np.round(adjusted))
+        target = np.where(np.isnan(tdee), np.nan, target)
+        
+        return {'bmr': bmr, 'tdee': tdee, 'target_calories': target}
+    
+    @staticmethod
+    def profile_fingerprint(user):
+        """Short stable hash of the profile inputs."""
+        inputs = tuple(getattr(user, field) for field in CalorieCalculator.PROFILE_FIELDS)
+        return hashlib.sha1(repr(inputs).encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    def get_profile(user):
+        """
+        Full calorie profile for a user, computed at most once per distinct inputs.
+        
+        Uses the fingerprint stored by refresh_stored_profile, so a memo hit costs
+        one dict lookup. The returned dict is shared - treat it as read-only.
+        """
+        fingerprint = user.calorie_profile_fingerprint or CalorieCalculator.profile_fingerprint(user)
+        
+        profile = _profile_memo.get(fingerprint)
+        if profile is None:
+            profile = CalorieCalculator.calculate_full_profile(user)
+            if len(_profile_memo) >= _PROFILE_MEMO_MAX:
+                _profile_memo.clear()
+            _profile_memo[fingerprint] = profile
+        
+        return profile
+    
+    @staticmethod
+    def refresh_stored_profile(user):
+        """
+        Recompute the user's stored BMR/TDEE/target if a profile input changed.
+        
+        Call after profile fields are assigned and before commit.
+        
+        Returns:
+            True if the stored profile was recomputed
+        """
+        fingerprint = CalorieCalculator.profile_fingerprint(user)
+        if fingerprint == user.calorie_profile_fingerprint:
+            return False
+        
+        profile = CalorieCalculator.calculate_full_profile(user)
+        _profile_memo[fingerprint] = profile
+        
+        user.bmr = profile['bmr']
+        user.tdee = profile['tdee']
+        user.target_calories = profile['target_calories']
+        user.calorie_profile_fingerprint = fingerprint
+        return True
+    
     @staticmethod
     def calculate_full_profile(user):
         """
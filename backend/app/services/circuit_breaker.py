@@ -0,0 +1,144 @@
+"""
+Circuit Breaker
+Fails fast when a remote dependency is erroring or too slow, and probes it
+again after a cool-down period.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    closed    -> calls go through; outcomes are recorded in the window
+    open      -> calls are rejected until open_seconds have passed
+    half_open -> a limited number of probe calls go through; one success closes
+                 the breaker again, one failure re-opens it
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate_threshold=0.5, slow_call_seconds=10.0,
+                 slow_call_rate_threshold=0.8, window_size=20, min_calls=5,
+                 open_seconds=30.0, half_open_probes=1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._outcomes = deque(maxlen=window_size)  # (failed, slow)
+        self._latencies = deque(maxlen=100)          # successful call latencies
+
+        self._counters = {'calls': 0, 'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed; rejected calls should use a fallback."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['successes'] += 1
+            self._latencies.append(latency)
+            slow = latency >= self.slow_call_seconds
+
+            if self._current_state() == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._trip()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append((False, slow))
+            self._evaluate()
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['failures'] += 1
+
+            if self._current_state() == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._trip()
+                return
+
+            self._outcomes.append((True, latency >= self.slow_call_seconds))
+            self._evaluate()
+
+    def p95_latency(self) -> Optional[float]:
+        """95th percentile of recent successful call latencies, or None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_calls:
+                return None
+            ordered = sorted(self._latencies)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def metrics(self) -> Dict[str, Any]:
+        p95 = self.p95_latency()
+        with self._lock:
+            failure_rate, slow_rate = self._rates()
+            return {
+                'name': self.name,
+                'state': self._current_state(),
+                'failure_rate': round(failure_rate, 3),
+                'slow_call_rate': round(slow_rate, 3),
+                'window_calls': len(self._outcomes),
+                'p95_latency_seconds': round(p95, 3) if p95 is not None else None,
+                **self._counters
+            }
+
+    def _current_state(self) -> str:
+        # Caller holds the lock
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def _rates(self):
+        total = len(self._outcomes)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        return failures / total, slow / total
+
+    def _evaluate(self):
+        if len(self._outcomes) < self.min_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._counters['opened'] += 1
+        print(f"[CircuitBreaker:{self.name}] OPEN for {self.open_seconds}s")
@@ -0,0 +1,295 @@
+"""
+Coach Intent Engine
+Answers routine coach questions locally so they never reach the LLM.
+
+Every trigger phrase in the FAQ index is compiled once, at import time, into a
+single Aho-Corasick automaton. Classifying a message is then one linear pass
+over its text regardless of how many phrases the index holds.
+"""
+import re
+from collections import deque
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func
+from app import db
+from app.models import Activity, Nutrition
+from app.services import local_time
+from app.services.calorie_calculator import CalorieCalculator
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher.
+
+    Patterns are lowercased on build; search() expects already-lowercased text.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state].append(index)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def search(self, text: str):
+        """Yield (start, end, pattern_index) for every occurrence in text."""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield position - len(self.patterns[index]) + 1, position + 1, index
+
+
+# Curated FAQ index: each intent lists (trigger phrase, weight) pairs. Phrases match
+# whole words only, so list the inflections that should count.
+# Weights add up across distinct phrases; a total of 1.0 or more is a confident match.
+# Generic openers ('how many calories') stay below 1.0 so they need a second signal:
+# "how many calories are in a banana" is not a question about the user's target.
+INTENTS = {
+    'calorie_target': [
+        ('how many calories', 0.6), ('calorie target', 1.0), ('calorie goal', 1.0),
+        ('calories should i', 1.0), ('calories do i need', 1.0), ('tdee', 1.0), ('bmr', 1.0),
+        ('maintenance calories', 1.0), ('daily calories', 0.7), ('calories a day', 0.7), ('calories per day', 0.7),
+    ],
+    'protein': [
+        ('how much protein', 0.6), ('protein should i', 1.0), ('protein do i need', 1.0),
+        ('protein intake', 0.9), ('protein goal', 1.0), ('grams of protein', 0.9), ('protein', 0.5),
+    ],
+    'progress': [
+        ('how am i doing', 1.0), ('my progress', 1.0), ('how many workouts', 0.6),
+        ('workouts have i', 1.0), ('workouts did i', 1.0), ('this week', 0.3), ('my stats', 1.0),
+        ('on track', 0.6),
+    ],
+    'weight_goal': [
+        ('lose weight', 0.7), ('weight loss', 0.6), ('gain weight', 0.7), ('reach my goal', 0.8),
+        ('how long', 0.4), ('goal weight', 0.8), ('target weight', 0.8),
+    ],
+    'motivation': [
+        ('motivate', 0.9), ('motivated', 0.9), ('motivation', 0.9), ('encourage', 0.9),
+        ('encouragement', 0.9), ('give up', 0.7), ('want to give up', 1.0), ('giving up', 0.7),
+        ('unmotivated', 1.0), ('lazy', 0.6), ("don't feel like", 0.8),
+    ],
+    'recovery': [
+        ('rest day', 1.0), ('rest days', 1.0), ('recovery', 0.6), ('recover', 0.6), ('sore', 0.5),
+        ('sleep', 0.5), ('overtraining', 1.0), ('overtrained', 1.0),
+    ],
+    'hydration': [
+        ('water', 0.6), ('how much water', 0.6), ('water should i', 1.0), ('water a day', 0.6),
+        ('water per day', 0.6), ('hydrate', 0.9), ('hydrated', 0.9), ('hydration', 0.9),
+        ('how much to drink', 1.0),
+    ],
+    'workout': [
+        ('workout', 0.5), ('workouts', 0.5), ('exercise', 0.5), ('exercises', 0.5),
+        ('train', 0.4), ('training', 0.4), ('routine', 0.4),
+    ],
+    'nutrition': [
+        ('eat', 0.4), ('food', 0.4), ('diet', 0.5), ('nutrition', 0.5), ('meal', 0.4), ('meals', 0.4),
+    ],
+}
+
+# Injury and medical words: such messages always go to the remote model, whatever else they match
+ESCALATION_WORDS = {
+    'injury', 'injured', 'injuries', 'pain', 'painful', 'hurt', 'hurts', 'sprain', 'sprained',
+    'swollen', 'swelling', 'doctor', 'dizzy', 'chest', 'medication', 'medical', 'pregnant',
+}
+
+_PHRASES: List[Tuple[str, str, float]] = [
+    (phrase, intent, weight) for intent, entries in INTENTS.items() for phrase, weight in entries
+]
+_MATCHER = AhoCorasick([phrase for phrase, _, _ in _PHRASES])
+
+
+class CoachIntentEngine:
+    """
+    Classifies a chat message against the FAQ index and renders a personalized answer.
+    """
+
+    # Messages longer than this are usually nuanced enough to deserve the LLM
+    MAX_LOCAL_WORDS = 25
+
+    def classify(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the best matching intent for a message.
+
+        Returns:
+            Dict with 'intent' and 'confidence' (0-1), or None if nothing matched
+        """
+        text = message.lower()
+        if ESCALATION_WORDS.intersection(re.findall(r"[a-z']+", text)):
+            return None
+
+        hits = []
+        for start, end, index in _MATCHER.search(text):
+            # Whole words only, so 'eat' does not fire inside 'great' nor 'sore' inside 'soreness'
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            hits.append((start, end, index))
+
+        scores: Dict[str, float] = {}
+        seen = set()
+        for start, end, index in hits:
+            # A phrase inside a longer matched phrase ('protein' in 'how much protein') is not a second signal
+            if any(s <= start and end <= e and (s, e) != (start, end) for s, e, _ in hits):
+                continue
+            if index in seen:
+                continue
+            seen.add(index)
+            _, intent, weight = _PHRASES[index]
+            scores[intent] = scores.get(intent, 0) + weight
+
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        intent, score = ranked[0]
+        confidence = min(score, 1.0)
+
+        # Ambiguous between two intents, or a long free-form message
+        if len(ranked) > 1 and ranked[1][1] >= score * 0.8:
+            confidence *= 0.6
+        if len(text.split()) > self.MAX_LOCAL_WORDS:
+            confidence *= 0.5
+
+        return {'intent': intent, 'confidence': round(confidence, 2)}
+
+    def respond(self, user, intent: str) -> str:
+        """Render the answer for an intent using the user's profile and recent stats."""
+        name = user.first_name or user.username
+        handler = getattr(self, f'_answer_{intent}')
+        return handler(user, name)
+
+    def _recent_stats(self, user, days: int = 7) -> Dict[str, Any]:
+        # Same local-day window as the dashboard, so answers match what the user sees there
+        start_date = local_time.local_today(user.timezone) - timedelta(days=days)
+
+        workouts, minutes, burned = db.session.query(
+            func.count(Activity.id),
+            func.coalesce(func.sum(Activity.duration_minutes), 0),
+            func.coalesce(func.sum(Activity.calories_burned), 0)
+        ).filter(Activity.user_id == user.id, Activity.local_date >= start_date).one()
+
+        meals, consumed, protein = db.session.query(
+            func.count(Nutrition.id),
+            func.coalesce(func.sum(Nutrition.calories), 0),
+            func.coalesce(func.sum(Nutrition.protein), 0)
+        ).filter(Nutrition.user_id == user.id, Nutrition.local_date >= start_date).one()
+
+        return {
+            'days': days,
+            'workouts': workouts,
+            'minutes': int(minutes),
+            'burned': int(burned),
+            'meals': meals,
+            'avg_calories': round(consumed / days),
+            'avg_protein': round(protein / days)
+        }
+
+    def _answer_calorie_target(self, user, name) -> str:
+        profile = CalorieCalculator.get_profile(user)
+        if not profile['target_calories']:
+            return (f"I can work out your calorie target, {name}, once your profile has your weight, height, "
+                    "age, gender and activity level. Update them on the Profile page and check the dashboard.")
+
+        answer = (f"Based on your profile, your BMR is about {profile['bmr']} calories and your TDEE is about "
+                  f"{profile['tdee']} calories per day. ")
+        if profile['explanation']['target_description']:
+            answer += profile['explanation']['target_description'] + '.'
+        return answer
+
+    def _answer_protein(self, user, name) -> str:
+        if not user.weight_lbs:
+            return ("A good target is 0.7-1.0 g of protein per pound of body weight. Add your weight to your "
+                    "profile and I can give you an exact number.")
+
+        low, high = round(user.weight_lbs * 0.7), round(user.weight_lbs * 1.0)
+        stats = self._recent_stats(user)
+        answer = f"At {user.weight_lbs} lbs, aim for roughly {low}-{high} g of protein per day."
+        if stats['meals']:
+            answer += f" Over the last week you've averaged about {stats['avg_protein']} g/day."
+        return answer
+
+    def _answer_progress(self, user, name) -> str:
+        stats = self._recent_stats(user)
+        if not stats['workouts'] and not stats['meals']:
+            return (f"I don't see any logs from the past week yet, {name}. Log a workout or a meal and "
+                    "I'll start tracking your progress.")
+
+        answer = (f"In the last {stats['days']} days you've logged {stats['workouts']} workouts "
+                  f"({stats['minutes']} minutes, {stats['burned']} calories burned)")
+        if stats['meals']:
+            answer += f" and averaged {stats['avg_calories']} calories/day from {stats['meals']} meals"
+        answer += '.'
+
+        target = CalorieCalculator.get_profile(user)['target_calories']
+        if target and stats['meals']:
+            net = stats['avg_calories'] - round(stats['burned'] / stats['days'])
+            answer += f" Your average net intake is {net} vs. a target of {target}."
+        return answer
+
+    def _answer_weight_goal(self, user, name) -> str:
+        if not (user.weight_lbs and user.target_weight_lbs and user.weight_goal_rate):
+            return ("Set your current weight, target weight and weekly rate on the Profile page and I can "
+                    "estimate when you'll reach your goal. A safe pace is 0.5-1 lb per week.")
+
+        diff = abs(user.target_weight_lbs - user.weight_lbs)
+        weeks = round(diff / abs(user.weight_goal_rate), 1)
+        target = CalorieCalculator.get_profile(user)['target_calories']
+        answer = (f"You're {diff} lbs from your target of {user.target_weight_lbs} lbs. At "
+                  f"{abs(user.weight_goal_rate)} lb/week that's about {weeks} weeks.")
+        if target:
+            answer += f" Eating around {target} calories/day keeps you on that pace."
+        return answer
+
+    def _answer_motivation(self, user, name) -> str:
+        stats = self._recent_stats(user)
+        if stats['workouts']:
+            return (f"You've already done {stats['workouts']} workouts this week, {name} - that's real momentum. "
+                    "Keep pushing towards your goals. Every workout counts!")
+        return f"You're doing great, {name}! Keep pushing towards your goals. Every workout counts!"
+
+    def _answer_recovery(self, user, name) -> str:
+        return ("Plan at least 1-2 rest or active recovery days per week, get 7-9 hours of sleep, and keep "
+                "protein up to help your muscles repair. Light movement like walking or yoga helps with soreness.")
+
+    def _answer_hydration(self, user, name) -> str:
+        if user.weight_lbs:
+            ounces = round(user.weight_lbs / 2)
+            return (f"A good baseline is about half your body weight in ounces - roughly {ounces} oz of water "
+                    "per day - plus extra on workout days.")
+        return "Aim for around 8-10 glasses of water per day, plus extra on workout days. Stay hydrated!"
+
+    def _answer_workout(self, user, name) -> str:
+        return ("For a balanced workout, focus on compound movements like squats, deadlifts, and bench press. "
+                "Don't forget cardio!")
+
+    def _answer_nutrition(self, user, name) -> str:
+        return ("Remember to eat a balanced diet with plenty of protein, healthy fats, and complex carbohydrates. "
+                "Stay hydrated!")
@@ -0,0 +1,99 @@
+"""
+Downsampling Service
+Reduces long chart series to a fixed number of points while keeping their shape.
+
+Both methods return indices into the original series, so several parallel series
+(dates, consumed, burned, ...) can be reduced consistently from one driver series.
+"""
+from typing import Dict, Any, List
+import numpy as np
+
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(values, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the point in each bucket that forms the
+    largest triangle with the previously kept point and the next bucket's average.
+
+    The first and last points are always kept. Per-bucket area computations are
+    vectorized; only the walk over buckets is a Python loop (one step per output point).
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Bucket i covers [edges[i], edges[i + 1]) of the interior points 1..n-2
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(np.int64)
+    cumulative = np.concatenate([[0.0], np.cumsum(y)])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for bucket in range(points - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        next_low = high
+        next_high = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = (next_low + next_high - 1) / 2
+        avg_y = (cumulative[next_high] - cumulative[next_low]) / (next_high - next_low)
+
+        area = np.abs((x[previous] - avg_x) * (y[low:high] - y[previous]) -
+                      (x[previous] - x[low:high]) * (avg_y - y[previous]))
+        previous = low + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def minmax_indices(values, points: int) -> np.ndarray:
+    """
+    Min/max decimation: keep each bucket's minimum and maximum plus both
+    endpoints, so peaks and troughs are never dropped. Fully vectorized.
+
+    Needs room for the endpoints and one bucket's pair, so fewer than 4 points
+    are chosen by LTTB instead.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    if points < 4:
+        return lttb_indices(y, points)
+
+    # Equal-width buckets as rows of a NaN-padded matrix, so argmin/argmax run per row
+    buckets = max(1, (points - 2) // 2)
+    width = -(-n // buckets)
+    padded = np.full(buckets * width, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, width)
+    valid = ~np.all(np.isnan(rows), axis=1)
+    offsets = np.arange(buckets)[valid] * width
+
+    lows = offsets + np.nanargmin(rows[valid], axis=1)
+    highs = offsets + np.nanargmax(rows[valid], axis=1)
+
+    # Endpoints are always kept so the series spans the full range
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_series(series: Dict[str, List[Any]], points: int, driver: str,
+                      method: str = 'lttb') -> Dict[str, List[Any]]:
+    """
+    Downsample every list in a columnar series using indices chosen from `driver`.
+
+    Non-list entries (e.g. None for a missing target series) pass through untouched.
+    """
+    values = series[driver]
+    indices = lttb_indices(values, points) if method == 'lttb' else minmax_indices(values, points)
+    if len(indices) == len(values):
+        return series
+
+    index_list = indices.tolist()
+    return {
+        key: [column[i] for i in index_list] if isinstance(column, list) else column
+        for key, column in series.items()
+    }
@@ -0,0 +1,167 @@
+"""
+Frequent Foods Service
+Maintains each user's quick-log index of the foods they log most, weighted toward recent use.
+
+Every use of a food adds 2^(t / HALF_LIFE_DAYS) to its score, where t is the
+time of the write in days since a fixed epoch. Decaying every score at the same
+rate never changes their order, so no periodic decay pass is needed: the stored
+log2 score is indexed per user, and the top-K read is one index range scan.
+The decayed count is recovered at read time as 2^(log_score - now / half-life).
+
+Scores live in log2 space so they never overflow however long a user keeps logging.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from app import db
+from app.models import FrequentFood, Nutrition
+
+
+HALF_LIFE_DAYS = 14
+EPOCH = datetime(2020, 1, 1)
+
+
+def _exponent(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds() / 86400 / HALF_LIFE_DAYS
+
+
+def _log2_add(a: float, b: float) -> float:
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _log2_subtract(a: float, b: float) -> Optional[float]:
+    """log2(2^a - 2^b), or None when nothing meaningful is left."""
+    if b >= a:
+        return None
+    remainder = 1 - 2 ** (b - a)
+    return a + math.log2(remainder) if remainder > 1e-12 else None
+
+
+class FrequentFoods:
+    """
+    Write hooks and reads for the per-user FrequentFood index.
+    """
+
+    @staticmethod
+    def food_key(name) -> str:
+        return ' '.join((name or '').lower().split())[:200]
+
+    @staticmethod
+    def decayed_count(log_score: float, now: Optional[datetime] = None) -> float:
+        return 2 ** (log_score - _exponent(now or datetime.utcnow()))
+
+    @staticmethod
+    def _load(user_id, key):
+        return FrequentFood.query.filter_by(user_id=user_id, food_key=key).with_for_update().first()
+
+    @staticmethod
+    def _copy_entry(food, entry):
+        food.food_name = entry.food_name
+        food.meal_type = entry.meal_type
+        food.calories = entry.calories
+        food.protein = entry.protein
+        food.carbohydrates = entry.carbohydrates
+        food.fats = entry.fats
+        food.fiber = entry.fiber
+        food.serving_size = entry.serving_size
+        food.quantity = entry.quantity
+
+    @staticmethod
+    def on_create(entry):
+        """Count a new nutrition entry. Call before commit."""
+        key = FrequentFoods.food_key(entry.food_name)
+        if not key:
+            return
+
+        # The same timestamp is subtracted again if the entry is deleted
+        if entry.created_at is None:
+            entry.created_at = datetime.utcnow()
+        exponent = _exponent(entry.created_at)
+
+        food = FrequentFoods._load(entry.user_id, key)
+        if food is None:
+            food = FrequentFood(user_id=entry.user_id, food_key=key, log_score=exponent, times_logged=0)
+            db.session.add(food)
+        else:
+            food.log_score = _log2_add(food.log_score, exponent)
+
+        FrequentFoods._copy_entry(food, entry)
+        food.times_logged += 1
+        food.last_logged_at = max(food.last_logged_at or entry.created_at, entry.created_at)
+
+    @staticmethod
+    def on_delete(entry, food_name=None):
+        """Withdraw an entry's use; food_name overrides the entry's current name. Call before commit."""
+        key = FrequentFoods.food_key(food_name if food_name is not None else entry.food_name)
+        food = FrequentFoods._load(entry.user_id, key) if key else None
+        if food is None or entry.created_at is None:
+            return
+
+        food.log_score = _log2_subtract(food.log_score, _exponent(entry.created_at))
+        food.times_logged -= 1
+        if food.log_score is None or food.times_logged <= 0:
+            db.session.delete(food)
+
+    @staticmethod
+    def on_update(entry, previous_name):
+        """Re-file an edited entry. Call after the edit is applied, before commit."""
+        if FrequentFoods.food_key(previous_name) != FrequentFoods.food_key(entry.food_name):
+            FrequentFoods.on_delete(entry, food_name=previous_name)
+            FrequentFoods.on_create(entry)
+            return
+
+        food = FrequentFoods._load(entry.user_id, FrequentFoods.food_key(entry.food_name))
+        if food is not None:
+            FrequentFoods._copy_entry(food, entry)
+
+    @staticmethod
+    def top(user_id, limit: int = 20, prefix: Optional[str] = None) -> List[FrequentFood]:
+        query = FrequentFood.query.filter_by(user_id=user_id)
+        if prefix:
+            escaped = FrequentFoods.food_key(prefix).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(FrequentFood.food_key.like(f'{escaped}%', escape='\\'))
+        return query.order_by(FrequentFood.log_score.desc()).limit(limit).all()
+
+    @staticmethod
+    def serialize(food, now: Optional[datetime] = None) -> Dict[str, Any]:
+        return {
+            'food_name': food.food_name,
+            'meal_type': food.meal_type,
+            'calories': food.calories,
+            'protein': food.protein,
+            'carbohydrates': food.carbohydrates,
+            'fats': food.fats,
+            'fiber': food.fiber,
+            'serving_size': food.serving_size,
+            'quantity': food.quantity,
+            'score': round(FrequentFoods.decayed_count(food.log_score, now), 2),
+            'times_logged': food.times_logged,
+            'last_logged_at': food.last_logged_at.isoformat() if food.last_logged_at else None
+        }
+
+    @staticmethod
+    def rebuild(user_id):
+        """Recompute a user's whole index from their nutrition entries."""
+        FrequentFood.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+        groups = defaultdict(list)
+        for entry in Nutrition.query.filter_by(user_id=user_id).order_by(Nutrition.created_at, Nutrition.id):
+            key = FrequentFoods.food_key(entry.food_name)
+            if key and entry.created_at is not None:
+                groups[key].append(entry)
+
+        for key, entries in groups.items():
+            exponents = [_exponent(entry.created_at) for entry in entries]
+            peak = max(exponents)
+            food = FrequentFood(
+                user_id=user_id,
+                food_key=key,
+                log_score=peak + math.log2(sum(2 ** (value - peak) for value in exponents)),
+                times_logged=len(entries),
+                last_logged_at=entries[-1].created_at
+            )
+            FrequentFoods._copy_entry(food, entries[-1])
+            db.session.add(food)
+        return len(groups)
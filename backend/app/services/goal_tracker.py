@@ -0,0 +1,284 @@
+"""
+Goal Tracker Service
+Keeps metric-linked goals up to date as activities and meals are written.
+
+Goals whose goal_type is in METRICS are tracked automatically. A write hook
+adds the entry's contribution to the user's matching active goals with an
+atomic `current_value = current_value + delta` UPDATE, so concurrent writes
+never lose an increment and no history is rescanned. Per-day and per-week
+goals restart from zero when an entry lands in a new period.
+
+Every change is also appended to goal_progress_events and folded into the
+goal's running regression sums (see Goal.forecast).
+
+Cumulative goals the tracker completed stay tracked: deleting or shortening an
+entry still withdraws its contribution, and the goal reopens if that takes it
+back below target. Goals the user completed by hand are left alone.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import case, exists, func, insert, or_, select, true, update
+from app import db
+from app.models import Activity, Goal, GoalProgressEvent, Nutrition, User
+from app.services import local_time
+from app.services.sync import SyncLog
+
+
+# goal_type -> (source model, period or None for cumulative since start_date, entry column)
+METRICS = {
+    'workouts_per_week': (Activity, 'week', None),
+    'total_distance': (Activity, None, 'distance'),
+    'calories_burned': (Activity, None, 'calories_burned'),
+    'protein_per_day': (Nutrition, 'day', 'protein'),
+}
+
+# Entry attributes the hooks read, per source model
+ENTRY_FIELDS = {
+    Activity: ('user_id', 'date', 'local_date', 'distance', 'calories_burned'),
+    Nutrition: ('user_id', 'date', 'local_date', 'protein'),
+}
+
+# Goals the write hooks and recomputation keep current
+TRACKED = or_(Goal.status == 'active', Goal.auto_completed == true())
+
+
+class GoalTracker:
+    """
+    Write hooks and bulk recomputation for automatically tracked goals.
+    """
+    
+    @staticmethod
+    def period_start(day, period):
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        return day
+    
+    @staticmethod
+    def snapshot(entry):
+        """Copy of an entry's tracked fields, taken before an update changes them."""
+        return SimpleNamespace(**{field: getattr(entry, field) for field in ENTRY_FIELDS[type(entry)]})
+    
+    @staticmethod
+    def record(entry, sign=1, source=None, settle=True):
+        """
+        Apply an entry's contribution (sign=1) or withdraw it (sign=-1).
+        
+        Call before commit, in the same transaction as the entry write.
+        `source` is required when entry is a snapshot rather than a model instance.
+        With settle=False, goals are not completed or reopened (see replace).
+        """
+        source = source or type(entry)
+        goal_types = [goal_type for goal_type, (model, _, _) in METRICS.items() if model is source]
+        
+        # Index-only probe on (user_id, status, goal_type); most writes stop here
+        present = [goal_type for (goal_type,) in db.session.query(Goal.goal_type).filter(
+            Goal.user_id == entry.user_id,
+            TRACKED,
+            Goal.goal_type.in_(goal_types)
+        ).distinct()]
+        
+        cumulative = False
+        source_name = source.__name__.lower()
+        for goal_type in present:
+            _, period, column = METRICS[goal_type]
+            amount = 1 if column is None else getattr(entry, column)
+            if not amount:
+                continue
+            
+            goals = (Goal.user_id == entry.user_id, TRACKED, Goal.goal_type == goal_type)
+            delta = sign * amount
+            
+            if period is None:
+                GoalTracker._apply(
+                    (*goals, Goal.start_date <= entry.date),
+                    {Goal.current_value: func.coalesce(Goal.current_value, 0) + delta},
+                    source_name, delta
+                )
+                cumulative = True
+            elif entry.local_date is not None:
+                entry_period = GoalTracker.period_start(entry.local_date, period)
+                if sign > 0:
+                    # Entries in an older period than the goal's current one no longer count
+                    GoalTracker._apply(
+                        (*goals, or_(Goal.period_start.is_(None), Goal.period_start <= entry_period)),
+                        {
+                            Goal.current_value: case(
+                                (Goal.period_start == entry_period, func.coalesce(Goal.current_value, 0) + delta),
+                                else_=delta
+                            ),
+                            Goal.period_start: entry_period
+                        },
+                        source_name, delta
+                    )
+                else:
+                    GoalTracker._apply(
+                        (*goals, Goal.period_start == entry_period),
+                        {Goal.current_value: Goal.current_value + delta},
+                        source_name, delta
+                    )
+        
+        # Periodic goals are recurring targets; only cumulative goals complete
+        if cumulative and settle:
+            GoalTracker._settle(Goal.user_id == entry.user_id)
+    
+    @staticmethod
+    def replace(previous, entry, source=None):
+        """
+        Swap an edited entry's old contribution (a snapshot) for its new one.
+        
+        Goals are settled once both deltas are applied, so an edit that leaves a
+        completed goal at or above target doesn't reopen and recomplete it.
+        """
+        source = source or type(entry)
+        GoalTracker.record(previous, sign=-1, source=source, settle=False)
+        GoalTracker.record(entry, source=source, settle=False)
+        GoalTracker._settle(Goal.user_id == entry.user_id)
+    
+    @staticmethod
+    def initialize(goal, tz_name):
+        """Set a tracked goal's current_value from existing entries (new or retargeted goals)."""
+        model, period, column = METRICS[goal.goal_type]
+        amount = func.count(model.id) if column is None else func.coalesce(func.sum(getattr(model, column)), 0)
+        query = db.session.query(amount).filter(model.user_id == goal.user_id)
+        
+        if period is None:
+            goal.current_value = query.filter(model.date >= goal.start_date).scalar()
+            goal.period_start = None
+        else:
+            goal.period_start = GoalTracker.period_start(local_time.local_today(tz_name), period)
+            goal.current_value = query.filter(model.local_date >= goal.period_start).scalar()
+    
+    @staticmethod
+    def to_dict(goal, today):
+        """
+        goal.to_dict() as of the user's local `today`, for read endpoints.
+        
+        A per-day/per-week goal whose stored period has ended reads as zero for
+        the current one. The row itself moves on with the next entry written in
+        the new period, so reads never write.
+        """
+        data = goal.to_dict()
+        period = METRICS[goal.goal_type][1] if goal.goal_type in METRICS else None
+        if period is None or goal.status != 'active' or goal.period_start is None:
+            return data
+        
+        current = GoalTracker.period_start(today, period)
+        if goal.period_start < current:
+            data.update(current_value=0, period_start=current, progress_percentage=0)
+        return data
+    
+    @staticmethod
+    def recompute_all():
+        """
+        Recompute every active tracked goal from the entry tables.
+        
+        One correlated UPDATE per goal type (and per timezone for periodic
+        goals), so the work stays in the database.
+        
+        Returns:
+            Number of goals updated
+        """
+        total = 0
+        zones = [tz for (tz,) in db.session.query(User.timezone).distinct()]
+        
+        for goal_type, (model, period, column) in METRICS.items():
+            amount = func.count(model.id) if column is None else func.coalesce(func.sum(getattr(model, column)), 0)
+            tracked = TRACKED & (Goal.goal_type == goal_type)
+            
+            if period is None:
+                value = select(amount).where(
+                    model.user_id == Goal.user_id, model.date >= Goal.start_date
+                ).scalar_subquery()
+                total += GoalTracker._apply((tracked,), {Goal.current_value: value}, 'recompute')
+                continue
+            
+            # The current period depends on each user's local day
+            for tz_name in zones:
+                current = GoalTracker.period_start(local_time.local_today(tz_name), period)
+                in_zone = exists().where(
+                    User.id == Goal.user_id,
+                    User.timezone.is_(None) if tz_name is None else User.timezone == tz_name
+                )
+                value = select(amount).where(
+                    model.user_id == Goal.user_id, model.local_date >= current
+                ).scalar_subquery()
+                total += GoalTracker._apply(
+                    (tracked, in_zone), {Goal.current_value: value, Goal.period_start: current}, 'recompute'
+                )
+        
+        GoalTracker._settle()
+        return total
+    
+    @staticmethod
+    def log_change(goal, source, delta=None):
+        """Record a change made through a loaded Goal (create, manual update). Call before commit."""
+        if goal.id is None:
+            db.session.flush()
+        moment = datetime.utcnow()
+        db.session.add(GoalProgressEvent(
+            goal_id=goal.id, value=goal.current_value or 0, delta=delta, source=source, recorded_at=moment
+        ))
+        goal.add_progress_point(moment)
+    
+    @staticmethod
+    def _apply(criteria, values, source, delta=None):
+        """
+        UPDATE the goals matching criteria, appending a progress event and a
+        regression point for each row changed.
+        
+        Returns:
+            Number of goals updated
+        """
+        moment = datetime.utcnow()
+        values = {
+            **values,
+            **Goal.progress_point_values(values[Goal.current_value], Goal.forecast_time(moment)),
+            Goal.updated_at: moment
+        }
+        
+        rows = db.session.execute(
+            update(Goal).where(*criteria).values(values).returning(Goal.id, Goal.user_id, Goal.current_value),
+            execution_options={'synchronize_session': False}
+        ).all()
+        
+        if rows:
+            db.session.execute(insert(GoalProgressEvent), [
+                {'goal_id': goal_id, 'value': value, 'delta': delta, 'source': source, 'recorded_at': moment}
+                for goal_id, _, value in rows
+            ])
+            SyncLog.record((user_id, 'goal', goal_id, 'upsert') for goal_id, user_id, _ in rows)
+        return len(rows)
+    
+    @staticmethod
+    def _settle(*criteria):
+        GoalTracker._reopen_unreached(*criteria)
+        GoalTracker._complete_reached(*criteria)
+    
+    @staticmethod
+    def _reopen_unreached(*criteria):
+        rows = db.session.execute(
+            update(Goal).where(
+                *criteria,
+                Goal.status == 'completed',
+                Goal.auto_completed == true(),
+                Goal.current_value < Goal.target_value
+            ).values({Goal.status: 'active', Goal.completed_at: None, Goal.auto_completed: False})
+            .returning(Goal.id, Goal.user_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        SyncLog.record((user_id, 'goal', goal_id, 'upsert') for goal_id, user_id in rows)
+    
+    @staticmethod
+    def _complete_reached(*criteria):
+        tracked = [goal_type for goal_type, (_, period, _) in METRICS.items() if period is None]
+        rows = db.session.execute(
+            update(Goal).where(
+                *criteria,
+                Goal.status == 'active',
+                Goal.goal_type.in_(tracked),
+                Goal.current_value >= Goal.target_value
+            ).values({Goal.status: 'completed', Goal.completed_at: datetime.utcnow(), Goal.auto_completed: True})
+            .returning(Goal.id, Goal.user_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        SyncLog.record((user_id, 'goal', goal_id, 'upsert') for goal_id, user_id in rows)
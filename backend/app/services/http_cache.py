@@ -0,0 +1,142 @@
+"""
+HTTP Cache
+Conditional GETs for per-user resources, and shared-cache headers for public ones.
+
+Each cacheable resource has a write counter on the user row (RESOURCES), bumped
+in the same transaction as any write that can change it:
+
+- activities, nutrition entries and goals through SyncLog.record, which every
+  write to them already goes through
+- the derived rows in DERIVED_MODELS by an after_flush listener
+- 'profile' by the same listener when the user row itself is edited, and by
+  `flask recompute-calorie-targets`
+- 'data', the catch-all version cached AI results are keyed on, by User.bump_data_version
+
+These counter UPDATEs pin users.updated_at, so bookkeeping never reads as a
+profile edit.
+
+A response's strong ETag is a hash of the request path and query string, the
+counters it depends on, the user's timezone and, for views that read "today",
+the user's local date.
+Checking If-None-Match costs one primary-key read, and a match returns 304
+before the view runs, with no queries, no to_dict and no JSON encoding.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import ActivityCalendar, FrequentFood, PersonalRecord, SavedMeal, TdeeEstimate, User, WeightLog
+from app.services import local_time
+
+
+# resource -> the user column that versions it
+RESOURCES = {
+    'activities': User.activities_version,
+    'nutrition': User.nutrition_version,
+    'goals': User.goals_version,
+    'weight': User.weight_version,
+    'profile': User.profile_version,
+    # Every activity, nutrition, goal, weight and profile write; for views reading all of them
+    'data': User.data_version,
+}
+
+# Rows outside the sync log whose writes change a resource
+DERIVED_MODELS = {
+    PersonalRecord: 'activities',
+    ActivityCalendar: 'activities',
+    SavedMeal: 'nutrition',
+    FrequentFood: 'nutrition',
+    WeightLog: 'weight',
+    TdeeEstimate: 'weight',
+}
+
+# Bump when response shapes change, so clients drop validators from older builds
+FORMAT_VERSION = 1
+
+
+def _after_flush(session, flush_context):
+    bumps = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        resource = DERIVED_MODELS.get(type(obj))
+        if resource and (obj not in session.dirty or session.is_modified(obj)):
+            bumps.setdefault(int(obj.user_id), set()).add(resource)
+        elif isinstance(obj, User) and obj in session.dirty and session.is_modified(obj):
+            bumps.setdefault(int(obj.id), set()).add('profile')
+
+    users = User.__table__
+    connection = session.connection()
+    for user_id, resources in bumps.items():
+        columns = [RESOURCES[resource].key for resource in resources]
+        connection.execute(
+            update(users).where(users.c.id == user_id)
+            .values({**{column: users.c[column] + 1 for column in columns}, 'updated_at': users.c.updated_at})
+        )
+
+
+def install():
+    """Start bumping resource versions on ORM writes. Called once from create_app."""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def conditional_get(*resources, daily=False):
+    """
+    Give a JWT-protected GET view a strong ETag built from the user's resource versions.
+
+    Pass daily=True for views that read the user's local "today". Only 200
+    responses carry the ETag; a matching If-None-Match returns 304 without
+    calling the view.
+    """
+    columns = [RESOURCES[resource] for resource in resources]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            row = db.session.execute(select(User.timezone, *columns).where(User.id == user_id)).first()
+            if row is None:
+                return view(*args, **kwargs)
+
+            timezone, *versions = row
+            # full_path covers view args and the query string, so each URL validates separately
+            parts = [f'v{FORMAT_VERSION}', request.full_path, str(user_id), timezone or '']
+            parts += [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in versions]
+            if daily:
+                parts.append(local_time.local_today(timezone).isoformat())
+            etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Browsers may keep the copy but must revalidate; shared caches must not store it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def public_cache(view):
+    """
+    Cache a public, user-independent GET in shared caches for PUBLIC_CACHE_MAX_AGE seconds.
+
+    Browsers revalidate every time against an ETag of the body, so a client that
+    refetches right after its own write sees it, and an unchanged list is a 304.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            max_age = current_app.config['PUBLIC_CACHE_MAX_AGE']
+            response.headers['Cache-Control'] = f'public, no-cache, s-maxage={max_age}'
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return wrapper
@@ -0,0 +1,404 @@
+"""
+Wearable Ingest Service
+Buffers high-volume device events and materializes them in bulk.
+
+The ingest endpoint only validates a batch and appends it to the ingest_events
+log in one multi-row insert, so devices are acknowledged quickly no matter how
+much derived data an event touches. A consumer (`flask consume-ingest`) reads the
+log in id order behind a stored cursor and, per transaction of thousands of
+events:
+
+- workouts become Activity rows, with the usual goal, streak and record hooks
+- step counts and heart-rate summaries are coalesced per user and local day
+  into DailyWearableSummary rollups, one upsert per day instead of per event
+
+An event the consumer cannot materialize is logged and skipped, so one bad row
+never holds the cursor back for everyone else.
+
+Buffer depth (events appended but not yet consumed) drives backpressure: past a
+soft limit responses ask devices to slow down, past a hard limit new batches
+are refused with 503 and Retry-After.
+"""
+import json
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple, Optional
+from flask import current_app
+from sqlalchemy import func, insert, select
+from app import db
+from app.models import Activity, DailyWearableSummary, IngestCursor, IngestEvent, User
+from app.services import local_time
+from app.services.goal_tracker import GoalTracker
+from app.services.met_estimator import MetEstimator
+from app.services.personal_records import PersonalRecords
+from app.services.streaks import StreakTracker
+
+
+EVENT_TYPES = ('workout', 'steps', 'heart_rate')
+
+# Optional payload fields kept for each event type, with their converters
+PAYLOAD_FIELDS = {
+    'workout': {
+        'activity_type': str, 'title': str, 'description': str, 'duration_minutes': int,
+        'distance': float, 'calories_burned': int, 'intensity': str,
+    },
+    'steps': {'count': int},
+    'heart_rate': {'average': float, 'resting': int, 'samples': int},
+}
+
+# Workout text fields are cut to their Activity column lengths when appended
+TEXT_LIMITS = {
+    'activity_type': Activity.activity_type.type.length,
+    'title': Activity.title.type.length,
+    'intensity': Activity.intensity.type.length,
+}
+
+# Upper bounds for numeric payload fields; anything above is a device or parsing error
+MAX_VALUES = {
+    'duration_minutes': 24 * 60, 'distance': 1000, 'calories_burned': 20000,
+    'count': 200000, 'average': 250, 'resting': 250, 'samples': 24 * 60 * 60,
+}
+
+REQUIRED_FIELDS = {
+    'workout': ('duration_minutes',),
+    'steps': ('count',),
+    'heart_rate': ('average',),
+}
+
+
+class IngestBuffer:
+    """
+    Append side of the ingest log.
+    """
+
+    @staticmethod
+    def depth(cursor_name: str = 'default') -> int:
+        """Events appended but not yet consumed: two primary-key lookups."""
+        newest = db.session.query(func.max(IngestEvent.id)).scalar() or 0
+        consumed = db.session.query(IngestCursor.last_event_id).filter_by(name=cursor_name).scalar() or 0
+        return max(0, newest - consumed)
+
+    @staticmethod
+    def pressure(depth: int, config) -> str:
+        """'ok', 'slow' past the soft limit, or 'full' past the hard limit."""
+        if depth >= config['INGEST_HARD_LIMIT']:
+            return 'full'
+        if depth >= config['INGEST_SOFT_LIMIT']:
+            return 'slow'
+        return 'ok'
+
+    @staticmethod
+    def normalize(event: Dict[str, Any], tz_name) -> Dict[str, Any]:
+        """
+        Validate one client event into an ingest_events row.
+
+        Raises ValueError (or TypeError) describing the first problem found.
+        """
+        if not isinstance(event, dict):
+            raise ValueError('Event must be an object')
+
+        event_type = event.get('type')
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"type must be one of: {', '.join(EVENT_TYPES)}")
+        if not event.get('time'):
+            raise ValueError('time is required')
+
+        event_time, local_date = local_time.parse_entry_date(event['time'], tz_name)
+
+        payload = {}
+        for field, convert in PAYLOAD_FIELDS[event_type].items():
+            value = event.get(field)
+            if value is not None and value != '':
+                payload[field] = convert(value)
+                if field in TEXT_LIMITS:
+                    payload[field] = payload[field][:TEXT_LIMITS[field]]
+        IngestBuffer.check_payload(event_type, payload)
+
+        external_id = event.get('id')
+        return {
+            'event_type': event_type,
+            'external_id': str(external_id)[:100] if external_id else None,
+            'payload': json.dumps(payload, separators=(',', ':')),
+            'event_time': event_time,
+            'local_date': local_date,
+        }
+
+    @staticmethod
+    def check_payload(event_type, payload: Dict[str, Any]) -> None:
+        """Raise ValueError unless required fields are present and numbers are finite and in range."""
+        for field in REQUIRED_FIELDS[event_type]:
+            if field not in payload:
+                raise ValueError(f'{field} is required for {event_type} events')
+        for field, value in payload.items():
+            if not isinstance(value, (int, float)):
+                continue
+            if not math.isfinite(value):
+                raise ValueError(f'{field} must be a finite number')
+            if value < 0:
+                raise ValueError('Numeric fields must not be negative')
+            if value > MAX_VALUES[field]:
+                raise ValueError(f'{field} must be at most {MAX_VALUES[field]}')
+
+    @staticmethod
+    def append(user_id, device_id, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate and append a batch in one insert. Caller commits.
+
+        Events whose id was already seen for this user (in this batch or still in the
+        log) are dropped, so devices can safely resend a batch they got no answer for.
+        """
+        tz_name = local_time.timezone_for(user_id)
+        received_at = datetime.utcnow()
+        rows, rejected, seen = [], [], set()
+        duplicates = 0
+
+        for index, event in enumerate(events):
+            try:
+                row = IngestBuffer.normalize(event, tz_name)
+            except (ValueError, TypeError) as e:
+                rejected.append({'index': index, 'error': str(e)})
+                continue
+
+            if row['external_id']:
+                if row['external_id'] in seen:
+                    duplicates += 1
+                    continue
+                seen.add(row['external_id'])
+            rows.append({**row, 'user_id': user_id, 'device_id': device_id, 'received_at': received_at})
+
+        if seen:
+            logged = set()
+            keys = list(seen)
+            for start in range(0, len(keys), 500):
+                logged.update(external_id for (external_id,) in db.session.query(IngestEvent.external_id).filter(
+                    IngestEvent.user_id == user_id,
+                    IngestEvent.external_id.in_(keys[start:start + 500])
+                ))
+            if logged:
+                duplicates += sum(1 for row in rows if row['external_id'] in logged)
+                rows = [row for row in rows if row['external_id'] not in logged]
+
+        if rows:
+            db.session.execute(insert(IngestEvent), rows)
+
+        return {'accepted': len(rows), 'duplicates': duplicates, 'rejected': rejected}
+
+
+class IngestConsumer:
+    """
+    Materializes the ingest log into activities and daily rollups.
+    """
+
+    # Ids are assigned at insert but become visible at commit, so a batch that commits
+    # late could sit behind ids the cursor already passed. Events younger than this
+    # are left for the next drain, by which time every earlier insert has committed.
+    SETTLE_SECONDS = 2
+
+    @staticmethod
+    def _cursor(name):
+        cursor = db.session.query(IngestCursor).filter_by(name=name).with_for_update().first()
+        if cursor is None:
+            cursor = IngestCursor(name=name, last_event_id=0)
+            db.session.add(cursor)
+        return cursor
+
+    @staticmethod
+    def drain(batch_size: int = 5000, cursor_name: str = 'default',
+              settle_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Consume up to batch_size events past the cursor in one transaction and commit.
+
+        The cursor row is locked for the duration, so concurrent consumers take turns
+        rather than materializing the same events twice.
+        """
+        if settle_seconds is None:
+            settle_seconds = IngestConsumer.SETTLE_SECONDS
+        settled_before = datetime.utcnow() - timedelta(seconds=settle_seconds)
+
+        cursor = IngestConsumer._cursor(cursor_name)
+        events = db.session.execute(
+            select(IngestEvent.id, IngestEvent.user_id, IngestEvent.event_type, IngestEvent.external_id,
+                   IngestEvent.payload, IngestEvent.event_time, IngestEvent.local_date, IngestEvent.received_at)
+            .where(IngestEvent.id > cursor.last_event_id)
+            .order_by(IngestEvent.id)
+            .limit(batch_size)
+        ).all()
+        # The cursor only moves forward, so stop at the first unsettled id rather than
+        # skipping it: everything after it waits for the next drain
+        for index, event in enumerate(events):
+            if event.received_at > settled_before:
+                events = events[:index]
+                break
+
+        if not events:
+            db.session.commit()
+            return {'events': 0, 'activities': 0, 'duplicates': 0, 'skipped': 0, 'days': 0, 'users': 0}
+
+        workouts = {}
+        steps = defaultdict(int)
+        heart_rate = {}
+        skipped = 0
+        for event in events:
+            # Events logged before a validation rule existed are skipped rather than
+            # left to fail the batch, which would block the cursor for every user
+            try:
+                payload = json.loads(event.payload)
+                IngestBuffer.check_payload(event.event_type, payload)
+            except (ValueError, TypeError, KeyError) as e:
+                current_app.logger.warning('[ingest] skipping event %s: %s', event.id, e)
+                skipped += 1
+                continue
+            key = (event.user_id, event.local_date)
+
+            if event.event_type == 'workout':
+                # Later copies of the same device workout replace earlier ones in the batch
+                workouts[(event.user_id, event.external_id or f'ingest-{event.id}')] = (event, payload)
+            elif event.event_type == 'steps':
+                steps[key] += payload['count']
+            elif event.event_type == 'heart_rate':
+                samples = payload.get('samples') or 1
+                weighted, total, resting = heart_rate.get(key, (0.0, 0, None))
+                heart_rate[key] = (
+                    weighted + payload['average'] * samples,
+                    total + samples,
+                    payload.get('resting', resting)
+                )
+
+        activities, unmaterialized = IngestConsumer._materialize_workouts(workouts)
+        skipped += unmaterialized
+        days = IngestConsumer._roll_up(steps, heart_rate)
+
+        users = {activity.user_id for activity in activities} | {user_id for user_id, _ in days}
+        for user_id in users:
+            User.bump_data_version(user_id)
+
+        cursor.last_event_id = events[-1].id
+        db.session.commit()
+
+        return {
+            'events': len(events),
+            'activities': len(activities),
+            'duplicates': len(workouts) - len(activities) - unmaterialized,
+            'skipped': skipped,
+            'days': len(days),
+            'users': len(users),
+            'last_event_id': cursor.last_event_id
+        }
+
+    @staticmethod
+    def _materialize_workouts(workouts) -> Tuple[List[Activity], int]:
+        """
+        Insert Activity rows for workouts not already materialized and run their hooks.
+
+        Returns the new activities and how many workouts could not be built and were skipped.
+        """
+        if not workouts:
+            return [], 0
+
+        existing = set()
+        by_user = defaultdict(list)
+        for user_id, external_id in workouts:
+            by_user[user_id].append(external_id)
+        for user_id, external_ids in by_user.items():
+            for start in range(0, len(external_ids), 500):
+                existing.update((user_id, external_id) for (external_id,) in db.session.query(Activity.external_id).filter(
+                    Activity.user_id == user_id,
+                    Activity.external_id.in_(external_ids[start:start + 500])
+                ))
+
+        pending = [(key, event, payload) for key, (event, payload) in workouts.items() if key not in existing]
+        weights = dict(db.session.query(User.id, User.weight_lbs).filter(
+            User.id.in_({event.user_id for _, event, payload in pending if payload.get('calories_burned') is None})
+        ))
+
+        activities = []
+        skipped = 0
+        for key, event, payload in pending:
+            try:
+                activity = IngestConsumer._build_activity(key[1], event, payload, weights)
+            except (ValueError, TypeError, KeyError) as e:
+                current_app.logger.warning('[ingest] skipping workout event %s: %s', event.id, e)
+                skipped += 1
+                continue
+            activities.append(activity)
+
+        db.session.add_all(activities)
+        db.session.flush()
+
+        for activity in activities:
+            GoalTracker.record(activity)
+            PersonalRecords.on_create(activity)
+        for user_id, day in {(activity.user_id, activity.local_date) for activity in activities}:
+            StreakTracker.mark_active(user_id, day)
+
+        return activities, skipped
+
+    @staticmethod
+    def _build_activity(external_id, event, payload, weights) -> Activity:
+        """One workout event as an Activity, estimating calories when the device sent none."""
+        activity = Activity(
+            user_id=event.user_id,
+            external_id=external_id,
+            activity_type=payload.get('activity_type', 'other'),
+            title=payload.get('title') or payload.get('activity_type', 'Workout').replace('_', ' ').title(),
+            description=payload.get('description'),
+            duration_minutes=payload['duration_minutes'],
+            distance=payload.get('distance'),
+            calories_burned=payload.get('calories_burned'),
+            intensity=payload.get('intensity', 'moderate'),
+            date=event.event_time,
+            local_date=event.local_date
+        )
+        if activity.calories_burned is None:
+            activity.calories_burned = MetEstimator.estimate(
+                activity.activity_type, activity.intensity, activity.duration_minutes,
+                weights.get(activity.user_id), activity.distance
+            )
+            activity.calories_estimated = activity.calories_burned is not None
+        return activity
+
+    @staticmethod
+    def _roll_up(steps, heart_rate) -> Dict[Tuple[int, Any], DailyWearableSummary]:
+        """Fold coalesced per-day step and heart-rate totals into the summary rows."""
+        keys = set(steps) | set(heart_rate)
+        if not keys:
+            return {}
+
+        summaries = {}
+        by_user = defaultdict(set)
+        for user_id, day in keys:
+            by_user[user_id].add(day)
+        for user_id, days in by_user.items():
+            rows = DailyWearableSummary.query.filter(
+                DailyWearableSummary.user_id == user_id,
+                DailyWearableSummary.local_date.between(min(days), max(days))
+            )
+            summaries.update({(row.user_id, row.local_date): row for row in rows})
+
+        for key in keys:
+            summary = summaries.get(key)
+            if summary is None:
+                summary = DailyWearableSummary(user_id=key[0], local_date=key[1], steps=0, heart_rate_samples=0)
+                db.session.add(summary)
+                summaries[key] = summary
+
+            summary.steps += steps.get(key, 0)
+            if key in heart_rate:
+                weighted, samples, resting = heart_rate[key]
+                previous = (summary.avg_heart_rate or 0) * summary.heart_rate_samples
+                summary.heart_rate_samples += samples
+                summary.avg_heart_rate = (previous + weighted) / summary.heart_rate_samples
+                if resting is not None:
+                    summary.resting_heart_rate = resting
+
+        return {key: summaries[key] for key in keys}
+
+    @staticmethod
+    def prune(retention: timedelta, cursor_name: str = 'default') -> int:
+        """Delete consumed events older than the retention window. Caller commits."""
+        consumed = db.session.query(IngestCursor.last_event_id).filter_by(name=cursor_name).scalar() or 0
+        return IngestEvent.query.filter(
+            IngestEvent.id <= consumed,
+            IngestEvent.received_at < datetime.utcnow() - retention
+        ).delete(synchronize_session=False)
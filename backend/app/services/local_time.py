@@ -0,0 +1,71 @@
+"""
+Local Time Service
+Resolves user timezones and the local calendar day an entry belongs to.
+
+Entry timestamps (Activity.date, Nutrition.date) stay naive UTC. Each entry also
+stores the user's local calendar date at write time in `local_date`, so daily
+aggregates are plain index range scans on (user_id, local_date).
+"""
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.models import User
+
+DEFAULT_TIMEZONE = 'UTC'
+
+
+@lru_cache(maxsize=512)
+def get_zone(name):
+    """ZoneInfo for a timezone name, falling back to UTC for unknown or empty names."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def is_valid_timezone(name):
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+
+
+def timezone_for(user_id):
+    """Timezone name for a user without loading the whole row."""
+    return User.query.with_entities(User.timezone).filter_by(id=user_id).scalar() or DEFAULT_TIMEZONE
+
+
+def local_today(tz_name) -> date:
+    return datetime.now(get_zone(tz_name)).date()
+
+
+def local_date_for(utc_naive: datetime, tz_name) -> date:
+    """Local calendar date of a naive UTC timestamp."""
+    return utc_naive.replace(tzinfo=timezone.utc).astimezone(get_zone(tz_name)).date()
+
+
+def parse_entry_date(value, tz_name):
+    """
+    Parse a client-supplied entry date into (naive UTC datetime, local date).
+
+    - empty: now
+    - 'YYYY-MM-DD': the user picked a calendar day, so that day is the local date
+      and the timestamp is its local midnight in UTC
+    - naive datetime: treated as UTC, as entry dates always have been
+    - offset-aware datetime: converted to naive UTC
+
+    Raises ValueError for unparseable input, like datetime.fromisoformat.
+    """
+    if not value:
+        now = datetime.utcnow()
+        return now, local_date_for(now, tz_name)
+
+    parsed = datetime.fromisoformat(value)
+    if len(value) == 10:
+        # Stored as the UTC instant of local midnight, so it maps back to the same day
+        midnight = parsed.replace(tzinfo=get_zone(tz_name)).astimezone(timezone.utc).replace(tzinfo=None)
+        return midnight, parsed.date()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed, local_date_for(parsed, tz_name)
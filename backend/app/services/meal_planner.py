@@ -0,0 +1,233 @@
+"""
+Meal Planner Service
+Builds N-day meal plans that hit calorie and macro targets from a local food table.
+
+Each day starts from a greedy pick per meal slot and is refined by local search:
+every slot is repeatedly swapped for the (food, portion) candidate that most
+reduces the weighted error against the day's targets, with a penalty on foods
+already used earlier in the plan to keep it varied. Candidate scoring is done
+over NumPy arrays, so a 7-day plan takes a few milliseconds.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+
+# name, slot, calories, protein (g), carbohydrates (g), fats (g), tags
+FOODS = [
+    ('Greek yogurt with berries and almonds', 'breakfast', 280, 20, 28, 10, {'dairy'}),
+    ('Oatmeal with banana and peanut butter', 'breakfast', 390, 12, 58, 13, set()),
+    ('Egg white omelet with vegetables', 'breakfast', 180, 24, 8, 5, {'egg'}),
+    ('Protein pancakes with eggs', 'breakfast', 450, 35, 40, 16, {'egg', 'dairy'}),
+    ('Scrambled eggs with avocado toast', 'breakfast', 430, 20, 30, 26, {'egg'}),
+    ('Smoothie bowl with fruits', 'breakfast', 320, 8, 62, 6, set()),
+    ('Whole grain toast with avocado', 'breakfast', 300, 9, 32, 16, set()),
+    ('Oatmeal with protein powder and berries', 'breakfast', 360, 30, 48, 7, {'dairy'}),
+    ('Cottage cheese with pineapple', 'breakfast', 220, 24, 20, 5, {'dairy'}),
+    ('Tofu scramble with spinach', 'breakfast', 250, 20, 10, 15, set()),
+    ('Smoked salmon bagel', 'breakfast', 390, 24, 48, 11, {'fish', 'dairy'}),
+    ('Turkey sausage and egg muffin', 'breakfast', 350, 25, 28, 15, {'meat', 'egg'}),
+    ('Pea protein smoothie with oats', 'breakfast', 320, 30, 38, 6, set()),
+
+    ('Grilled chicken salad', 'lunch', 380, 38, 14, 18, {'meat'}),
+    ('Quinoa bowl with vegetables', 'lunch', 450, 15, 68, 13, set()),
+    ('Tuna wrap with mixed greens', 'lunch', 420, 32, 38, 14, {'fish'}),
+    ('Chicken breast with brown rice', 'lunch', 520, 45, 55, 10, {'meat'}),
+    ('Beef stir-fry with quinoa', 'lunch', 560, 38, 50, 20, {'meat'}),
+    ('Lentil soup with whole grain bread', 'lunch', 420, 22, 62, 8, set()),
+    ('Turkey and hummus sandwich', 'lunch', 460, 32, 46, 15, {'meat'}),
+    ('Salmon poke bowl', 'lunch', 540, 32, 60, 17, {'fish'}),
+    ('Chickpea and feta salad', 'lunch', 430, 17, 42, 21, {'dairy'}),
+    ('Black bean burrito bowl', 'lunch', 510, 20, 78, 12, set()),
+    ('Egg salad on rye', 'lunch', 400, 19, 30, 22, {'egg'}),
+    ('Tempeh grain bowl', 'lunch', 500, 32, 50, 18, set()),
+    ('Seitan wrap with vegetables', 'lunch', 440, 38, 42, 12, set()),
+
+    ('Baked salmon with broccoli', 'dinner', 460, 38, 12, 28, {'fish'}),
+    ('Lean turkey with sweet potato', 'dinner', 480, 40, 45, 12, {'meat'}),
+    ('Grilled chicken with roasted vegetables', 'dinner', 430, 42, 22, 18, {'meat'}),
+    ('Steak with vegetables and rice', 'dinner', 620, 45, 55, 22, {'meat'}),
+    ('Chicken pasta with marinara', 'dinner', 580, 40, 70, 12, {'meat'}),
+    ('Turkey meatballs with whole grain pasta', 'dinner', 600, 38, 68, 17, {'meat'}),
+    ('Grilled fish with quinoa', 'dinner', 470, 36, 42, 15, {'fish'}),
+    ('Vegetable curry with brown rice', 'dinner', 520, 13, 82, 15, set()),
+    ('Tofu stir-fry with rice', 'dinner', 500, 24, 62, 16, set()),
+    ('Shrimp tacos with slaw', 'dinner', 450, 30, 45, 15, {'fish'}),
+    ('Bean and cheese enchiladas', 'dinner', 560, 24, 62, 23, {'dairy'}),
+    ('Pork tenderloin with green beans and potatoes', 'dinner', 500, 40, 40, 16, {'meat'}),
+    ('Lentil and tofu bolognese', 'dinner', 540, 34, 66, 14, set()),
+    ('Tempeh stir-fry with broccoli', 'dinner', 480, 34, 36, 20, set()),
+
+    ('Apple with almond butter', 'snack', 200, 5, 25, 9, set()),
+    ('Protein shake', 'snack', 160, 30, 6, 2, {'dairy'}),
+    ('Carrot sticks with hummus', 'snack', 150, 5, 17, 7, set()),
+    ('Greek yogurt with granola', 'snack', 240, 15, 30, 7, {'dairy'}),
+    ('Nuts and dried fruit', 'snack', 250, 6, 24, 15, set()),
+    ('Hard-boiled eggs', 'snack', 140, 12, 1, 10, {'egg'}),
+    ('Cottage cheese with berries', 'snack', 180, 20, 14, 4, {'dairy'}),
+    ('Edamame', 'snack', 190, 17, 14, 8, set()),
+    ('String cheese and crackers', 'snack', 190, 9, 18, 9, {'dairy'}),
+    ('Banana with peanut butter', 'snack', 290, 8, 33, 16, set()),
+    ('Beef jerky', 'snack', 120, 18, 6, 2, {'meat'}),
+    ('Roasted chickpeas', 'snack', 180, 9, 27, 4, set()),
+    ('Pea protein shake', 'snack', 150, 25, 6, 3, set()),
+]
+
+
+class MealPlanner:
+    """
+    Optimizes daily meal selections against calorie and macro targets.
+    """
+
+    SLOTS = ('breakfast', 'lunch', 'dinner', 'snack')
+    PORTIONS = (0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.25, 2.5)
+
+    # Tags each dietary preference rules out
+    PREFERENCES = {
+        'none': set(),
+        'vegetarian': {'meat', 'fish'},
+        'pescatarian': {'meat'},
+        'vegan': {'meat', 'fish', 'dairy', 'egg'},
+    }
+
+    # Share of daily calories from protein / carbohydrates / fats
+    MACRO_SPLITS = {
+        'weight_loss': (0.30, 0.40, 0.30),
+        'muscle_gain': (0.30, 0.45, 0.25),
+        'general': (0.25, 0.50, 0.25),
+    }
+
+    # Calorie error is weighted highest; macros share the rest
+    ERROR_WEIGHTS = np.array([4.0, 1.0, 1.0, 1.0])
+    VARIETY_PENALTY = 0.02
+
+    CALORIE_TOLERANCE = 0.05
+    MACRO_TOLERANCE = 0.10
+    TARGET_BUCKET = 50
+    DEFAULT_CALORIES = 2000
+
+    @staticmethod
+    def macro_targets(target_calories, goal_key):
+        """Daily targets as [calories, protein g, carbohydrates g, fats g]."""
+        protein, carbs, fats = MealPlanner.MACRO_SPLITS[goal_key]
+        return np.array([
+            target_calories,
+            target_calories * protein / 4,
+            target_calories * carbs / 4,
+            target_calories * fats / 9
+        ])
+
+    @staticmethod
+    def generate(target_calories, goal_key: str, days: int, preference: str = 'none',
+                 start_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Build a dated N-day plan.
+
+        Targets are bucketed to the nearest TARGET_BUCKET calories so that users with
+        near-identical needs share a cached plan.
+        """
+        target_calories = target_calories or MealPlanner.DEFAULT_CALORIES
+        bucket = int(round(target_calories / MealPlanner.TARGET_BUCKET) * MealPlanner.TARGET_BUCKET)
+        plan = MealPlanner._build_plan(bucket, goal_key, days, preference)
+
+        start_date = start_date or datetime.utcnow()
+        return [
+            {**day, 'day': index + 1, 'date': (start_date + timedelta(days=index)).strftime('%Y-%m-%d')}
+            for index, day in enumerate(plan)
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _build_plan(target_calories: int, goal_key: str, days: int, preference: str):
+        excluded = MealPlanner.PREFERENCES[preference]
+        targets = MealPlanner.macro_targets(target_calories, goal_key)
+        portions = np.array(MealPlanner.PORTIONS)
+
+        # Per slot: candidate macro rows for every (food, portion) pair
+        slots = []
+        for slot in MealPlanner.SLOTS:
+            foods = [food for food in FOODS if food[1] == slot and not (food[6] & excluded)]
+            macros = np.array([food[2:6] for food in foods], dtype=float)
+            slots.append({
+                'foods': foods,
+                'food_index': np.repeat(np.arange(len(foods)), len(portions)),
+                'portion': np.tile(portions, len(foods)),
+                'macros': (macros[:, None, :] * portions[None, :, None]).reshape(-1, 4)
+            })
+
+        weights = MealPlanner.ERROR_WEIGHTS
+        uses = [np.zeros(len(slot['foods'])) for slot in slots]
+        plan = []
+
+        for _ in range(days):
+            penalties = [MealPlanner.VARIETY_PENALTY * used[slot['food_index']] for slot, used in zip(slots, uses)]
+
+            # Greedy start: each slot fills its remaining share of the targets in turn
+            chosen = []
+            totals = np.zeros(4)
+            for position, slot in enumerate(slots):
+                share = (position + 1) / len(slots)
+                error = ((totals + slot['macros'] - targets * share) / targets) ** 2 @ weights
+                pick = int(np.argmin(error + penalties[position]))
+                chosen.append(pick)
+                totals = totals + slot['macros'][pick]
+
+            # Local search: swap one slot at a time while the day objective improves
+            for _ in range(4):
+                improved = False
+                for position, slot in enumerate(slots):
+                    base = totals - slot['macros'][chosen[position]]
+                    objective = ((base + slot['macros'] - targets) / targets) ** 2 @ weights + penalties[position]
+                    pick = int(np.argmin(objective))
+                    if objective[pick] < objective[chosen[position]] - 1e-9:
+                        chosen[position] = pick
+                        totals = base + slot['macros'][pick]
+                        improved = True
+                if not improved:
+                    break
+
+            plan.append(MealPlanner._describe_day(slots, chosen, totals, targets))
+            for slot, used, pick in zip(slots, uses, chosen):
+                used[slot['food_index'][pick]] += 1
+
+        return tuple(plan)
+
+    @staticmethod
+    def _describe_day(slots, chosen, totals, targets) -> Dict[str, Any]:
+        meals, details = {}, {}
+        for name, slot, pick in zip(MealPlanner.SLOTS, slots, chosen):
+            food = slot['foods'][slot['food_index'][pick]]
+            servings = float(slot['portion'][pick])
+            calories, protein, carbs, fats = slot['macros'][pick]
+
+            meals[name] = food[0] if servings == 1 else f'{food[0]} ({servings:g} servings)'
+            details[name] = {
+                'name': food[0],
+                'servings': servings,
+                'calories': round(float(calories)),
+                'protein': round(float(protein), 1),
+                'carbohydrates': round(float(carbs), 1),
+                'fats': round(float(fats), 1)
+            }
+
+        relative_error = np.abs(totals - targets) / targets
+        within_tolerance = bool(relative_error[0] <= MealPlanner.CALORIE_TOLERANCE and
+                                np.all(relative_error[1:] <= MealPlanner.MACRO_TOLERANCE))
+
+        return {
+            'meals': meals,
+            'meal_details': details,
+            'totals': MealPlanner._macro_dict(totals),
+            'targets': MealPlanner._macro_dict(targets),
+            'within_tolerance': within_tolerance
+        }
+
+    @staticmethod
+    def _macro_dict(values) -> Dict[str, Any]:
+        return {
+            'calories': round(float(values[0])),
+            'protein': round(float(values[1]), 1),
+            'carbohydrates': round(float(values[2]), 1),
+            'fats': round(float(values[3]), 1)
+        }
@@ -0,0 +1,155 @@
+"""
+MET Calorie Estimator
+Estimates calories burned for an activity from MET values, body weight and duration.
+
+    calories = MET x weight (kg) x duration (hours)
+
+MET values come from the Compendium of Physical Activities. For pace-based
+activities (running, walking, cycling, swimming, hiking) with a distance, MET follows
+speed instead of the self-reported intensity.
+
+All MET values are precomputed at import into two NumPy tables:
+
+- MET_TABLE[type, intensity]
+- SPEED_TABLE[type, speed bucket], at SPEED_STEP km/h resolution
+
+A single estimate is then two dict lookups and one array index. A backfill
+maps millions of rows to codes once and resolves every MET with fancy
+indexing in one pass.
+"""
+from typing import Dict, Any, Optional
+import math
+import numpy as np
+
+
+KG_PER_LB = 0.453592
+
+# Used when the user has not entered a weight
+DEFAULT_WEIGHT_LBS = 154
+
+INTENSITIES = ('low', 'moderate', 'high')
+DEFAULT_INTENSITY = 'moderate'
+
+# activity_type -> MET at low / moderate / high intensity
+ACTIVITY_METS = {
+    'cardio': (4.0, 6.0, 8.0),
+    'strength': (3.5, 5.0, 6.0),
+    'flexibility': (2.3, 2.5, 3.0),
+    'sports': (4.5, 7.0, 10.0),
+    'running': (7.0, 9.8, 11.5),
+    'walking': (2.8, 3.5, 5.0),
+    'cycling': (4.0, 6.8, 10.0),
+    'swimming': (5.8, 8.3, 10.0),
+    'hiking': (5.3, 6.0, 7.8),
+    'rowing': (4.8, 7.0, 8.5),
+    'yoga': (2.3, 2.5, 4.0),
+    'hiit': (6.0, 8.0, 10.0),
+    'dancing': (4.5, 5.5, 7.8),
+    'other': (3.0, 4.0, 6.0),
+}
+FALLBACK_TYPE = 'other'
+
+# Pace-based activity types: (speed km/h, MET) points, interpolated linearly and
+# clamped at both ends
+SPEED_METS = {
+    'running': ((6.4, 6.0), (8.0, 8.3), (9.7, 9.8), (10.8, 10.5), (11.3, 11.0), (12.1, 11.8),
+                (12.9, 12.3), (13.8, 12.8), (14.5, 14.5), (16.1, 16.0), (17.7, 19.0), (19.3, 19.8),
+                (20.9, 23.0)),
+    'walking': ((3.2, 2.8), (4.0, 3.0), (4.8, 3.5), (5.6, 4.3), (6.4, 5.0), (7.2, 7.0), (8.0, 8.3)),
+    'cycling': ((12.0, 3.5), (16.0, 5.8), (19.0, 6.8), (22.0, 8.0), (25.5, 10.0), (30.5, 12.0), (32.0, 15.8)),
+    'swimming': ((1.5, 5.8), (2.5, 8.3), (3.5, 10.0)),
+    'hiking': ((3.0, 5.3), (5.0, 6.0), (6.5, 7.8)),
+}
+
+SPEED_STEP = 0.1
+MAX_SPEED = 80.0
+
+TYPE_CODES = {activity_type: code for code, activity_type in enumerate(ACTIVITY_METS)}
+INTENSITY_CODES = {intensity: code for code, intensity in enumerate(INTENSITIES)}
+
+
+def _build_tables():
+    met_table = np.array([ACTIVITY_METS[activity_type] for activity_type in TYPE_CODES], dtype=float)
+
+    speeds = np.arange(0, int(round(MAX_SPEED / SPEED_STEP)) + 1) * SPEED_STEP
+    speed_table = np.full((len(TYPE_CODES), len(speeds)), np.nan)
+    for activity_type, points in SPEED_METS.items():
+        known_speeds, mets = zip(*points)
+        speed_table[TYPE_CODES[activity_type]] = np.interp(speeds, known_speeds, mets)
+
+    return met_table, speed_table
+
+
+MET_TABLE, SPEED_TABLE = _build_tables()
+PACE_BASED = ~np.isnan(SPEED_TABLE[:, 0])
+
+
+class MetEstimator:
+    """
+    Table-driven MET lookups and calorie estimates, single or vectorized.
+    """
+
+    @staticmethod
+    def type_code(activity_type) -> int:
+        return TYPE_CODES.get((activity_type or '').lower(), TYPE_CODES[FALLBACK_TYPE])
+
+    @staticmethod
+    def intensity_code(intensity) -> int:
+        return INTENSITY_CODES.get((intensity or '').lower(), INTENSITY_CODES[DEFAULT_INTENSITY])
+
+    @staticmethod
+    def met(activity_type, intensity, duration_minutes=None, distance=None) -> float:
+        """MET for one activity; distance (km) and duration give a speed for pace-based types."""
+        type_code = MetEstimator.type_code(activity_type)
+        if (PACE_BASED[type_code] and distance is not None and math.isfinite(distance) and distance > 0
+                and duration_minutes and duration_minutes > 0):
+            bucket = min(int(round(distance / (duration_minutes / 60) / SPEED_STEP)), SPEED_TABLE.shape[1] - 1)
+            return float(SPEED_TABLE[type_code, bucket])
+        return float(MET_TABLE[type_code, MetEstimator.intensity_code(intensity)])
+
+    @staticmethod
+    def estimate(activity_type, intensity, duration_minutes, weight_lbs=None, distance=None) -> Optional[int]:
+        """Estimated calories for one activity, or None without a positive duration."""
+        if not duration_minutes or duration_minutes <= 0:
+            return None
+        met = MetEstimator.met(activity_type, intensity, duration_minutes, distance)
+        weight_kg = (weight_lbs or DEFAULT_WEIGHT_LBS) * KG_PER_LB
+        return round(met * weight_kg * duration_minutes / 60)
+
+    @staticmethod
+    def estimate_batch(type_codes, intensity_codes, duration_minutes, weight_lbs, distance) -> np.ndarray:
+        """
+        Vectorized estimate() over parallel arrays.
+
+        Codes come from type_code() / intensity_code(). Missing weight or distance
+        is NaN (or None). Rows without a positive duration yield NaN; every other
+        row matches estimate() exactly.
+        """
+        types = np.asarray(type_codes, dtype=np.int64)
+        intensities = np.asarray(intensity_codes, dtype=np.int64)
+        minutes = np.asarray(duration_minutes, dtype=float)
+        weight = np.asarray(weight_lbs, dtype=float)
+        distance = np.asarray(distance, dtype=float)
+
+        met = MET_TABLE[types, intensities]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = distance / (minutes / 60)
+        by_speed = PACE_BASED[types] & (distance > 0) & (minutes > 0)
+        buckets = np.where(by_speed, np.rint(np.where(by_speed, speed, 0) / SPEED_STEP), 0)
+        buckets = np.minimum(buckets, SPEED_TABLE.shape[1] - 1).astype(np.int64)
+        met = np.where(by_speed, SPEED_TABLE[types, buckets], met)
+
+        weight_kg = np.where(np.isnan(weight) | (weight <= 0), DEFAULT_WEIGHT_LBS, weight) * KG_PER_LB
+        calories = np.round(met * weight_kg * minutes / 60)
+        return np.where(minutes > 0, calories, np.nan)
+
+    @staticmethod
+    def describe(activity_type, intensity, duration_minutes, weight_lbs=None, distance=None) -> Dict[str, Any]:
+        """Estimate plus the inputs it used, for showing users where a number came from."""
+        return {
+            'calories_burned': MetEstimator.estimate(activity_type, intensity, duration_minutes, weight_lbs, distance),
+            'met': round(MetEstimator.met(activity_type, intensity, duration_minutes, distance), 1) if duration_minutes else None,
+            'weight_lbs': weight_lbs or DEFAULT_WEIGHT_LBS,
+            'weight_assumed': not weight_lbs,
+        }
@@ -0,0 +1,242 @@
+"""
+Personal Records Service
+Keeps each user's personal records current as activities are written.
+
+A new or edited activity is compared against the stored records, which are
+one indexed read. Only when the activity holding a record is edited or deleted
+is that one record type recomputed from the activity table.
+"""
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+import numpy as np
+from app import db
+from app.models import Activity, PersonalRecord
+from app.services import local_time
+
+
+# Distance brackets (km) for pace records: name, lower bound, upper bound (exclusive)
+PACE_BRACKETS = (
+    ('1k', 1.0, 5.0),
+    ('5k', 5.0, 10.0),
+    ('10k', 10.0, 21.0975),
+    ('half_marathon', 21.0975, 42.195),
+    ('marathon', 42.195, None),
+)
+
+# Activity types that count toward the distance and pace records, including common device aliases
+RUN_TYPES = ('running', 'run', 'jogging')
+
+# record_type -> (label, unit, lower value is better)
+RECORD_TYPES = {
+    'longest_distance': ('Longest run', 'km', False),
+    'most_calories': ('Most calories in a session', 'kcal', False),
+    'biggest_week': ('Most calories burned in a week', 'kcal', False),
+    **{
+        f'fastest_pace_{name}': (f'Fastest pace ({name.replace("_", " ")} bracket)', 'min/km', True)
+        for name, _, _ in PACE_BRACKETS
+    },
+}
+
+# Record types only runs can set
+RUN_RECORDS = {'longest_distance', *(f'fastest_pace_{name}' for name, _, _ in PACE_BRACKETS)}
+
+
+class PersonalRecords:
+    """
+    Incremental personal record maintenance for activity writes.
+    """
+    
+    @staticmethod
+    def week_start(day: date) -> date:
+        return day - timedelta(days=day.weekday())
+    
+    @staticmethod
+    def week_achieved_on(user_id, start: date, latest: date) -> date:
+        """When a weekly total was reached: its latest activity day, never past the user's today."""
+        today = local_time.local_today(local_time.timezone_for(user_id))
+        return max(start, min(latest, today))
+    
+    @staticmethod
+    def candidates(activity) -> Dict[str, float]:
+        """Record values a single activity would set, by record type."""
+        values = {}
+        if activity.calories_burned:
+            values['most_calories'] = activity.calories_burned
+        if activity.activity_type not in RUN_TYPES:
+            return values
+        
+        if activity.distance:
+            values['longest_distance'] = activity.distance
+        if activity.distance and activity.duration_minutes:
+            for name, low, high in PACE_BRACKETS:
+                if activity.distance >= low and (high is None or activity.distance < high):
+                    values[f'fastest_pace_{name}'] = activity.duration_minutes / activity.distance
+        return values
+    
+    @staticmethod
+    def _beats(record_type, value, record) -> bool:
+        if record is None:
+            return True
+        lower_is_better = RECORD_TYPES[record_type][2]
+        return value < record.value if lower_is_better else value > record.value
+    
+    @staticmethod
+    def _load(user_id) -> Dict[str, PersonalRecord]:
+        return {record.record_type: record for record in PersonalRecord.query.filter_by(user_id=user_id)}
+    
+    @staticmethod
+    def _set(records, user_id, record_type, value, activity_id=None, achieved_on=None, period_start=None):
+        record = records.get(record_type)
+        if record is None:
+            record = PersonalRecord(user_id=user_id, record_type=record_type)
+            db.session.add(record)
+            records[record_type] = record
+        record.value = value
+        record.activity_id = activity_id
+        record.achieved_on = achieved_on
+        record.period_start = period_start
+    
+    @staticmethod
+    def on_create(activity):
+        """Check a new activity against the user's records. Call before commit."""
+        records = PersonalRecords._load(activity.user_id)
+        PersonalRecords._offer(records, activity)
+        PersonalRecords._offer_week(records, activity.user_id, activity.local_date)
+    
+    @staticmethod
+    def on_update(activity, previous_local_date):
+        """Re-check records after an activity was edited. Call after the edit is applied, before commit."""
+        records = PersonalRecords._load(activity.user_id)
+        
+        held = [record_type for record_type, record in records.items() if record.activity_id == activity.id]
+        for record_type in held:
+            PersonalRecords._recompute(records, activity.user_id, record_type)
+        PersonalRecords._offer(records, activity, skip=held)
+        
+        week = records.get('biggest_week')
+        weeks = {PersonalRecords.week_start(day) for day in (previous_local_date, activity.local_date) if day}
+        if week is not None and week.period_start in weeks:
+            PersonalRecords._recompute(records, activity.user_id, 'biggest_week')
+        else:
+            PersonalRecords._offer_week(records, activity.user_id, activity.local_date)
+    
+    @staticmethod
+    def on_delete(activity):
+        """Recompute only the records the deleted activity held. Call after session.delete, before commit."""
+        records = PersonalRecords._load(activity.user_id)
+        
+        for record_type, record in list(records.items()):
+            if record.activity_id == activity.id:
+                PersonalRecords._recompute(records, activity.user_id, record_type)
+        
+        week = records.get('biggest_week')
+        if week is not None and activity.local_date and week.period_start == PersonalRecords.week_start(activity.local_date):
+            PersonalRecords._recompute(records, activity.user_id, 'biggest_week')
+    
+    @staticmethod
+    def rebuild(user_id):
+        """Recompute every record type for a user."""
+        records = PersonalRecords._load(user_id)
+        for record_type in RECORD_TYPES:
+            PersonalRecords._recompute(records, user_id, record_type)
+    
+    @staticmethod
+    def _offer(records, activity, skip=()):
+        for record_type, value in PersonalRecords.candidates(activity).items():
+            if record_type not in skip and PersonalRecords._beats(record_type, value, records.get(record_type)):
+                PersonalRecords._set(records, activity.user_id, record_type, value,
+                                     activity_id=activity.id, achieved_on=activity.local_date)
+    
+    @staticmethod
+    def _offer_week(records, user_id, day):
+        if day is None:
+            return
+        start = PersonalRecords.week_start(day)
+        # Range scan on (user_id, local_date)
+        total, latest = db.session.query(
+            db.func.coalesce(db.func.sum(Activity.calories_burned), 0), db.func.max(Activity.local_date)
+        ).filter(
+            Activity.user_id == user_id,
+            Activity.local_date.between(start, start + timedelta(days=6))
+        ).one()
+        
+        record = records.get('biggest_week')
+        if total and (PersonalRecords._beats('biggest_week', total, record) or record.period_start == start):
+            PersonalRecords._set(records, user_id, 'biggest_week', total,
+                                 achieved_on=PersonalRecords.week_achieved_on(user_id, start, latest),
+                                 period_start=start)
+    
+    @staticmethod
+    def _best_activity(user_id, record_type) -> Optional[Activity]:
+        query = Activity.query.filter(Activity.user_id == user_id)
+        if record_type in RUN_RECORDS:
+            query = query.filter(Activity.activity_type.in_(RUN_TYPES))
+        
+        if record_type == 'longest_distance':
+            return query.filter(Activity.distance > 0).order_by(Activity.distance.desc(), Activity.id).first()
+        if record_type == 'most_calories':
+            return query.filter(Activity.calories_burned > 0).order_by(
+                Activity.calories_burned.desc(), Activity.id
+            ).first()
+        
+        name = record_type[len('fastest_pace_'):]
+        _, low, high = next(bracket for bracket in PACE_BRACKETS if bracket[0] == name)
+        query = query.filter(Activity.distance >= low, Activity.duration_minutes > 0)
+        if high is not None:
+            query = query.filter(Activity.distance < high)
+        return query.order_by((Activity.duration_minutes / Activity.distance).asc(), Activity.id).first()
+    
+    @staticmethod
+    def _recompute(records, user_id, record_type):
+        if record_type == 'biggest_week':
+            best = PersonalRecords._best_week(user_id)
+            if best:
+                start, total, latest = best
+                PersonalRecords._set(records, user_id, record_type, total,
+                                     achieved_on=PersonalRecords.week_achieved_on(user_id, start, latest),
+                                     period_start=start)
+                return
+        else:
+            activity = PersonalRecords._best_activity(user_id, record_type)
+            if activity is not None:
+                PersonalRecords._set(records, user_id, record_type, PersonalRecords.candidates(activity)[record_type],
+                                     activity_id=activity.id, achieved_on=activity.local_date)
+                return
+        
+        record = records.pop(record_type, None)
+        if record is not None:
+            db.session.delete(record)
+    
+    @staticmethod
+    def _best_week(user_id):
+        rows = db.session.query(Activity.local_date, Activity.calories_burned).filter(
+            Activity.user_id == user_id,
+            Activity.local_date.isnot(None),
+            Activity.calories_burned > 0
+        ).all()
+        if not rows:
+            return None
+        
+        # date.toordinal() is 1 for Monday 0001-01-01, so this is a Monday-based week number
+        ordinals = np.fromiter((day.toordinal() for day, _ in rows), dtype=np.int64, count=len(rows))
+        weeks = (ordinals - 1) // 7
+        calories = np.fromiter((value for _, value in rows), dtype=float, count=len(rows))
+        unique_weeks, inverse = np.unique(weeks, return_inverse=True)
+        totals = np.bincount(inverse, weights=calories)
+        
+        best = int(np.argmax(totals))
+        latest = date.fromordinal(int(ordinals[inverse == best].max()))
+        return date.fromordinal(int(unique_weeks[best]) * 7 + 1), float(totals[best]), latest
+    
+    @staticmethod
+    def serialize(user_id) -> Dict[str, Any]:
+        """All of a user's records keyed by record type, with labels and units."""
+        return {
+            record.record_type: {
+                **record.to_dict(),
+                'label': RECORD_TYPES[record.record_type][0],
+                'unit': RECORD_TYPES[record.record_type][1]
+            }
+            for record in PersonalRecord.query.filter_by(user_id=user_id)
+            if record.record_type in RECORD_TYPES
+        }
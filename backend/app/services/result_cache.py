@@ -0,0 +1,46 @@
+"""
+Result Cache
+Process-local memo for per-user computed results, invalidated by a version stamp.
+"""
+import threading
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """
+    LRU cache whose entries are only valid for the version they were stored under.
+
+    Callers pass the current version (e.g. User.data_version) on every lookup, so a
+    bump anywhere - even in another worker process - invalidates stale entries here.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, version, compute):
+        value = self.get(key, version)
+        if value is None:
+            value = compute()
+            self.set(key, version, value)
+        return value
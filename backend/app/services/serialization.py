@@ -0,0 +1,99 @@
+"""
+Serialization
+Fast JSON encoding for API responses.
+
+OrjsonProvider replaces Flask's stdlib JSON provider. orjson encodes datetimes
+and dates natively, in the same ISO 8601 form as .isoformat(), so models hand
+them over as-is instead of formatting each one in Python.
+
+RowSerializer turns a model's columns into dicts. Its field list is read from
+the mapper once, on first use, and compiled into a single attrgetter. The same
+keys zip onto plain result tuples from select(*Model.serializer.columns), so
+list endpoints can skip building ORM objects altogether.
+"""
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Sequence
+import orjson
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import inspect
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson. Installed as app.json in create_app."""
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class RowSerializer:
+    """
+    Column-driven serializer for a model, declared on the class as `serializer = RowSerializer()`.
+
+    Every column is included unless named in `exclude`; pass `fields` instead
+    to list them explicitly. Values are left as Python objects for the JSON
+    provider to encode.
+    """
+
+    def __init__(self, fields: Sequence[str] = None, exclude: Iterable[str] = ()):
+        self.fields = tuple(fields) if fields else None
+        self.exclude = frozenset(exclude)
+        self.model = None
+        self._keys = None
+        self._getter = None
+
+    def __set_name__(self, owner, name):
+        self.model = owner
+
+    def __get__(self, obj, owner=None):
+        return self
+
+    def _compile(self):
+        # Deferred to first use: inspecting the mapper configures every mapper,
+        # which needs all models imported
+        keys = self.fields or tuple(
+            attr.key for attr in inspect(self.model).column_attrs if attr.key not in self.exclude
+        )
+        self._getter = attrgetter(*keys)
+        self._keys = keys
+
+    @property
+    def keys(self):
+        if self._keys is None:
+            self._compile()
+        return self._keys
+
+    @property
+    def columns(self) -> List:
+        """Column attributes to select for rows(), in key order."""
+        return [getattr(self.model, key) for key in self.keys]
+
+    def dump(self, obj) -> Dict[str, Any]:
+        keys = self.keys
+        values = self._getter(obj)
+        return dict(zip(keys, values)) if len(keys) > 1 else {keys[0]: values}
+
+    def rows(self, rows: Iterable[Sequence], extra: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Dicts from result tuples selected as (*self.columns, *extra columns).
+
+        `extra` names any trailing values selected after the model's columns.
+        """
+        keys = self.keys + tuple(extra)
+        return [dict(zip(keys, row)) for row in rows]
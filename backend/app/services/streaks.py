@@ -0,0 +1,197 @@
+"""
+Streak Service
+Maintains each user's activity-day bitmap and answers streak, consistency and
+heatmap questions from it.
+
+Activity writes set or clear one bit and update the stored run lengths, so the
+current and longest streak are read straight from the row. Window counts and
+heatmaps decode only the bytes covering the requested days.
+"""
+from datetime import date, timedelta
+from typing import Dict, Any, List
+import numpy as np
+from app import db
+from app.models import Activity, ActivityCalendar
+
+
+class StreakTracker:
+    """
+    Incremental streak tracking over ActivityCalendar bitmaps.
+    """
+    
+    @staticmethod
+    def _load(user_id, create=False):
+        calendar = ActivityCalendar.query.filter_by(user_id=user_id).with_for_update().first()
+        if calendar is None and create:
+            calendar = ActivityCalendar(user_id=user_id, bits=b'', active_days=0,
+                                        last_run_length=0, longest_streak=0)
+            db.session.add(calendar)
+        return calendar
+    
+    @staticmethod
+    def mark_active(user_id, day):
+        """Record that the user was active on a local day. Call before commit."""
+        if day is None:
+            return
+        
+        calendar = StreakTracker._load(user_id, create=True)
+        if calendar.origin is None:
+            calendar.origin = day
+        
+        if day < calendar.origin:
+            # Grow to the left in whole bytes so existing bits keep their positions
+            shift = -(-(calendar.origin - day).days // 8)
+            calendar.bits = bytes(shift) + calendar.bits
+            calendar.origin -= timedelta(days=shift * 8)
+        
+        index = (day - calendar.origin).days
+        bits = bytearray(calendar.bits)
+        if len(bits) <= index // 8:
+            bits.extend(bytes(index // 8 + 1 - len(bits)))
+        
+        if bits[index // 8] >> (index % 8) & 1:
+            return
+        bits[index // 8] |= 1 << (index % 8)
+        calendar.bits = bytes(bits)
+        calendar.active_days += 1
+        
+        # Length of the run the new day joins, found from the neighbouring bits
+        value = int.from_bytes(calendar.bits, 'little')
+        zeros_below = ~value & ((1 << index) - 1)
+        left = index - zeros_below.bit_length()
+        above = value >> (index + 1)
+        right = ((~above) & (above + 1)).bit_length() - 1
+        run = left + 1 + right
+        run_end = day + timedelta(days=right)
+        
+        if run > calendar.longest_streak:
+            calendar.longest_streak = run
+            calendar.longest_streak_end = run_end
+        if calendar.last_active_date is None or run_end >= calendar.last_active_date:
+            calendar.last_active_date = run_end
+            calendar.last_run_length = run
+    
+    @staticmethod
+    def mark_inactive_if_empty(user_id, day):
+        """
+        Clear a day's bit once its last activity is gone. Call after the delete
+        or date change is applied and before commit.
+        """
+        if day is None:
+            return
+        
+        remaining = db.session.query(Activity.id).filter(
+            Activity.user_id == user_id, Activity.local_date == day
+        ).first()
+        calendar = StreakTracker._load(user_id)
+        if remaining or calendar is None or calendar.origin is None:
+            return
+        
+        index = (day - calendar.origin).days
+        if index < 0 or index // 8 >= len(calendar.bits) or not calendar.bits[index // 8] >> (index % 8) & 1:
+            return
+        
+        bits = bytearray(calendar.bits)
+        bits[index // 8] &= ~(1 << (index % 8)) & 0xFF
+        calendar.bits = bytes(bits)
+        calendar.active_days -= 1
+        # Removing a day can split any run; rescan the bitmap (rare, and ~1 ms for decades)
+        StreakTracker._rescan_runs(calendar)
+    
+    @staticmethod
+    def _rescan_runs(calendar):
+        days = StreakTracker._unpack(calendar.bits)
+        active = np.flatnonzero(days)
+        if not len(active):
+            calendar.last_active_date = calendar.longest_streak_end = None
+            calendar.last_run_length = calendar.longest_streak = 0
+            return
+        
+        # Split active day indices wherever consecutive indices jump by more than one
+        breaks = np.flatnonzero(np.diff(active) > 1)
+        starts = np.concatenate([[active[0]], active[breaks + 1]])
+        ends = np.concatenate([active[breaks], [active[-1]]])
+        lengths = ends - starts + 1
+        
+        longest = int(np.argmax(lengths))
+        calendar.longest_streak = int(lengths[longest])
+        calendar.longest_streak_end = calendar.origin + timedelta(days=int(ends[longest]))
+        calendar.last_run_length = int(lengths[-1])
+        calendar.last_active_date = calendar.origin + timedelta(days=int(ends[-1]))
+    
+    @staticmethod
+    def rebuild(user_id):
+        """Rebuild a user's bitmap from their activities."""
+        calendar = StreakTracker._load(user_id, create=True)
+        days = [day for (day,) in db.session.query(Activity.local_date).filter(
+            Activity.user_id == user_id, Activity.local_date.isnot(None)
+        ).distinct()]
+        
+        if not days:
+            calendar.origin, calendar.bits, calendar.active_days = None, b'', 0
+            StreakTracker._rescan_runs(calendar)
+            return
+        
+        calendar.origin = min(days)
+        flags = np.zeros((max(days) - calendar.origin).days + 1, dtype=np.uint8)
+        flags[[(day - calendar.origin).days for day in days]] = 1
+        calendar.bits = np.packbits(flags, bitorder='little').tobytes()
+        calendar.active_days = len(days)
+        StreakTracker._rescan_runs(calendar)
+    
+    @staticmethod
+    def _unpack(bits) -> np.ndarray:
+        return np.unpackbits(np.frombuffer(bits, dtype=np.uint8), bitorder='little')
+    
+    @staticmethod
+    def _window(calendar, start: date, end: date) -> np.ndarray:
+        """0/1 array for start..end inclusive, decoding only the bytes that cover it."""
+        length = (end - start).days + 1
+        window = np.zeros(length, dtype=np.uint8)
+        if calendar is None or calendar.origin is None or length <= 0:
+            return window
+        
+        first = max((start - calendar.origin).days, 0)
+        last = min((end - calendar.origin).days, len(calendar.bits) * 8 - 1)
+        if first > last:
+            return window
+        
+        decoded = StreakTracker._unpack(calendar.bits[first // 8:last // 8 + 1])
+        offset = first - (first // 8) * 8
+        values = decoded[offset:offset + last - first + 1]
+        placed = first - (start - calendar.origin).days
+        window[placed:placed + len(values)] = values
+        return window
+    
+    @staticmethod
+    def summary(user_id, today: date) -> Dict[str, Any]:
+        """Current and longest streak; the current streak survives until today ends unlogged."""
+        calendar = StreakTracker._load(user_id)
+        if calendar is None or calendar.last_active_date is None:
+            return {'current_streak': 0, 'longest_streak': 0, 'active_days': 0, 'last_active_date': None}
+        
+        alive = calendar.last_active_date >= today - timedelta(days=1)
+        return {
+            'current_streak': calendar.last_run_length if alive else 0,
+            'longest_streak': calendar.longest_streak,
+            'longest_streak_end': calendar.longest_streak_end.isoformat() if calendar.longest_streak_end else None,
+            'active_days': calendar.active_days,
+            'last_active_date': calendar.last_active_date.isoformat()
+        }
+    
+    @staticmethod
+    def consistency(user_id, start: date, end: date) -> Dict[str, Any]:
+        """Active days and share of days active between start and end inclusive."""
+        window = StreakTracker._window(StreakTracker._load(user_id), start, end)
+        active = int(window.sum())
+        return {
+            'active_days': active,
+            'total_days': len(window),
+            'score': round(active / len(window) * 100, 1) if len(window) else 0
+        }
+    
+    @staticmethod
+    def heatmap(user_id, year: int) -> List[int]:
+        """One 0/1 flag per day of the year."""
+        window = StreakTracker._window(StreakTracker._load(user_id), date(year, 1, 1), date(year, 12, 31))
+        return window.tolist()
@@ -0,0 +1,204 @@
+"""
+Sync Service
+Delta sync for offline clients over a per-user change log.
+
+Every insert, update and delete of an activity, nutrition entry or goal takes
+the next number from the user's sync_seq counter and is written to
+sync_changes. The log keeps one row per entity, its latest change, so a
+client pulling `seq > token` gets each changed entity once and tombstones for
+deletes.
+
+Changes are captured by an after_flush listener, so every ORM write path
+(routes, the ingest consumer, goal hooks) is covered without knowing about
+sync. Core bulk UPDATEs bypass the session and call SyncLog.record themselves.
+Recording a change also bumps the resource's version counter used for ETags.
+
+The counter is advanced with UPDATE ... RETURNING on the user row. That row
+stays write-locked until commit, so a transaction holding a higher number
+always commits after one holding a lower number. A client that has read up
+to token N therefore never misses a change that commits late with a number
+at or below N.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, Tuple
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Activity, Goal, Nutrition, SyncChange, User
+
+
+# entity name -> model
+ENTITIES = {
+    'activity': Activity,
+    'nutrition': Nutrition,
+    'goal': Goal,
+}
+ENTITY_NAMES = {model: name for name, model in ENTITIES.items()}
+
+# entity -> users column counting writes to its resource (see services.http_cache)
+VERSION_COLUMNS = {
+    'activity': 'activities_version',
+    'nutrition': 'nutrition_version',
+    'goal': 'goals_version',
+}
+
+
+def _after_flush(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if type(obj) in ENTITY_NAMES:
+            changes.append((obj.user_id, ENTITY_NAMES[type(obj)], obj.id, 'upsert'))
+    for obj in session.dirty:
+        if type(obj) in ENTITY_NAMES and session.is_modified(obj, include_collections=False):
+            changes.append((obj.user_id, ENTITY_NAMES[type(obj)], obj.id, 'upsert'))
+    for obj in session.deleted:
+        if type(obj) in ENTITY_NAMES:
+            changes.append((obj.user_id, ENTITY_NAMES[type(obj)], obj.id, 'delete'))
+    if changes:
+        SyncLog.record(changes, session.connection())
+
+
+def install():
+    """Start capturing ORM writes into the change log. Called once from create_app."""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+class SyncLog:
+    """
+    Writes to and reads from the per-user sync change log.
+    """
+
+    @staticmethod
+    def record(changes: Iterable[Tuple[Any, str, int, str]], connection=None) -> int:
+        """
+        Log (user_id, entity, entity_id, op) changes, replacing each entity's previous row.
+
+        Runs on the current transaction's connection (no autoflush), so it is safe
+        inside flush events. Returns the number of rows written.
+        """
+        by_user = defaultdict(dict)
+        for user_id, entity, entity_id, op in changes:
+            # A later change to the same entity in this call wins
+            by_user[int(user_id)][(entity, entity_id)] = op
+        if not by_user:
+            return 0
+
+        connection = connection or db.session.connection()
+        users = User.__table__
+        now = datetime.utcnow()
+        written = 0
+        for user_id, entries in by_user.items():
+            # The same statement bumps the changed resources' ETag versions
+            versions = {
+                VERSION_COLUMNS[entity]: users.c[VERSION_COLUMNS[entity]] + 1
+                for entity in {entity for entity, _ in entries}
+            }
+            last = connection.execute(
+                update(users).where(users.c.id == user_id)
+                .values(sync_seq=users.c.sync_seq + len(entries), updated_at=users.c.updated_at, **versions)
+                .returning(users.c.sync_seq)
+            ).scalar()
+            if last is None:
+                continue  # user deleted in this transaction
+
+            by_entity = defaultdict(list)
+            for entity, entity_id in entries:
+                by_entity[entity].append(entity_id)
+            for entity, ids in by_entity.items():
+                for start in range(0, len(ids), 500):
+                    connection.execute(delete(SyncChange.__table__).where(
+                        SyncChange.__table__.c.user_id == user_id,
+                        SyncChange.__table__.c.entity == entity,
+                        SyncChange.__table__.c.entity_id.in_(ids[start:start + 500])
+                    ))
+
+            first = last - len(entries) + 1
+            connection.execute(insert(SyncChange.__table__), [
+                {'user_id': user_id, 'seq': first + offset, 'entity': entity, 'entity_id': entity_id,
+                 'op': op, 'changed_at': now}
+                for offset, ((entity, entity_id), op) in enumerate(entries.items())
+            ])
+            written += len(entries)
+        return written
+
+    @staticmethod
+    def current_seqs(user_id, entity: str, ids) -> Dict[int, Tuple[int, str]]:
+        """entity_id -> (seq, op) of the latest logged change for each id."""
+        ids = list(ids)
+        found = {}
+        for start in range(0, len(ids), 500):
+            found.update((entity_id, (seq, op)) for entity_id, seq, op in db.session.execute(
+                select(SyncChange.entity_id, SyncChange.seq, SyncChange.op).where(
+                    SyncChange.user_id == user_id,
+                    SyncChange.entity == entity,
+                    SyncChange.entity_id.in_(ids[start:start + 500])
+                )
+            ))
+        return found
+
+    @staticmethod
+    def changes_since(user_id, since: int = 0, limit: int = 500) -> Dict[str, Any]:
+        """
+        One page of changes after token `since`, oldest first, with current data for upserts.
+
+        A full sync (since 0) skips tombstones. Raises ValueError for a token
+        the server never issued.
+        """
+        head = db.session.query(User.sync_seq).filter_by(id=user_id).scalar() or 0
+        if since < 0 or since > head:
+            raise ValueError('Unknown sync token; sync again from 0')
+
+        query = SyncChange.query.filter(SyncChange.user_id == user_id, SyncChange.seq > since)
+        if since == 0:
+            query = query.filter(SyncChange.op != 'delete')
+        rows = query.order_by(SyncChange.seq).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        ids_by_entity = defaultdict(list)
+        for row in rows:
+            if row.op == 'upsert':
+                ids_by_entity[row.entity].append(row.entity_id)
+        loaded = {
+            entity: {obj.id: obj for obj in ENTITIES[entity].query.filter(
+                ENTITIES[entity].user_id == user_id, ENTITIES[entity].id.in_(ids)
+            )}
+            for entity, ids in ids_by_entity.items()
+        }
+
+        changes = []
+        for row in rows:
+            data = None
+            if row.op == 'upsert':
+                obj = loaded[row.entity].get(row.entity_id)
+                if obj is None:
+                    # Deleted since this page was read; its tombstone has a later seq
+                    continue
+                data = obj.to_dict()
+            changes.append({**row.to_dict(), 'data': data})
+
+        return {
+            'changes': changes,
+            'token': rows[-1].seq if rows else since,
+            'has_more': has_more
+        }
+
+    @staticmethod
+    def backfill() -> int:
+        """Log an upsert for every synced row that has no change log entry yet. Caller commits."""
+        total = 0
+        for entity, model in ENTITIES.items():
+            missing = db.session.execute(
+                select(model.user_id, model.id)
+                .where(~select(SyncChange.id).where(
+                    SyncChange.user_id == model.user_id,
+                    SyncChange.entity == entity,
+                    SyncChange.entity_id == model.id
+                ).exists())
+                .order_by(model.user_id, model.id)
+            ).all()
+            total += SyncLog.record((user_id, entity, entity_id, 'upsert') for user_id, entity_id in missing)
+        return total
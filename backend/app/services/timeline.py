@@ -0,0 +1,119 @@
+"""
+Timeline Service
+Pages through a user's activities, meals and goal milestones as one time-ordered stream.
+
+Each source contributes one branch of a single UNION ALL query. A branch is a
+keyset range scan on its (user_id, <time>, id) index, limited to one page, so
+the database k-way merges at most sources x page rows. Every page costs the
+same no matter how deep into history it is. Items are ordered by
+(time desc, source rank, id desc); the cursor is the last item's key.
+"""
+import base64
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import and_, literal, or_, select, union_all
+from app import db
+from app.models import Activity, Goal, Nutrition
+from app.services import local_time
+
+
+# (item type, model, timestamp column); position in this tuple is the tie-break rank
+SOURCES = (
+    ('activity', Activity, Activity.date),
+    ('meal', Nutrition, Nutrition.date),
+    ('goal_created', Goal, Goal.created_at),
+    ('goal_completed', Goal, Goal.completed_at),
+)
+TYPES = tuple(kind for kind, _, _ in SOURCES)
+
+
+class Timeline:
+    """
+    Keyset-paginated merge over the timeline sources.
+    """
+
+    @staticmethod
+    def encode_cursor(moment: datetime, rank: int, item_id: int) -> str:
+        raw = f'{moment.isoformat()}|{rank}|{item_id}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int, int]:
+        """Raises ValueError for a malformed cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            moment, rank, item_id = raw.split('|')
+            return datetime.fromisoformat(moment), int(rank), int(item_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+
+    @staticmethod
+    def _branch(rank, model, column, user_id, after, limit):
+        query = select(
+            literal(rank).label('rank'), model.id.label('id'), column.label('moment')
+        ).where(model.user_id == user_id, column.isnot(None))
+
+        if after is not None:
+            moment, after_rank, after_id = after
+            # Rows ordered after the cursor: strictly older, or same time and later in (rank, id desc)
+            if rank < after_rank:
+                query = query.where(column < moment)
+            elif rank == after_rank:
+                query = query.where(or_(column < moment, and_(column == moment, model.id < after_id)))
+            else:
+                query = query.where(column <= moment)
+
+        return select(query.order_by(column.desc(), model.id.desc()).limit(limit).subquery())
+
+    @staticmethod
+    def page(user_id, cursor: Optional[str] = None, limit: int = 50, types=None) -> Dict[str, Any]:
+        """
+        One page of the merged timeline, newest first.
+
+        Returns items plus next_cursor (None on the last page).
+        Raises ValueError for a malformed cursor.
+        """
+        after = Timeline.decode_cursor(cursor) if cursor else None
+
+        branches = [
+            Timeline._branch(rank, model, column, user_id, after, limit + 1)
+            for rank, (kind, model, column) in enumerate(SOURCES)
+            if not types or kind in types
+        ]
+        merged = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery()
+        rows = db.session.execute(
+            select(merged).order_by(merged.c.moment.desc(), merged.c.rank, merged.c.id.desc()).limit(limit + 1)
+        ).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # One IN query per model to load the page's rows
+        ids_by_model = defaultdict(set)
+        for row in rows:
+            ids_by_model[SOURCES[row.rank][1]].add(row.id)
+        loaded = {
+            model: {obj.id: obj for obj in model.query.filter(model.id.in_(ids))}
+            for model, ids in ids_by_model.items()
+        }
+
+        tz_name = local_time.timezone_for(user_id) if Goal in loaded else None
+        items = []
+        for row in rows:
+            kind, model, _ = SOURCES[row.rank]
+            obj = loaded[model][row.id]
+            local_date = getattr(obj, 'local_date', None) or local_time.local_date_for(row.moment, tz_name)
+            items.append({
+                'type': kind,
+                'date': row.moment.isoformat(),
+                'local_date': local_date.isoformat(),
+                'item': obj.to_dict()
+            })
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = Timeline.encode_cursor(last.moment, last.rank, last.id)
+
+        return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
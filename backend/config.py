@@ -15,6 +15,21 @@ class Config:
     
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     
+    # Overall time budget for a coach chat request, including any hedged LLM calls
+    AI_CHAT_TIMEOUT_SECONDS = float(os.environ.get('AI_CHAT_TIMEOUT_SECONDS', 30))
+    
+    # Wearable ingest buffer: events per request, and the unconsumed-event depths at
+    # which devices are asked to slow down (soft) or refused with 503 (hard)
+    INGEST_MAX_BATCH = int(os.environ.get('INGEST_MAX_BATCH', 1000))
+    INGEST_SOFT_LIMIT = int(os.environ.get('INGEST_SOFT_LIMIT', 50000))
+    INGEST_HARD_LIMIT = int(os.environ.get('INGEST_HARD_LIMIT', 200000))
+    INGEST_RETRY_AFTER_SLOW = 5
+    INGEST_RETRY_AFTER_FULL = 30
+    INGEST_RETENTION_HOURS = int(os.environ.get('INGEST_RETENTION_HOURS', 24))
+    
+    # How long shared caches may reuse public GETs (community posts, challenges); browsers always revalidate
+    PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', 60))
+    
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     UPLOAD_FOLDER = 'uploads'
     
@@ -0,0 +1,173 @@
+"""baseline schema
+
+Tables as db.create_all() built them before migrations were added. Databases
+created that way already have them, so each table is created only if missing
+and `flask db upgrade` can run on them without stamping first.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('challenges'):
+        op.create_table('challenges',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('challenge_type', sa.String(length=50), nullable=False),
+            sa.Column('target_value', sa.Float(), nullable=False),
+            sa.Column('unit', sa.String(length=50), nullable=True),
+            sa.Column('start_date', sa.DateTime(), nullable=False),
+            sa.Column('end_date', sa.DateTime(), nullable=False),
+            sa.Column('participants_count', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('users'):
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('first_name', sa.String(length=50), nullable=True),
+            sa.Column('last_name', sa.String(length=50), nullable=True),
+            sa.Column('age', sa.Integer(), nullable=True),
+            sa.Column('gender', sa.String(length=20), nullable=True),
+            sa.Column('height_feet', sa.Integer(), nullable=True),
+            sa.Column('height_inches', sa.Integer(), nullable=True),
+            sa.Column('weight_lbs', sa.Integer(), nullable=True),
+            sa.Column('fitness_level', sa.String(length=20), nullable=True),
+            sa.Column('activity_level', sa.String(length=30), nullable=True),
+            sa.Column('target_weight_lbs', sa.Integer(), nullable=True),
+            sa.Column('weight_goal_rate', sa.Float(), nullable=True),
+            sa.Column('daily_calorie_goal', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    if not _has_table('activities'):
+        op.create_table('activities',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('activity_type', sa.String(length=50), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('duration_minutes', sa.Integer(), nullable=True),
+            sa.Column('distance', sa.Float(), nullable=True),
+            sa.Column('calories_burned', sa.Integer(), nullable=True),
+            sa.Column('intensity', sa.String(length=20), nullable=True),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('challenge_participants'):
+        op.create_table('challenge_participants',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('challenge_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('joined_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['challenge_id'], ['challenges.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('challenge_id', 'user_id', name='unique_challenge_participant')
+        )
+    if not _has_table('community_posts'):
+        op.create_table('community_posts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('post_type', sa.String(length=50), nullable=True),
+            sa.Column('likes_count', sa.Integer(), nullable=True),
+            sa.Column('comments_count', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('goals'):
+        op.create_table('goals',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('goal_type', sa.String(length=50), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('target_value', sa.Float(), nullable=False),
+            sa.Column('current_value', sa.Float(), nullable=True),
+            sa.Column('unit', sa.String(length=50), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('start_date', sa.DateTime(), nullable=False),
+            sa.Column('target_date', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('nutrition'):
+        op.create_table('nutrition',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('meal_type', sa.String(length=50), nullable=False),
+            sa.Column('food_name', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('calories', sa.Integer(), nullable=False),
+            sa.Column('protein', sa.Float(), nullable=True),
+            sa.Column('carbohydrates', sa.Float(), nullable=True),
+            sa.Column('fats', sa.Float(), nullable=True),
+            sa.Column('fiber', sa.Float(), nullable=True),
+            sa.Column('serving_size', sa.String(length=50), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=True),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('comments'):
+        op.create_table('comments',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('post_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['post_id'], ['community_posts.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('post_likes'):
+        op.create_table('post_likes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('post_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['post_id'], ['community_posts.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('post_id', 'user_id', name='unique_post_like')
+        )
+
+
+def downgrade():
+    for table in ('post_likes', 'comments', 'nutrition', 'goals', 'community_posts',
+                  'challenge_participants', 'activities', 'users', 'challenges'):
+        op.drop_table(table)
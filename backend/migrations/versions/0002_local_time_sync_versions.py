@@ -0,0 +1,329 @@
+"""local dates, derived data, ingest, sync and cache versions
+
+Tables and columns added since the baseline: local dates and timezones,
+stored calorie targets, data and resource versions, goal forecasts and
+periods, saved meals, weight logs, activity streams, the ingest log, personal
+records, frequent foods and the sync change log.
+
+Every step is skipped when its table, column or index already exists, since
+create_app still runs db.create_all() and creates new tables on startup.
+After upgrading an existing database, fill the new derived data with:
+
+    flask backfill-local-dates
+    flask recompute-calorie-targets
+    flask estimate-activity-calories
+    flask recompute-goal-progress
+    flask rebuild-activity-calendars
+    flask rebuild-personal-records
+    flask rebuild-frequent-foods
+    flask rebuild-tdee-estimates
+    flask backfill-sync-log
+
+Revision ID: 0002_local_time_sync_versions
+Revises: 0001_baseline
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_local_time_sync_versions'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+# (table, column) added to tables that existed at the baseline
+NEW_COLUMNS = [
+    ('users', sa.Column('timezone', sa.String(length=64), nullable=True)),
+    ('users', sa.Column('bmr', sa.Integer(), nullable=True)),
+    ('users', sa.Column('tdee', sa.Integer(), nullable=True)),
+    ('users', sa.Column('target_calories', sa.Integer(), nullable=True)),
+    ('users', sa.Column('calorie_profile_fingerprint', sa.String(length=16), nullable=True)),
+    ('users', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False)),
+    ('users', sa.Column('sync_seq', sa.Integer(), server_default='0', nullable=False)),
+    ('users', sa.Column('activities_version', sa.Integer(), server_default='0', nullable=False)),
+    ('users', sa.Column('nutrition_version', sa.Integer(), server_default='0', nullable=False)),
+    ('users', sa.Column('goals_version', sa.Integer(), server_default='0', nullable=False)),
+    ('users', sa.Column('weight_version', sa.Integer(), server_default='0', nullable=False)),
+    ('activities', sa.Column('calories_estimated', sa.Boolean(), server_default=sa.false(), nullable=False)),
+    ('activities', sa.Column('external_id', sa.String(length=100), nullable=True)),
+    ('activities', sa.Column('local_date', sa.Date(), nullable=True)),
+    ('nutrition', sa.Column('saved_meal_id', sa.Integer(), nullable=True)),
+    ('nutrition', sa.Column('local_date', sa.Date(), nullable=True)),
+    ('goals', sa.Column('period_start', sa.Date(), nullable=True)),
+    ('goals', sa.Column('progress_points', sa.Integer(), server_default='0', nullable=False)),
+    ('goals', sa.Column('sum_t', sa.Float(), server_default='0', nullable=False)),
+    ('goals', sa.Column('sum_v', sa.Float(), server_default='0', nullable=False)),
+    ('goals', sa.Column('sum_tt', sa.Float(), server_default='0', nullable=False)),
+    ('goals', sa.Column('sum_tv', sa.Float(), server_default='0', nullable=False)),
+]
+
+# (name, table, columns) added to tables that existed at the baseline
+NEW_INDEXES = [
+    ('ix_activities_user_date_id', 'activities', ['user_id', 'date', 'id']),
+    ('ix_activities_user_external_id', 'activities', ['user_id', 'external_id']),
+    ('ix_activities_user_local_date', 'activities', ['user_id', 'local_date']),
+    ('ix_goals_user_completed', 'goals', ['user_id', 'completed_at', 'id']),
+    ('ix_goals_user_created', 'goals', ['user_id', 'created_at', 'id']),
+    ('ix_goals_user_status_type', 'goals', ['user_id', 'status', 'goal_type']),
+    ('ix_nutrition_user_date_id', 'nutrition', ['user_id', 'date', 'id']),
+    ('ix_nutrition_user_local_date', 'nutrition', ['user_id', 'local_date']),
+]
+
+# Sync clients hold ids of deleted rows as tombstones; SQLite only stops reusing ids with AUTOINCREMENT
+AUTOINCREMENT_TABLES = ('activities', 'nutrition', 'goals')
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table, column):
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _has_index(table, name):
+    return name in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _has_autoincrement(table):
+    sql = op.get_bind().execute(
+        sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).scalar()
+    return 'AUTOINCREMENT' in (sql or '').upper()
+
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    if not _has_table('ingest_cursors'):
+        op.create_table('ingest_cursors',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('last_event_id', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+    if not _has_table('activity_calendars'):
+        op.create_table('activity_calendars',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('origin', sa.Date(), nullable=True),
+            sa.Column('bits', sa.LargeBinary(), nullable=False),
+            sa.Column('active_days', sa.Integer(), nullable=False),
+            sa.Column('last_active_date', sa.Date(), nullable=True),
+            sa.Column('last_run_length', sa.Integer(), nullable=False),
+            sa.Column('longest_streak', sa.Integer(), nullable=False),
+            sa.Column('longest_streak_end', sa.Date(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    if not _has_table('daily_wearable_summaries'):
+        op.create_table('daily_wearable_summaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('local_date', sa.Date(), nullable=False),
+            sa.Column('steps', sa.Integer(), nullable=False),
+            sa.Column('resting_heart_rate', sa.Integer(), nullable=True),
+            sa.Column('avg_heart_rate', sa.Float(), nullable=True),
+            sa.Column('heart_rate_samples', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'local_date', name='uq_daily_wearable_user_date')
+        )
+    if not _has_table('frequent_foods'):
+        op.create_table('frequent_foods',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('food_key', sa.String(length=200), nullable=False),
+            sa.Column('food_name', sa.String(length=200), nullable=False),
+            sa.Column('meal_type', sa.String(length=50), nullable=True),
+            sa.Column('calories', sa.Integer(), nullable=False),
+            sa.Column('protein', sa.Float(), nullable=True),
+            sa.Column('carbohydrates', sa.Float(), nullable=True),
+            sa.Column('fats', sa.Float(), nullable=True),
+            sa.Column('fiber', sa.Float(), nullable=True),
+            sa.Column('serving_size', sa.String(length=50), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=True),
+            sa.Column('log_score', sa.Float(), nullable=False),
+            sa.Column('times_logged', sa.Integer(), nullable=False),
+            sa.Column('last_logged_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'food_key', name='uq_frequent_foods_user_key')
+        )
+        op.create_index('ix_frequent_foods_user_score', 'frequent_foods', ['user_id', 'log_score'], unique=False)
+    if not _has_table('ingest_events'):
+        op.create_table('ingest_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('device_id', sa.String(length=100), nullable=True),
+            sa.Column('event_type', sa.String(length=20), nullable=False),
+            sa.Column('external_id', sa.String(length=100), nullable=True),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('event_time', sa.DateTime(), nullable=False),
+            sa.Column('local_date', sa.Date(), nullable=False),
+            sa.Column('received_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sqlite_autoincrement=True
+        )
+        op.create_index('ix_ingest_events_user_external_id', 'ingest_events', ['user_id', 'external_id'], unique=False)
+    if not _has_table('personal_records'):
+        op.create_table('personal_records',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('record_type', sa.String(length=40), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.Column('activity_id', sa.Integer(), nullable=True),
+            sa.Column('period_start', sa.Date(), nullable=True),
+            sa.Column('achieved_on', sa.Date(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'record_type', name='uq_personal_records_user_type')
+        )
+    if not _has_table('saved_meals'):
+        op.create_table('saved_meals',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=200), nullable=False),
+            sa.Column('meal_type', sa.String(length=50), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('total_calories', sa.Integer(), nullable=False),
+            sa.Column('total_protein', sa.Float(), nullable=False),
+            sa.Column('total_carbohydrates', sa.Float(), nullable=False),
+            sa.Column('total_fats', sa.Float(), nullable=False),
+            sa.Column('total_fiber', sa.Float(), nullable=False),
+            sa.Column('item_count', sa.Integer(), nullable=False),
+            sa.Column('times_logged', sa.Integer(), nullable=False),
+            sa.Column('last_logged_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_saved_meals_user_id'), 'saved_meals', ['user_id'], unique=False)
+    if not _has_table('sync_changes'):
+        op.create_table('sync_changes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('seq', sa.Integer(), nullable=False),
+            sa.Column('entity', sa.String(length=20), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('op', sa.String(length=10), nullable=False),
+            sa.Column('changed_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'entity', 'entity_id', name='uq_sync_changes_user_entity')
+        )
+        op.create_index('ix_sync_changes_user_seq', 'sync_changes', ['user_id', 'seq'], unique=False)
+    if not _has_table('tdee_estimates'):
+        op.create_table('tdee_estimates',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('trend_weight', sa.Float(), nullable=True),
+            sa.Column('tdee', sa.Float(), nullable=True),
+            sa.Column('tdee_variance', sa.Float(), nullable=True),
+            sa.Column('observations', sa.Integer(), nullable=False),
+            sa.Column('first_weight_date', sa.Date(), nullable=True),
+            sa.Column('last_weight_date', sa.Date(), nullable=True),
+            sa.Column('intake_calories', sa.Float(), nullable=False),
+            sa.Column('intake_days', sa.Integer(), nullable=False),
+            sa.Column('last_intake_date', sa.Date(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    if not _has_table('weight_logs'):
+        op.create_table('weight_logs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('weight_lbs', sa.Float(), nullable=False),
+            sa.Column('note', sa.String(length=200), nullable=True),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            sa.Column('local_date', sa.Date(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_weight_logs_user_local_date', 'weight_logs', ['user_id', 'local_date'], unique=False)
+    if not _has_table('activity_streams'):
+        op.create_table('activity_streams',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('activity_id', sa.Integer(), nullable=False),
+            sa.Column('channel', sa.String(length=20), nullable=False),
+            sa.Column('level', sa.Integer(), nullable=False),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            sa.Column('scale', sa.Float(), nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.ForeignKeyConstraint(['activity_id'], ['activities.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('activity_id', 'level', 'channel', name='uq_activity_streams_channel')
+        )
+    if not _has_table('goal_progress_events'):
+        op.create_table('goal_progress_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('goal_id', sa.Integer(), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.Column('delta', sa.Float(), nullable=True),
+            sa.Column('source', sa.String(length=20), nullable=False),
+            sa.Column('recorded_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['goal_id'], ['goals.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_goal_progress_events_goal_recorded', 'goal_progress_events', ['goal_id', 'recorded_at'], unique=False)
+    if not _has_table('saved_meal_items'):
+        op.create_table('saved_meal_items',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('meal_id', sa.Integer(), nullable=False),
+            sa.Column('position', sa.Integer(), nullable=False),
+            sa.Column('food_name', sa.String(length=200), nullable=False),
+            sa.Column('serving_size', sa.String(length=50), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=False),
+            sa.Column('calories', sa.Float(), nullable=False),
+            sa.Column('protein', sa.Float(), nullable=True),
+            sa.Column('carbohydrates', sa.Float(), nullable=True),
+            sa.Column('fats', sa.Float(), nullable=True),
+            sa.Column('fiber', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['meal_id'], ['saved_meals.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_saved_meal_items_meal_id'), 'saved_meal_items', ['meal_id'], unique=False)
+
+    for table, column in NEW_COLUMNS:
+        if not _has_column(table, column.name):
+            op.add_column(table, column)
+    for name, table, columns in NEW_INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns, unique=False)
+
+    if not any(fk['referred_table'] == 'saved_meals' for fk in sa.inspect(op.get_bind()).get_foreign_keys('nutrition')):
+        # Batch mode rebuilds the table on SQLite, which cannot add a foreign key in place
+        with op.batch_alter_table('nutrition') as batch:
+            batch.create_foreign_key('fk_nutrition_saved_meal_id', 'saved_meals', ['saved_meal_id'], ['id'])
+
+    if sqlite:
+        for table in AUTOINCREMENT_TABLES:
+            if not _has_autoincrement(table):
+                with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+                    pass
+
+    op.execute("UPDATE users SET timezone = 'UTC' WHERE timezone IS NULL")
+
+
+def downgrade():
+    for name, table, columns in NEW_INDEXES:
+        op.drop_index(name, table_name=table)
+    dropped = {}
+    for table, column in NEW_COLUMNS:
+        dropped.setdefault(table, []).append(column.name)
+    for table, names in dropped.items():
+        with op.batch_alter_table(table) as batch:
+            for name in names:
+                batch.drop_column(name)
+    for table in ('saved_meal_items', 'goal_progress_events', 'activity_streams', 'weight_logs',
+                  'tdee_estimates', 'sync_changes', 'saved_meals', 'personal_records', 'ingest_events',
+                  'frequent_foods', 'daily_wearable_summaries', 'activity_calendars', 'ingest_cursors'):
+        op.drop_table(table)
@@ -0,0 +1,30 @@
+"""profile version
+
+Adds users.profile_version, which versions 'profile' ETags in place of
+updated_at (see services.http_cache).
+
+Revision ID: 0003_profile_version
+Revises: 0002_local_time_sync_versions
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_profile_version'
+down_revision = '0002_local_time_sync_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'profile_version' not in columns:
+        op.add_column('users', sa.Column('profile_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('profile_version')
@@ -0,0 +1,30 @@
+"""goal auto completion flag
+
+Adds goals.auto_completed, set while a goal is completed because the goal
+tracker saw it reach its target (see services.goal_tracker).
+
+Revision ID: 0004_goal_auto_completed
+Revises: 0003_profile_version
+Create Date: 2026-10-19 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_goal_auto_completed'
+down_revision = '0003_profile_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('goals')}
+    if 'auto_completed' not in columns:
+        op.add_column('goals', sa.Column('auto_completed', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('goals') as batch:
+        batch.drop_column('auto_completed')
@@ -1,7 +1,23 @@
 import sys
 import os
+import math
+import time
+import click
+from datetime import timedelta
+import numpy as np
+from sqlalchemy import bindparam
 from app import create_app, db
-from app.models import User, Activity, Nutrition, Goal, CommunityPost, Challenge
+from app.models import User, Activity, Nutrition, Goal, WeightLog, CommunityPost, Challenge
+from app.services import local_time
+from app.services.adaptive_tdee import AdaptiveTdee
+from app.services.calorie_calculator import CalorieCalculator
+from app.services.frequent_foods import FrequentFoods
+from app.services.goal_tracker import GoalTracker
+from app.services.ingest import IngestConsumer
+from app.services.met_estimator import MetEstimator
+from app.services.personal_records import PersonalRecords
+from app.services.streaks import StreakTracker
+from app.services.sync import SyncLog
 
 app = create_app()
 
@@ -14,6 +30,7 @@ def make_shell_context():
         'Activity': Activity,
         'Nutrition': Nutrition,
         'Goal': Goal,
+        'WeightLog': WeightLog,
         'CommunityPost': CommunityPost,
         'Challenge': Challenge
     }
@@ -33,6 +50,263 @@ def drop_db():
     print('Database dropped!')
 
 
+@app.cli.command()
+@click.option('--chunk-size', default=10000, show_default=True, help='Users loaded and written per transaction.')
+def recompute_calorie_targets(chunk_size):
+    """Recompute stored BMR, TDEE and target calories for every user."""
+    started = time.perf_counter()
+    last_id, total = 0, 0
+    
+    users = User.__table__
+    # updated_at is pinned so derived-value refreshes don't look like profile edits, but
+    # profile_version moves so cached calorie-balance and summary responses revalidate
+    recompute_statement = users.update().where(users.c.id == bindparam('b_id')).values(
+        bmr=bindparam('b_bmr'), tdee=bindparam('b_tdee'), target_calories=bindparam('b_target'),
+        calorie_profile_fingerprint=bindparam('b_fingerprint'), updated_at=users.c.updated_at,
+        profile_version=users.c.profile_version + 1
+    )
+    
+    while True:
+        rows = db.session.query(
+            User.id, User.weight_lbs, User.height_feet, User.height_inches, User.age,
+            User.gender, User.activity_level, User.weight_goal_rate
+        ).filter(User.id > last_id).order_by(User.id).limit(chunk_size).all()
+        
+        if not rows:
+            break
+        
+        ids, weight, feet, inches, age, gender, activity_level, rate = zip(*rows)
+        fingerprints = [CalorieCalculator.profile_fingerprint(row) for row in rows]
+        feet = np.array(feet, dtype=float)
+        inches = np.array(inches, dtype=float)
+        
+        result = CalorieCalculator.calculate_batch(
+            weight,
+            feet * 12 + inches,
+            age,
+            [CalorieCalculator.gender_code(g) for g in gender],
+            [CalorieCalculator.activity_multiplier(a) for a in activity_level],
+            rate
+        )
+        
+        columns = [result['bmr'], result['tdee'], result['target_calories']]
+        values = [[None if math.isnan(v) else int(v) for v in column.tolist()] for column in columns]
+        # Core executemany: skips the ORM's per-row bookkeeping, which dominates at this scale
+        db.session.execute(recompute_statement, [
+            {'b_id': user_id, 'b_bmr': bmr, 'b_tdee': tdee, 'b_target': target, 'b_fingerprint': fingerprint}
+            for user_id, fingerprint, bmr, tdee, target in zip(ids, fingerprints, *values)
+        ])
+        db.session.commit()
+        
+        last_id = ids[-1]
+        total += len(ids)
+        print(f'  {total} users recomputed')
+    
+    print(f'Recomputed calorie targets for {total} users in {time.perf_counter() - started:.1f}s')
+
+
+@app.cli.command()
+@click.option('--chunk-size', default=5000, show_default=True, help='Entries written per transaction.')
+def backfill_local_dates(chunk_size):
+    """Fill local_date on activity and nutrition entries logged before it existed."""
+    zones = dict(db.session.query(User.id, User.timezone).all())
+    
+    for entity, model in (('activity', Activity), ('nutrition', Nutrition)):
+        table = model.__table__
+        statement = table.update().where(table.c.id == bindparam('b_id')).values(local_date=bindparam('b_local_date'))
+        total = 0
+        
+        while True:
+            rows = db.session.query(model.id, model.user_id, model.date).filter(
+                model.local_date.is_(None)
+            ).order_by(model.id).limit(chunk_size).all()
+            
+            if not rows:
+                break
+            
+            db.session.execute(statement, [
+                {'b_id': entry_id, 'b_local_date': local_time.local_date_for(entry_date, zones.get(user_id))}
+                for entry_id, user_id, entry_date in rows
+            ])
+            SyncLog.record((user_id, entity, entry_id, 'upsert') for entry_id, user_id, _ in rows)
+            db.session.commit()
+            total += len(rows)
+        
+        print(f'Backfilled local_date on {total} {table.name} rows')
+
+
+@app.cli.command()
+@click.option('--chunk-size', default=50000, show_default=True, help='Activities estimated and written per transaction.')
+@click.option('--refresh', is_flag=True, help='Also re-estimate calories that were estimated earlier.')
+def estimate_activity_calories(chunk_size, refresh):
+    """Fill missing calories_burned on activities from the MET estimator."""
+    started = time.perf_counter()
+    last_id, total = 0, 0
+    user_ids = set()
+    
+    activities = Activity.__table__
+    statement = activities.update().where(activities.c.id == bindparam('b_id')).values(
+        calories_burned=bindparam('b_calories'), calories_estimated=True
+    )
+    pending = Activity.calories_burned.is_(None)
+    if refresh:
+        pending = pending | Activity.calories_estimated.is_(True)
+    
+    while True:
+        rows = db.session.query(
+            Activity.id, Activity.user_id, Activity.activity_type, Activity.intensity,
+            Activity.duration_minutes, Activity.distance, User.weight_lbs
+        ).join(User, User.id == Activity.user_id).filter(
+            Activity.id > last_id, Activity.duration_minutes > 0, pending
+        ).order_by(Activity.id).limit(chunk_size).all()
+        
+        if not rows:
+            break
+        
+        ids, owners, types, intensities, minutes, distance, weight = zip(*rows)
+        type_codes = {value: MetEstimator.type_code(value) for value in set(types)}
+        intensity_codes = {value: MetEstimator.intensity_code(value) for value in set(intensities)}
+        
+        calories = MetEstimator.estimate_batch(
+            [type_codes[value] for value in types],
+            [intensity_codes[value] for value in intensities],
+            minutes, weight, distance
+        )
+        db.session.execute(statement, [
+            {'b_id': activity_id, 'b_calories': int(value)} for activity_id, value in zip(ids, calories.tolist())
+        ])
+        SyncLog.record((user_id, 'activity', activity_id, 'upsert') for activity_id, user_id in zip(ids, owners))
+        db.session.commit()
+        
+        user_ids.update(owners)
+        last_id = ids[-1]
+        total += len(ids)
+        print(f'  {total} activities estimated')
+    
+    # Calorie goals and records read calories_burned, so bring them in line with the new values
+    if total:
+        GoalTracker.recompute_all()
+        affected = sorted(user_ids)
+        for start in range(0, len(affected), 1000):
+            chunk = affected[start:start + 1000]
+            for user_id in chunk:
+                PersonalRecords.rebuild(user_id)
+            User.query.filter(User.id.in_(chunk)).update(
+                {User.data_version: User.data_version + 1, User.updated_at: User.updated_at}, synchronize_session=False
+            )
+            db.session.commit()
+    
+    print(f'Estimated calories for {total} activities of {len(user_ids)} users in {time.perf_counter() - started:.1f}s')
+
+
+@app.cli.command()
+def rebuild_tdee_estimates():
+    """Replay weight and intake history into every user's adaptive TDEE estimate."""
+    user_ids = [user_id for (user_id,) in db.session.query(WeightLog.user_id).distinct()]
+    
+    for count, user_id in enumerate(user_ids, 1):
+        AdaptiveTdee.rebuild(db.session.get(User, user_id))
+        if count % 500 == 0:
+            db.session.commit()
+    db.session.commit()
+    
+    print(f'Rebuilt adaptive TDEE estimates for {len(user_ids)} users')
+
+
+@app.cli.command()
+def recompute_goal_progress():
+    """Recompute current_value of every active metric-linked goal from logged entries."""
+    started = time.perf_counter()
+    updated = GoalTracker.recompute_all()
+    db.session.commit()
+    print(f'Recomputed progress for {updated} goals in {time.perf_counter() - started:.1f}s')
+
+
+@app.cli.command()
+def rebuild_activity_calendars():
+    """Rebuild every user's activity-day bitmap from their activities."""
+    user_ids = [user_id for (user_id,) in db.session.query(Activity.user_id).distinct()]
+    
+    for count, user_id in enumerate(user_ids, 1):
+        StreakTracker.rebuild(user_id)
+        if count % 1000 == 0:
+            db.session.commit()
+    db.session.commit()
+    
+    print(f'Rebuilt activity calendars for {len(user_ids)} users')
+
+
+@app.cli.command()
+def rebuild_personal_records():
+    """Recompute every user's personal records from their activities."""
+    user_ids = [user_id for (user_id,) in db.session.query(Activity.user_id).distinct()]
+    
+    for count, user_id in enumerate(user_ids, 1):
+        PersonalRecords.rebuild(user_id)
+        if count % 1000 == 0:
+            db.session.commit()
+    db.session.commit()
+    
+    print(f'Rebuilt personal records for {len(user_ids)} users')
+
+
+@app.cli.command()
+def rebuild_frequent_foods():
+    """Rebuild every user's frequent-foods index from their nutrition entries."""
+    user_ids = [user_id for (user_id,) in db.session.query(Nutrition.user_id).distinct()]
+    
+    foods = 0
+    for count, user_id in enumerate(user_ids, 1):
+        foods += FrequentFoods.rebuild(user_id)
+        if count % 1000 == 0:
+            db.session.commit()
+    db.session.commit()
+    
+    print(f'Rebuilt {foods} frequent foods for {len(user_ids)} users')
+
+
+@app.cli.command()
+def backfill_sync_log():
+    """Add sync change log entries for activities, nutrition entries and goals written before it existed."""
+    total = SyncLog.backfill()
+    db.session.commit()
+    print(f'Logged {total} existing entries for sync')
+
+
+@app.cli.command()
+@click.option('--batch-size', default=5000, show_default=True, help='Events materialized per transaction.')
+@click.option('--follow', is_flag=True, help='Keep polling for new events instead of exiting once drained.')
+@click.option('--interval', default=1.0, show_default=True, help='Seconds between polls when following.')
+def consume_ingest(batch_size, follow, interval):
+    """Materialize buffered wearable events into activities and daily rollups."""
+    retention = timedelta(hours=app.config['INGEST_RETENTION_HOURS'])
+    
+    while True:
+        started = time.perf_counter()
+        totals = {'events': 0, 'activities': 0, 'duplicates': 0, 'skipped': 0}
+        while True:
+            result = IngestConsumer.drain(batch_size)
+            if not result['events']:
+                break
+            for key in totals:
+                totals[key] += result[key]
+        
+        if totals['events']:
+            elapsed = time.perf_counter() - started
+            print(f"Consumed {totals['events']} events ({totals['activities']} activities, "
+                  f"{totals['duplicates']} duplicate workouts, {totals['skipped']} skipped) in {elapsed:.1f}s, "
+                  f"{totals['events'] / elapsed:.0f} events/s")
+        
+        pruned = IngestConsumer.prune(retention)
+        db.session.commit()
+        if pruned:
+            print(f'Pruned {pruned} consumed events')
+        
+        if not follow:
+            break
+        time.sleep(interval)
+
+
 if __name__ == '__main__':
     if len(sys.argv) > 1 and sys.argv[1] == 'init-db':
         with app.app_context():
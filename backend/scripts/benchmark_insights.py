@@ -0,0 +1,100 @@
+"""
+Benchmark /api/ai/insights pattern analysis for a heavy user.
+
+Seeds an in-memory database with a year of data (several workouts and meals per
+day) and times AIService.analyze_patterns for 30, 90 and 365 day windows.
+
+    python scripts/benchmark_insights.py [--workouts-per-day 4] [--meals-per-day 6]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+from app.models import User, Activity, Nutrition
+from app.services.ai_service import AIService
+from app.services.streaks import StreakTracker
+
+
+def seed(workouts_per_day, meals_per_day):
+    user = User(email='bench@example.com', username='bench', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    types = ['running', 'cycling', 'strength', 'swimming', 'yoga', 'cardio']
+    activity_rows, nutrition_rows = [], []
+    for day in range(365):
+        day_start = now - timedelta(days=day)
+        for _ in range(workouts_per_day):
+            moment = day_start - timedelta(minutes=random.randint(0, 600))
+            activity_rows.append({
+                'user_id': user.id, 'activity_type': random.choice(types), 'title': 'Workout',
+                'duration_minutes': random.randint(15, 90), 'calories_burned': random.randint(100, 800),
+                'intensity': 'moderate', 'date': moment, 'local_date': moment.date()
+            })
+        for _ in range(meals_per_day):
+            moment = day_start - timedelta(minutes=random.randint(0, 600))
+            nutrition_rows.append({
+                'user_id': user.id, 'meal_type': 'snack', 'food_name': 'Food',
+                'calories': random.randint(100, 900), 'protein': random.uniform(0, 50),
+                'date': moment, 'local_date': moment.date()
+            })
+
+    db.session.bulk_insert_mappings(Activity, activity_rows)
+    db.session.bulk_insert_mappings(Nutrition, nutrition_rows)
+    StreakTracker.rebuild(user.id)
+    db.session.commit()
+    return user, len(activity_rows), len(nutrition_rows)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workouts-per-day', type=int, default=4)
+    parser.add_argument('--meals-per-day', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user, activity_count, nutrition_count = seed(args.workouts_per_day, args.meals_per_day)
+        print(f"Seeded {activity_count} activities and {nutrition_count} nutrition logs\n")
+
+        service = AIService()
+        today = datetime.utcnow().date()  # bench user is on UTC
+        for days in (30, 90, 365):
+            total_ms = best_of(lambda: service.analyze_patterns(user, days), args.repeat)
+
+            start_date = today - timedelta(days=days - 1)
+            rows = db.session.query(
+                Activity.local_date, Activity.activity_type, Activity.duration_minutes, Activity.calories_burned
+            ).filter(Activity.user_id == user.id, Activity.local_date >= start_date).all()
+            meals = db.session.query(
+                Nutrition.local_date, Nutrition.calories, Nutrition.protein
+            ).filter(Nutrition.user_id == user.id, Nutrition.local_date >= start_date).all()
+
+            def compute():
+                activities = service._activity_columns(rows, today)
+                nutrition = service._nutrition_columns(meals, today)
+                service._analyze_activity_trends(activities, days)
+                service._analyze_nutrition_trends(nutrition)
+                service._analyze_consistency(user, today, days)
+
+            compute_ms = best_of(compute, args.repeat)
+            print(f"{days:>3} days: {len(rows):>5} activities, {len(meals):>5} meals | "
+                  f"end-to-end {total_ms:7.2f} ms | analysis only {compute_ms:6.2f} ms")
@@ -0,0 +1,46 @@
+"""
+Benchmark the meal plan optimizer.
+
+Times cold (uncached) 7-day plans across a range of calorie targets, goals and
+dietary preferences, then a cached lookup, and reports how many generated days
+landed within tolerance of their targets.
+
+    python scripts/benchmark_meal_plan.py [--days 7]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.meal_planner import MealPlanner
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    timings, days_total, days_within = [], 0, 0
+    for preference in MealPlanner.PREFERENCES:
+        for goal_key in MealPlanner.MACRO_SPLITS:
+            for target in range(1400, 3401, 250):
+                MealPlanner._build_plan.cache_clear()
+                started = time.perf_counter()
+                plan = MealPlanner.generate(target, goal_key, args.days, preference)
+                timings.append((time.perf_counter() - started) * 1000)
+                days_total += len(plan)
+                days_within += sum(day['within_tolerance'] for day in plan)
+
+    MealPlanner.generate(2400, 'general', args.days, 'none')
+    started = time.perf_counter()
+    for _ in range(100):
+        MealPlanner.generate(2400, 'general', args.days, 'none')
+    cached_ms = (time.perf_counter() - started) * 1000 / 100
+
+    timings.sort()
+    print(f"{len(timings)} cold {args.days}-day plans: "
+          f"median {timings[len(timings) // 2]:.2f} ms, max {timings[-1]:.2f} ms")
+    print(f"Cached plan lookup: {cached_ms:.3f} ms")
+    print(f"Days within tolerance: {days_within}/{days_total} ({days_within / days_total:.0%})")
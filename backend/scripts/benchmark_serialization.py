@@ -0,0 +1,130 @@
+"""
+Benchmark JSON serialization of list endpoints.
+
+Stores synthetic activities and encodes the list three ways: ORM objects
+through a hand-written to_dict and the stdlib encoder (the previous path),
+ORM objects through the compiled serializer and orjson, and plain result
+tuples through the serializer and orjson (what GET /api/activities does now).
+Each is timed for serialize+encode alone and with the query included.
+
+    python scripts/benchmark_serialization.py [--rows 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app, db
+from app.models import User, Activity
+
+TYPES = ('running', 'cycling', 'swimming', 'strength', 'yoga')
+
+
+def legacy_to_dict(activity):
+    """Activity.to_dict as it was before the compiled serializers, over the serializer's fields."""
+    values = {
+        'id': activity.id,
+        'user_id': activity.user_id,
+        'activity_type': activity.activity_type,
+        'title': activity.title,
+        'description': activity.description,
+        'duration_minutes': activity.duration_minutes,
+        'distance': activity.distance,
+        'calories_burned': activity.calories_burned,
+        'calories_estimated': bool(activity.calories_estimated),
+        'intensity': activity.intensity,
+        'date': activity.date.isoformat() if activity.date else None,
+        'local_date': activity.local_date.isoformat() if activity.local_date else None,
+        'created_at': activity.created_at.isoformat() if activity.created_at else None
+    }
+    # Keyed by the serializer's field list so the comparison follows it
+    return {key: values[key] for key in Activity.serializer.keys}
+
+
+def best_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(7)
+    app = create_app()
+    stdlib = DefaultJSONProvider(app)
+    fast = app.json
+
+    with app.app_context():
+        user = User(email='bench@example.com', username='bench', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+
+        start = datetime(2024, 1, 1, 6, 0, 0)
+        db.session.execute(Activity.__table__.insert(), [
+            {
+                'user_id': user.id,
+                'activity_type': random.choice(TYPES),
+                'title': f'Workout {n}',
+                'description': 'Synthetic activity' if n % 3 else None,
+                'duration_minutes': random.randint(15, 120),
+                'distance': round(random.uniform(1, 40), 2) if n % 2 else None,
+                'calories_burned': random.randint(100, 1200),
+                'calories_estimated': bool(n % 4),
+                'intensity': 'moderate',
+                'date': start + timedelta(minutes=37 * n, microseconds=n),
+                'local_date': (start + timedelta(minutes=37 * n)).date(),
+                'created_at': start + timedelta(minutes=37 * n, seconds=5)
+            }
+            for n in range(args.rows)
+        ])
+        db.session.commit()
+
+        def query_objects():
+            return Activity.query.filter_by(user_id=user.id).order_by(Activity.date.desc()).all()
+
+        def query_rows():
+            return db.session.query(*Activity.serializer.columns).filter(
+                Activity.user_id == user.id
+            ).order_by(Activity.date.desc()).all()
+
+        paths = {
+            'to_dict + stdlib json': (query_objects, lambda objs: stdlib.dumps({
+                'activities': [legacy_to_dict(obj) for obj in objs], 'count': len(objs)
+            }, separators=(',', ':'))),
+            'serializer + orjson': (query_objects, lambda objs: fast.dumps({
+                'activities': [Activity.serializer.dump(obj) for obj in objs], 'count': len(objs)
+            })),
+            'tuple rows + orjson': (query_rows, lambda rows: fast.dumps({
+                'activities': Activity.serializer.rows(rows), 'count': len(rows)
+            })),
+        }
+
+        print(f'{args.rows} activities, best of {args.repeat}\n')
+        print(f"{'path':<24}{'encode ms':>12}{'with query ms':>16}{'bytes':>12}")
+        baseline = None
+        for name, (load, encode) in paths.items():
+            loaded = load()
+            body = encode(loaded)
+            decoded = fast.loads(body)
+            if baseline is None:
+                baseline = decoded
+            elif decoded != baseline:
+                raise SystemExit(f'{name} output differs from to_dict + stdlib json')
+
+            encode_ms = best_ms(lambda: encode(loaded), args.repeat)
+            total_ms = best_ms(lambda: encode(load()), args.repeat)
+            print(f'{name:<24}{encode_ms:>12.1f}{total_ms:>16.1f}{len(body):>12}')
@@ -0,0 +1,94 @@
+"""
+Benchmark activity stream storage and retrieval.
+
+Generates a synthetic 1 Hz GPX track (GPS, altitude, heart rate, cadence),
+parses and stores it, then reports stored size against a row-per-sample layout
+and the time to read it back at each resolution.
+
+    python scripts/benchmark_streams.py [--hours 4]
+"""
+import argparse
+import io
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+from app.models import User, Activity
+from app.services import activity_streams
+
+# A samples table with id, activity_id, timestamp and one 8-byte column per channel,
+# plus per-row and index overhead, is about this many bytes per point in PostgreSQL
+NAIVE_ROW_BYTES = 28 + 8 + 4 + 8 + 8 * 5 + 20
+
+
+def synthetic_gpx(hours):
+    start = datetime(2024, 5, 1, 7, 0, 0)
+    lat, lng, ele, hr = 47.6, -122.3, 40.0, 120.0
+    heading = 0.0
+    points = []
+    for second in range(int(hours * 3600)):
+        heading += random.uniform(-0.05, 0.05)
+        lat += math.cos(heading) * 2.8e-5
+        lng += math.sin(heading) * 4.1e-5
+        ele += random.uniform(-0.3, 0.3)
+        hr = min(185, max(95, hr + random.uniform(-1, 1)))
+        moment = (start + timedelta(seconds=second)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        points.append(
+            f'<trkpt lat="{lat:.7f}" lon="{lng:.7f}"><ele>{ele:.1f}</ele><time>{moment}</time>'
+            f'<extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>{round(hr)}</gpxtpx:hr>'
+            f'<gpxtpx:cad>{random.randint(84, 90)}</gpxtpx:cad></gpxtpx:TrackPointExtension></extensions></trkpt>'
+        )
+    return (
+        '<?xml version="1.0"?><gpx xmlns="http://www.topografix.com/GPX/1/1" '
+        'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1"><trk><trkseg>'
+        + ''.join(points) + '</trkseg></trk></gpx>'
+    ).encode('utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hours', type=float, default=4)
+    args = parser.parse_args()
+
+    random.seed(7)
+    payload = synthetic_gpx(args.hours)
+
+    app = create_app()
+    with app.app_context():
+        user = User(email='bench@example.com', username='bench', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        activity = Activity(user_id=user.id, activity_type='cardio', title='bench', date=datetime.utcnow())
+        db.session.add(activity)
+        db.session.flush()
+
+        started = time.perf_counter()
+        parsed = activity_streams.parse(io.BytesIO(payload), 'gpx')
+        parse_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        stored = activity_streams.save(activity, parsed['channels'])
+        db.session.commit()
+        save_ms = (time.perf_counter() - started) * 1000
+
+        samples = len(parsed['channels']['time'])
+        naive = samples * NAIVE_ROW_BYTES
+        print(f"{samples} samples, channels: {', '.join(sorted(parsed['channels']))}")
+        print(f"GPX {len(payload) / 1e6:.1f} MB | parse {parse_ms:.0f} ms | encode+store {save_ms:.0f} ms")
+        print(f"stored {stored / 1024:.1f} KiB ({stored / samples:.2f} B/sample) vs ~{naive / 1024:.0f} KiB "
+              f"row-per-sample ({stored / naive:.1%})\n")
+
+        for resolution, points in activity_streams.RESOLUTIONS.items():
+            timings = []
+            for _ in range(10):
+                started = time.perf_counter()
+                result = activity_streams.load(activity, points)
+                timings.append(time.perf_counter() - started)
+            print(f"{resolution:>6}: {result['series_size']:>6} points in {min(timings) * 1000:6.2f} ms")
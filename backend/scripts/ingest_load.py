@@ -0,0 +1,173 @@
+"""
+Load-test the wearable ingest endpoint with synthetic device traffic.
+
+Each worker thread plays a device pushing batches of step, heart-rate and workout
+events as fast as it is acknowledged. Reports acknowledged events/s, latency
+percentiles and how often backpressure kicked in, then (in-process mode) drains
+the buffer with the consumer and reports materialization throughput.
+
+    python scripts/ingest_load.py [--users 20] [--workers 8] [--seconds 10] [--batch 200]
+    python scripts/ingest_load.py --url http://127.0.0.1:5000   # against a running server
+
+In-process mode uses a throwaway SQLite file; pass --soft-limit/--hard-limit to
+see backpressure without waiting for a deep buffer.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKOUT_TYPES = ['running', 'cycling', 'walking', 'swimming', 'strength']
+
+
+def synthetic_batch(size, now):
+    events = []
+    for _ in range(size):
+        moment = (now - timedelta(minutes=random.randint(0, 60 * 24 * 7))).strftime('%Y-%m-%dT%H:%M:%S')
+        roll = random.random()
+        if roll < 0.7:
+            events.append({'type': 'steps', 'id': uuid.uuid4().hex, 'time': moment, 'count': random.randint(0, 400)})
+        elif roll < 0.97:
+            events.append({'type': 'heart_rate', 'id': uuid.uuid4().hex, 'time': moment,
+                           'average': random.randint(60, 150), 'resting': random.randint(50, 65),
+                           'samples': 60})
+        else:
+            events.append({'type': 'workout', 'id': uuid.uuid4().hex, 'time': moment,
+                           'activity_type': random.choice(WORKOUT_TYPES),
+                           'duration_minutes': random.randint(15, 90),
+                           'distance': round(random.uniform(1, 15), 2),
+                           'calories_burned': random.randint(100, 900)})
+    return events
+
+
+def run_workers(post, tokens, workers, seconds, batch):
+    statuses = Counter()
+    latencies, accepted = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        token = tokens[index % len(tokens)]
+        while time.perf_counter() < deadline:
+            events = synthetic_batch(batch, datetime.utcnow())
+            started = time.perf_counter()
+            status, body, retry_after = post(token, {'device_id': f'load-{index}', 'events': events})
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+                if status == 202:
+                    accepted[0] += body['accepted']
+                    statuses[f"202/{body['backpressure']}"] += 1
+            if retry_after:
+                # A real device would wait Retry-After; cap it so the test keeps moving
+                time.sleep(min(float(retry_after), 0.5))
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"{sum(v for k, v in statuses.items() if isinstance(k, int))} requests in {elapsed:.1f}s, "
+          f"{accepted[0]} events acknowledged ({accepted[0] / elapsed:.0f} events/s)")
+    print(f"latency p50 {percentile(0.5):.1f} ms | p95 {percentile(0.95):.1f} ms | p99 {percentile(0.99):.1f} ms")
+    print('responses: ' + ', '.join(f'{key}={value}' for key, value in sorted(statuses.items(), key=str)))
+
+
+def in_process(args):
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'ingest_load.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models import User
+    from app.services.ingest import IngestBuffer, IngestConsumer
+
+    app = create_app()
+    app.config['INGEST_SOFT_LIMIT'] = args.soft_limit
+    app.config['INGEST_HARD_LIMIT'] = args.hard_limit
+
+    with app.app_context():
+        users = [User(email=f'load{i}@example.com', username=f'load{i}', password_hash='x') for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = [create_access_token(identity=str(user.id)) for user in users]
+
+    local = threading.local()
+
+    def post(token, body):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        response = local.client.post('/api/ingest/events', json=body, headers={'Authorization': f'Bearer {token}'})
+        return response.status_code, response.get_json(), response.headers.get('Retry-After')
+
+    run_workers(post, tokens, args.workers, args.seconds, args.batch)
+
+    with app.app_context():
+        depth = IngestBuffer.depth()
+        started = time.perf_counter()
+        totals = Counter()
+        while True:
+            result = IngestConsumer.drain(args.consume_batch, settle_seconds=0)
+            if not result['events']:
+                break
+            totals.update({key: result[key] for key in ('events', 'activities', 'days')})
+        elapsed = time.perf_counter() - started
+        print(f"\nconsumer: {totals['events']} of {depth} buffered events -> {totals['activities']} activities, "
+              f"{totals['days']} day rollups touched in {elapsed:.1f}s ({totals['events'] / max(elapsed, 1e-9):.0f} events/s)")
+
+
+def against_server(args):
+    import requests
+
+    tokens = []
+    for index in range(args.users):
+        credentials = {'email': f'load{index}@example.com', 'password': 'load-test-password'}
+        response = requests.post(f'{args.url}/api/auth/login', json=credentials)
+        if response.status_code != 200:
+            response = requests.post(f'{args.url}/api/auth/register', json={**credentials, 'username': f'load{index}'})
+        tokens.append(response.json()['access_token'])
+
+    local = threading.local()
+
+    def post(token, body):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        response = local.session.post(f'{args.url}/api/ingest/events', json=body,
+                                      headers={'Authorization': f'Bearer {token}'})
+        return response.status_code, response.json(), response.headers.get('Retry-After')
+
+    run_workers(post, tokens, args.workers, args.seconds, args.batch)
+    print('\nRun `flask consume-ingest` to materialize the buffered events.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='Base URL of a running server; omit to run in-process')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--consume-batch', type=int, default=5000)
+    parser.add_argument('--soft-limit', type=int, default=50000)
+    parser.add_argument('--hard-limit', type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(11)
+    if args.url:
+        against_server(args)
+    else:
+        in_process(args)
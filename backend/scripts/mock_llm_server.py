@@ -0,0 +1,73 @@
+"""
+Fault-injecting mock of the chat completions endpoint.
+
+Point the backend at it to exercise the circuit breaker and hedged requests:
+
+    python scripts/mock_llm_server.py --port 8081 --fail-rate 0.3 --slow-rate 0.1 --slow-seconds 20
+    NVIDIA_API_URL=http://127.0.0.1:8081/v1/chat/completions NVIDIA_API_KEY=test python run.py
+
+Faults can also be changed at runtime without a restart:
+
+    curl -X POST 'http://127.0.0.1:8081/faults?fail_rate=1.0'
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+faults = {'fail_rate': 0.0, 'slow_rate': 0.0, 'slow_seconds': 20.0, 'latency': 0.2}
+
+
+class MockCompletionsHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if url.path == '/faults':
+            for key, values in parse_qs(url.query).items():
+                if key in faults:
+                    faults[key] = float(values[0])
+            return self._send(200, faults)
+
+        time.sleep(faults['latency'])
+        if random.random() < faults['slow_rate']:
+            time.sleep(faults['slow_seconds'])
+        if random.random() < faults['fail_rate']:
+            return self._send(503, {'error': 'injected failure'})
+
+        payload = json.loads(body or b'{}')
+        last_message = payload.get('messages', [{}])[-1].get('content', '')
+        return self._send(200, {
+            'choices': [{'message': {'role': 'assistant', 'content': f'Mock coach reply to: {last_message}'}}]
+        })
+
+    def _send(self, status, data):
+        encoded = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        print(f"[mock-llm] {self.address_string()} {format % args}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of requests delayed by --slow-seconds')
+    parser.add_argument('--slow-seconds', type=float, default=20.0)
+    parser.add_argument('--latency', type=float, default=0.2, help='base latency added to every request')
+    args = parser.parse_args()
+
+    faults.update(fail_rate=args.fail_rate, slow_rate=args.slow_rate,
+                  slow_seconds=args.slow_seconds, latency=args.latency)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), MockCompletionsHandler)
+    print(f"[mock-llm] Listening on http://127.0.0.1:{args.port}/v1/chat/completions with {faults}")
+    server.serve_forever()
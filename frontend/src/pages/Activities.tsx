@@ -19,6 +19,7 @@ const Activities: React.FC = () => {
 
   const activityTypeEmojis: Record<string, string> = {
     cardio: '🏃‍♂️',
+    running: '👟',
     strength: '💪',
     flexibility: '🧘',
     sports: '⚽',
@@ -219,14 +220,13 @@ const Activities: React.FC = () => {
                 />
               </div>
               <div>
-                <label className="label">Calories Burned *</label>
+                <label className="label">Calories Burned</label>
                 <input
                   type="number"
                   value={formData.calories_burned}
                   onChange={(e) => setFormData({ ...formData, calories_burned: e.target.value })}
                   className="input-field"
-                  placeholder="e.g., 250"
-                  required
+                  placeholder="Leave blank to estimate from duration"
                 />
               </div>
               <div>
@@ -271,6 +271,7 @@ const Activities: React.FC = () => {
                     className="input-field"
                   >
                     <option value="cardio">Cardio</option>
+                    <option value="running">Running</option>
                     <option value="strength">Strength Training</option>
                     <option value="flexibility">Flexibility</option>
                     <option value="sports">Sports</option>
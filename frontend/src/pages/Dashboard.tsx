@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { PieChart, Pie, Cell, Tooltip, ResponsiveContainer } from 'recharts';
 import Layout from '../components/Layout';
-import { activityService, nutritionService, goalService, aiService, dashboardService } from '../services/api';
+import { batchService } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 
 const Dashboard: React.FC = () => {
@@ -20,18 +20,22 @@ const Dashboard: React.FC = () => {
 
   const loadDashboardData = async () => {
     try {
-      const [activityRes, nutritionRes, goalsRes, messageRes, insightsRes, calorieRes] = await Promise.all([
-        activityService.getStats(30),
-        nutritionService.getStats(7),
-        goalService.getGoals('active'),
-        aiService.getMotivationalMessage(),
-        aiService.getInsights(),
-        dashboardService.getCalorieBalance(),
+      // One round trip for the whole page
+      const responses = await batchService.get([
+        '/api/activities/stats?days=30',
+        '/api/nutrition/stats?days=7',
+        '/api/goals?status=active',
+        '/api/ai/motivational-message',
+        '/api/ai/insights',
+        '/api/dashboard/calorie-balance',
       ]);
+      const [activityRes, nutritionRes, goalsRes, messageRes, insightsRes, calorieRes] = responses.map(
+        (response) => (response.status === 200 ? response.body : {})
+      );
 
       setActivityStats(activityRes);
       setNutritionStats(nutritionRes);
-      setGoals(goalsRes.goals);
+      setGoals(goalsRes.goals || []);
       setMotivationalMessage(messageRes.message);
       setInsights(insightsRes.insights);
       setCalorieBalance(calorieRes);
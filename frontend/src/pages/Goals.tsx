@@ -26,6 +26,10 @@ const Goals: React.FC = () => {
     distance: '🏃',
     repetitions: '💪',
     duration: '⏱️',
+    workouts_per_week: '📅',
+    total_distance: '🏃',
+    calories_burned: '🔥',
+    protein_per_day: '🥩',
     other: '🎯',
   };
 
@@ -298,6 +302,10 @@ const Goals: React.FC = () => {
                   <option value="distance">Distance</option>
                   <option value="repetitions">Repetitions</option>
                   <option value="duration">Duration</option>
+                  <option value="workouts_per_week">Workouts per Week (tracked)</option>
+                  <option value="total_distance">Total Distance (tracked)</option>
+                  <option value="calories_burned">Calories Burned (tracked)</option>
+                  <option value="protein_per_day">Protein per Day (tracked)</option>
                   <option value="other">Other</option>
                 </select>
               </div>
@@ -180,8 +180,13 @@ Keep it encouraging and practical!`;
     
     setSearching(true);
     try {
-      const response = await nutritionService.searchFoods(query);
-      setSearchResults(response);
+      // Foods the user already logs answer most searches without a remote lookup
+      const frequent = await nutritionService.getFrequentFoods(query, 10);
+      setSearchResults(frequent);
+      if (frequent.length < 5) {
+        const response = await nutritionService.searchFoods(query);
+        setSearchResults([...frequent, ...response]);
+      }
     } catch (error) {
       console.error('Failed to search foods:', error);
       setSearchResults([]);
@@ -452,7 +457,10 @@ Keep it encouraging and practical!`;
                         onClick={() => selectFood(food)}
                         className="w-full text-left px-3 py-2 hover:bg-gray-100 border-b border-gray-100 last:border-b-0"
                       >
-                        <div className="font-medium">{food.name}</div>
+                        <div className="font-medium">
+                          {food.name}
+                          {food.frequent && <span className="ml-2 text-xs text-green-600">Recent</span>}
+                        </div>
                         <div className="text-sm text-gray-600">
                           {food.calories} cal | P: {food.protein}g | C: {food.carbs}g | F: {food.fats}g
                         </div>
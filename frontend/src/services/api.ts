@@ -96,6 +96,21 @@ export const nutritionService = {
     const response = await api.get('/nutrition/food-search', { params: { q: query } });
     return response.data;
   },
+  
+  // The user's own frequently logged foods, in the same shape as searchFoods results
+  getFrequentFoods: async (query?: string, limit?: number) => {
+    const response = await api.get('/nutrition/frequent', { params: { q: query, limit } });
+    return response.data.foods.map((food: any) => ({
+      name: food.food_name,
+      calories: food.calories,
+      protein: food.protein ?? 0,
+      carbs: food.carbohydrates ?? 0,
+      fats: food.fats ?? 0,
+      fiber: food.fiber ?? 0,
+      serving: food.serving_size ?? '',
+      frequent: true,
+    }));
+  },
 };
 
 export const goalService = {
@@ -206,6 +221,61 @@ export const dashboardService = {
   },
 };
 
+export const timelineService = {
+  // One page of activities, meals and goal milestones, newest first; pass next_cursor back for the next page
+  getTimeline: async (cursor?: string, limit?: number, types?: string[]) => {
+    const response = await api.get('/timeline', {
+      params: { cursor, limit, types: types?.join(',') },
+    });
+    return response.data;
+  },
+};
+
+export const syncService = {
+  // Changes after a sync token (0 for a full snapshot); keep pulling while has_more
+  pull: async (since = 0, limit?: number) => {
+    const response = await api.get('/sync', { params: { since, limit } });
+    return response.data;
+  },
+
+  // Offline edits: { entity, op, id, base_seq, data, client_id }[]
+  push: async (changes: any[]) => {
+    const response = await api.post('/sync', { changes });
+    return response.data;
+  },
+};
+
+type BatchRequest = string | { id?: string; path: string; if_none_match?: string };
+type BatchResponse = { id: string | number; path: string; status: number; etag?: string; body: any };
+
+// Last ETag and body per sub-request path, so repeat batches can be answered with 304s
+const batchCache = new Map<string, { etag: string; body: any }>();
+
+export const batchService = {
+  // Several GETs in one round trip; each entry is a path ('/api/goals?status=active') or { id, path }.
+  // Bodies the server reports unchanged (304) are filled in from the previous response.
+  get: async (requests: BatchRequest[]) => {
+    const entries = requests.map((request) => (typeof request === 'string' ? { path: request } : request));
+    const response = await api.post('/batch', {
+      requests: entries.map((entry) => {
+        const cached = batchCache.get(entry.path);
+        return cached && !entry.if_none_match ? { ...entry, if_none_match: cached.etag } : entry;
+      }),
+    });
+    return (response.data.responses as BatchResponse[]).map((result, index) => {
+      const path = entries[index].path;
+      const cached = batchCache.get(path);
+      if (result.status === 304 && cached) {
+        return { ...result, status: 200, body: cached.body };
+      }
+      if (result.status === 200 && result.etag) {
+        batchCache.set(path, { etag: result.etag, body: result.body });
+      }
+      return result;
+    });
+  },
+};
+
 export default api;
 
 